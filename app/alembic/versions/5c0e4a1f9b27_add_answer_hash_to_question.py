@@ -0,0 +1,26 @@
+"""Add answer_hash to Question
+
+Revision ID: 5c0e4a1f9b27
+Revises: e9d92231cb5a
+Create Date: 2026-10-18 10:12:41.518204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel.sql.sqltypes
+
+# revision identifiers, used by Alembic.
+revision = '5c0e4a1f9b27'
+down_revision = 'e9d92231cb5a'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('question', sa.Column('answer_hash', sqlmodel.sql.sqltypes.AutoString(length=64), nullable=True))
+    # Left NULL for existing questions: submissions hash the stored answer when
+    # the hash is missing, and new and updated questions are hashed by the app
+
+
+def downgrade():
+    op.drop_column('question', 'answer_hash')
@@ -0,0 +1,36 @@
+"""Add Solve and Question.points
+
+Revision ID: 8d3f6b2e1a94
+Revises: 5c0e4a1f9b27
+Create Date: 2026-10-18 14:03:22.907131
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8d3f6b2e1a94'
+down_revision = '5c0e4a1f9b27'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('question', sa.Column('points', sa.Integer(), server_default='10', nullable=False))
+    op.create_table('solve',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('question_id', sa.Integer(), nullable=False),
+    sa.Column('points', sa.Integer(), nullable=False),
+    sa.Column('solved_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['question_id'], ['question.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['user_id'], ['user.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('user_id', 'question_id')
+    )
+
+
+def downgrade():
+    op.drop_table('solve')
+    op.drop_column('question', 'points')
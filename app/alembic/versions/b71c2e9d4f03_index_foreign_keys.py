@@ -0,0 +1,52 @@
+"""Index foreign keys
+
+Revision ID: b71c2e9d4f03
+Revises: 8d3f6b2e1a94
+Create Date: 2026-10-18 15:21:07.344518
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'b71c2e9d4f03'
+down_revision = '8d3f6b2e1a94'
+branch_labels = None
+depends_on = None
+
+INDEXES = [
+    ('room', 'owner_id'),
+    ('item', 'owner_id'),
+    ('badge', 'owner_id'),
+    ('section', 'room_id'),
+    ('question', 'section_id'),
+    ('profile', 'user_id'),
+    ('solve', 'question_id'),
+]
+
+
+def upgrade():
+    # CONCURRENTLY does not lock out writes while the index builds, but cannot
+    # run inside a transaction. A failed build leaves an INVALID index, drop it
+    # and run the migration again.
+    with op.get_context().autocommit_block():
+        for table, column in INDEXES:
+            op.create_index(
+                op.f(f'ix_{table}_{column}'),
+                table,
+                [column],
+                unique=False,
+                postgresql_concurrently=True,
+                if_not_exists=True,
+            )
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        for table, column in reversed(INDEXES):
+            op.drop_index(
+                op.f(f'ix_{table}_{column}'),
+                table_name=table,
+                postgresql_concurrently=True,
+                if_exists=True,
+            )
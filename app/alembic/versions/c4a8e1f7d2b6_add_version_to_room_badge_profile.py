@@ -0,0 +1,29 @@
+"""Add version to Room, Badge and Profile
+
+Revision ID: c4a8e1f7d2b6
+Revises: b71c2e9d4f03
+Create Date: 2026-10-18 19:02:33.871240
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c4a8e1f7d2b6'
+down_revision = 'b71c2e9d4f03'
+branch_labels = None
+depends_on = None
+
+TABLES = ['room', 'badge', 'profile']
+
+
+def upgrade():
+    # a constant default fills existing rows without rewriting the tables
+    for table in TABLES:
+        op.add_column(table, sa.Column('version', sa.Integer(), server_default='1', nullable=False))
+
+
+def downgrade():
+    for table in TABLES:
+        op.drop_column(table, 'version')
@@ -1,15 +1,19 @@
-from collections.abc import Generator
+from collections.abc import AsyncGenerator, Generator
 from typing import Annotated
 
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
 from pydantic import ValidationError
+from sqlalchemy.orm import make_transient_to_detached
+from sqlalchemy.orm.util import identity_key
 from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from app.core import security
 from app.core.config import settings
-from app.core.db import engine
+from app.core.db import async_engine, engine
+from app.core.user_cache import CachedUser, user_cache
 from app.models import TokenPayload, User
 
 reusable_oauth2 = OAuth2PasswordBearer(
@@ -22,22 +26,32 @@ def get_db() -> Generator[Session, None, None]:
         yield session
 
 
+async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
+    # expire_on_commit=False: touching an expired attribute would need implicit IO,
+    # which AsyncSession cannot do outside of an await
+    async with AsyncSession(async_engine, expire_on_commit=False) as session:
+        yield session
+
+
 SessionDep = Annotated[Session, Depends(get_db)]
+AsyncSessionDep = Annotated[AsyncSession, Depends(get_async_db)]
 TokenDep = Annotated[str, Depends(reusable_oauth2)]
 
 
-def get_current_user(session: SessionDep, token: TokenDep) -> User:
+def _decode_token(token: str) -> TokenPayload:
     try:
         payload = jwt.decode(
             token, settings.SECRET_KEY, algorithms=[security.ALGORITHM]
         )
-        token_data = TokenPayload(**payload)
+        return TokenPayload(**payload)
     except (JWTError, ValidationError):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Could not validate credentials",
         )
-    user = session.get(User, token_data.sub)
+
+
+def _check_user(user: User | None) -> User:
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     if not user.is_active:
@@ -45,7 +59,48 @@ def get_current_user(session: SessionDep, token: TokenDep) -> User:
     return user
 
 
+def _attach_cached_user(session: Session, cached: CachedUser) -> User:
+    """
+    Rebuild the cached user as a persistent instance of `session` without a query.
+
+    Columns that are not cached (hashed_password) and relationships load on first
+    access, and the instance can be modified and committed as if it had been
+    fetched, so routes cannot tell the difference.
+    """
+    if user := session.identity_map.get(identity_key(User, cached.id)):
+        return user  # type: ignore[no-any-return]
+    user = User(**cached._asdict())
+    make_transient_to_detached(user)
+    session.add(user)
+    return user
+
+
+def get_current_user(session: SessionDep, token: TokenDep) -> User:
+    token_data = _decode_token(token)
+    if token_data.sub is not None and (cached := user_cache.get(token_data.sub)):
+        return _check_user(_attach_cached_user(session, cached))
+    generation = user_cache.generation
+    user = session.get(User, token_data.sub)
+    if user:
+        cached = CachedUser.from_user(user)
+        user_cache.set(cached.id, cached, generation)
+    return _check_user(user)
+
+
+async def get_current_user_async(session: AsyncSessionDep, token: TokenDep) -> User:
+    token_data = _decode_token(token)
+    if token_data.sub is not None and (cached := user_cache.get(token_data.sub)):
+        return _check_user(_attach_cached_user(session.sync_session, cached))
+    generation = user_cache.generation
+    user = await session.get(User, token_data.sub)
+    if user:
+        cached = CachedUser.from_user(user)
+        user_cache.set(cached.id, cached, generation)
+    return _check_user(user)
+
+
 CurrentUser = Annotated[User, Depends(get_current_user)]
+AsyncCurrentUser = Annotated[User, Depends(get_current_user_async)]
 
 
 def get_current_active_superuser(current_user: CurrentUser) -> User:
@@ -54,3 +109,11 @@ def get_current_active_superuser(current_user: CurrentUser) -> User:
             status_code=400, detail="The user doesn't have enough privileges"
         )
     return current_user
+
+
+async def get_current_active_superuser_async(current_user: AsyncCurrentUser) -> User:
+    if not current_user.is_superuser:
+        raise HTTPException(
+            status_code=400, detail="The user doesn't have enough privileges"
+        )
+    return current_user
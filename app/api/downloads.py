@@ -0,0 +1,176 @@
+import mimetypes
+from email.utils import format_datetime
+from urllib.parse import quote
+
+import anyio
+from fastapi import Request, Response
+from starlette.concurrency import iterate_in_threadpool
+from starlette.types import Receive, Scope, Send
+
+from app.api.etags import etag_matches
+from app.core.storage import CHUNK_SIZE, StorageBackend, StoredFile
+
+
+def parse_range(header: str, size: int) -> tuple[int, int] | None:
+    """
+    First and last byte of a single `bytes=` range, clamped to the file.
+
+    Returns None when the header should be ignored (malformed, another unit or
+    several ranges, which are served as the whole file) and raises ValueError
+    when the range cannot be satisfied.
+    """
+    unit, _, spec = header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in spec:
+        return None
+    first, sep, last = spec.strip().partition("-")
+    if not sep or not (first or last):
+        return None
+    if (first and not first.isdigit()) or (last and not last.isdigit()):
+        return None
+    if size == 0:
+        raise ValueError("Empty file")
+    if not first:
+        # suffix range, the last N bytes
+        if int(last) == 0:
+            raise ValueError("Empty suffix range")
+        return max(size - int(last), 0), size - 1
+    start = int(first)
+    end = int(last) if last else size - 1
+    if start > end and last:
+        return None
+    if start >= size:
+        raise ValueError("Range starts after the end of the file")
+    return start, min(end, size - 1)
+
+
+class StoredFileResponse(Response):
+    """
+    Stream `length` bytes of a stored file from `offset`, never holding more
+    than one chunk in memory.
+
+    Local files are handed to the server when it supports it (ASGI `pathsend`
+    for whole files, `zerocopysend` for ranges, which servers implement with
+    sendfile), and read in chunks otherwise.
+    """
+
+    def __init__(
+        self,
+        storage: StorageBackend,
+        stored: StoredFile,
+        *,
+        offset: int,
+        length: int,
+        status_code: int,
+        headers: dict[str, str],
+    ) -> None:
+        super().__init__(status_code=status_code, headers=headers)
+        self.storage = storage
+        self.stored = stored
+        self.offset = offset
+        self.length = length
+        self.headers["content-length"] = str(length)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        await send(
+            {
+                "type": "http.response.start",
+                "status": self.status_code,
+                "headers": self.raw_headers,
+            }
+        )
+        extensions = scope.get("extensions", {})
+        path = self.stored.path
+        whole_file = self.offset == 0 and self.length == self.stored.size
+        if scope["method"].upper() == "HEAD" or not self.length:
+            await send({"type": "http.response.body", "body": b""})
+        elif path and whole_file and "http.response.pathsend" in extensions:
+            await send({"type": "http.response.pathsend", "path": str(path)})
+        elif path and "http.response.zerocopysend" in extensions:
+            f = await anyio.to_thread.run_sync(path.open, "rb")
+            try:
+                await send(
+                    {
+                        "type": "http.response.zerocopysend",
+                        "file": f,
+                        "offset": self.offset,
+                        "count": self.length,
+                    }
+                )
+            finally:
+                f.close()
+        elif path:
+            async with await anyio.open_file(path, mode="rb") as f:
+                await f.seek(self.offset)
+                remaining = self.length
+                while remaining:
+                    chunk = await f.read(min(CHUNK_SIZE, remaining))
+                    remaining = remaining - len(chunk) if chunk else 0
+                    await send(
+                        {
+                            "type": "http.response.body",
+                            "body": chunk,
+                            "more_body": bool(remaining),
+                        }
+                    )
+        else:
+            chunks = self.storage.read(self.stored.name, self.offset, self.length)
+            async for chunk in iterate_in_threadpool(chunks):
+                await send(
+                    {"type": "http.response.body", "body": chunk, "more_body": True}
+                )
+            await send({"type": "http.response.body", "body": b""})
+
+
+def file_response(
+    request: Request, storage: StorageBackend, stored: StoredFile
+) -> Response:
+    """
+    Response for a GET of `stored`: 304 when the client's copy is current, 206
+    for a satisfiable `Range`, 416 for an unsatisfiable one, 200 otherwise.
+    """
+    headers = {
+        "etag": stored.etag,
+        "last-modified": format_datetime(stored.last_modified, usegmt=True),
+        "accept-ranges": "bytes",
+    }
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and etag_matches(if_none_match, stored.etag):
+        return Response(status_code=304, headers=headers)
+
+    content_type = mimetypes.guess_type(stored.name)[0] or "application/octet-stream"
+    headers["content-type"] = content_type
+    headers[
+        "content-disposition"
+    ] = f"attachment; filename*=UTF-8''{quote(stored.name)}"
+
+    byte_range = None
+    # If-Range: only honour the range while the client's copy is still current
+    if (range_header := request.headers.get("range")) and request.headers.get(
+        "if-range", stored.etag
+    ) == stored.etag:
+        try:
+            byte_range = parse_range(range_header, stored.size)
+        except ValueError:
+            return Response(
+                status_code=416,
+                headers={**headers, "content-range": f"bytes */{stored.size}"},
+            )
+    if byte_range is None:
+        return StoredFileResponse(
+            storage,
+            stored,
+            offset=0,
+            length=stored.size,
+            status_code=200,
+            headers=headers,
+        )
+    start, end = byte_range
+    headers["content-range"] = f"bytes {start}-{end}/{stored.size}"
+    return StoredFileResponse(
+        storage,
+        stored,
+        offset=start,
+        length=end - start + 1,
+        status_code=206,
+        headers=headers,
+    )
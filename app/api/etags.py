@@ -0,0 +1,35 @@
+from fastapi import Request, Response
+
+# Clients may keep a copy but revalidate it on every use, which costs a 304
+# while the version has not changed
+CACHE_CONTROL = "private, no-cache"
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    if if_none_match.strip() == "*":
+        return True
+    # weak comparison, as required for If-None-Match
+    tags = (tag.strip().removeprefix("W/") for tag in if_none_match.split(","))
+    return etag.removeprefix("W/") in tags
+
+
+def version_etag(version: int) -> str:
+    return f'"v{version}"'
+
+
+def set_version_etag(response: Response, version: int) -> None:
+    response.headers["etag"] = version_etag(version)
+    response.headers["cache-control"] = CACHE_CONTROL
+
+
+def not_modified(request: Request, version: int) -> Response | None:
+    """
+    A 304 when the request's If-None-Match has the ETag of `version`.
+    """
+    etag = version_etag(version)
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and etag_matches(if_none_match, etag):
+        return Response(
+            status_code=304, headers={"etag": etag, "cache-control": CACHE_CONTROL}
+        )
+    return None
@@ -0,0 +1,64 @@
+import csv
+import io
+import json
+from collections.abc import AsyncIterator
+from typing import Any, Literal
+
+from fastapi.responses import StreamingResponse
+from sqlmodel import SQLModel, select
+
+from app.core.db import async_engine
+
+ExportFormat = Literal["ndjson", "csv"]
+
+# Rows fetched from the server-side cursor, and written, at a time
+EXPORT_BATCH_SIZE = 1000
+
+MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv; charset=utf-8"}
+
+
+def _csv_chunk(rows: list[Any]) -> str:
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(rows)
+    return buffer.getvalue()
+
+
+async def _export_rows(
+    model: type[SQLModel], out_model: type[SQLModel], format: ExportFormat
+) -> AsyncIterator[str]:
+    table = model.__table__  # type: ignore[attr-defined]
+    # the columns of `out_model`, never the others (hashed passwords...)
+    columns = [c for c in table.c if c.name in out_model.model_fields]
+    names = [c.name for c in columns]
+    statement = select(*columns).order_by(*table.primary_key)
+    if format == "csv":
+        yield _csv_chunk([names])
+    # Its own connection: the request's session is closed before the body is
+    # sent. A single statement reads a single snapshot, and yield_per makes it
+    # a server-side cursor, so memory does not grow with the table.
+    async with async_engine.connect() as connection:
+        result = await connection.stream(
+            statement.execution_options(yield_per=EXPORT_BATCH_SIZE)
+        )
+        async for rows in result.partitions(EXPORT_BATCH_SIZE):
+            if format == "csv":
+                yield _csv_chunk(rows)
+            else:
+                yield "".join(
+                    json.dumps(dict(zip(names, row, strict=True)), default=str) + "\n"
+                    for row in rows
+                )
+
+
+def export_response(
+    model: type[SQLModel], out_model: type[SQLModel], format: ExportFormat
+) -> StreamingResponse:
+    """
+    Stream every row of `model` as NDJSON or CSV, with the fields of `out_model`.
+    """
+    filename = f"{model.__tablename__}.{format}"  # type: ignore[attr-defined]
+    return StreamingResponse(
+        _export_rows(model, out_model, format),
+        media_type=MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
@@ -10,6 +10,7 @@ from app.api.routes import (
     utils,
     badges,
     questions,
+    leaderboard,
 )
 
 api_router = APIRouter()
@@ -22,3 +23,6 @@ api_router.include_router(rooms.router, prefix="/rooms", tags=["rooms"])
 api_router.include_router(sections.router,prefix="/pages", tags=["pages"])
 api_router.include_router(badges.router,prefix="/badges", tags=["badges"])
 api_router.include_router(questions.router,prefix="/questions", tags=["questions"])
+api_router.include_router(
+    leaderboard.router, prefix="/leaderboard", tags=["leaderboard"]
+)
@@ -0,0 +1,173 @@
+import logging
+import time
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.compression import response_compressor
+from app.core.metrics import metrics
+from app.core.query_stats import RequestQueries, current_queries, route_query_stats
+
+logger = logging.getLogger(__name__)
+
+
+class QueryStatsMiddleware:
+    """
+    Counts and times the SQL statements of each request, reports statement
+    shapes repeated `n_plus_one_threshold` times or more as an N+1, and adds
+    the totals to the per-route stats.
+
+    With `headers`, responses carry X-DB-Queries, X-DB-Time-Ms and
+    X-DB-Repeated-Queries (the most any statement shape was repeated). Queries
+    run after the response started, by streaming bodies, are not in the headers.
+    """
+
+    def __init__(
+        self, app: ASGIApp, *, headers: bool, n_plus_one_threshold: int
+    ) -> None:
+        self.app = app
+        self.headers = headers
+        self.n_plus_one_threshold = n_plus_one_threshold
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        queries = RequestQueries()
+        token = current_queries.set(queries)
+
+        async def send_with_headers(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(scope=message)
+                headers["X-DB-Queries"] = str(queries.count)
+                headers["X-DB-Time-Ms"] = f"{queries.seconds * 1000:.3f}"
+                headers["X-DB-Repeated-Queries"] = str(queries.max_repeats)
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_headers if self.headers else send)
+        finally:
+            current_queries.reset(token)
+            self._record(scope, queries)
+
+    def _record(self, scope: Scope, queries: RequestQueries) -> None:
+        # the matched route, set by FastAPI's router; None for a 404
+        route = scope.get("route")
+        if route is None:
+            return
+        name = f"{scope['method']} {route.path}"
+        repeated = queries.repeated(self.n_plus_one_threshold)
+        if repeated:
+            statement, times = repeated[0]
+            logger.warning(
+                "Possible N+1 in %s: statement run %s times: %s",
+                name,
+                times,
+                statement,
+            )
+        route_query_stats.record(name, queries, n_plus_one=bool(repeated))
+
+
+class MetricsMiddleware:
+    """
+    Times every request into `metrics`, labeled by the route's unique id (the
+    OpenAPI operation id, e.g. "rooms-read_rooms"), so the label set stays
+    bounded whatever the paths requested.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        start = time.perf_counter()
+        status = 500
+        metrics.request_started()
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            route = scope.get("route")
+            name = getattr(route, "unique_id", None) or getattr(route, "name", None)
+            metrics.request_finished(
+                name or "unmatched",
+                scope["method"],
+                status,
+                time.perf_counter() - start,
+            )
+
+
+class CompressionMiddleware:
+    """
+    Compresses the response bodies `response_compressor` deems worth it with the
+    encoding the client prefers, reusing the cached compressed body of a GET
+    response served before.
+
+    Streamed bodies (downloads, exports) and bodies already encoded are sent as
+    they are. A compressed response's ETag is made weak, the compressed body
+    being another representation; If-None-Match compares ETags weakly anyway.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if (
+            scope["type"] != "http"
+            or scope["method"] == "HEAD"
+            or response_compressor.minimum_size is None
+        ):
+            await self.app(scope, receive, send)
+            return
+        encoding = response_compressor.negotiate(
+            Headers(scope=scope).get("accept-encoding", "")
+        )
+        start: Message = {}
+        body_started = False
+
+        async def send_compressed(message: Message) -> None:
+            nonlocal start, body_started
+            if message["type"] == "http.response.start":
+                # held until the body tells whether to compress
+                start = message
+                return
+            if body_started:
+                await send(message)
+                return
+            body_started = True
+            body = message.get("body", b"")
+            headers = MutableHeaders(scope=start)
+            if (
+                message.get("more_body", False)
+                or "content-encoding" in headers
+                or not response_compressor.compressible(
+                    headers.get("content-type", ""), len(body)
+                )
+            ):
+                await send(start)
+                await send(message)
+                return
+            headers.add_vary_header("Accept-Encoding")
+            if encoding is not None:
+                key = None
+                if scope["method"] == "GET" and start["status"] == 200:
+                    url = f"{scope['path']}?{scope['query_string'].decode('latin-1')}"
+                    key = response_compressor.cache_key(url, headers.get("etag"), body)
+                body = response_compressor.compress(body, encoding, key)
+                headers["content-encoding"] = encoding
+                headers["content-length"] = str(len(body))
+                etag = headers.get("etag")
+                if etag and not etag.startswith("W/"):
+                    headers["etag"] = f"W/{etag}"
+            await send(start)
+            await send({"type": "http.response.body", "body": body})
+
+        await self.app(scope, receive, send_compressed)
@@ -0,0 +1,57 @@
+import base64
+import json
+from collections.abc import Sequence
+from typing import Any
+from uuid import UUID
+
+from fastapi import HTTPException
+from sqlalchemy.orm import InstrumentedAttribute
+from sqlmodel.sql.expression import SelectOfScalar
+from sqlmodel.sql.sqltypes import GUID
+
+
+def encode_cursor(value: Any) -> str:
+    payload = json.dumps({"k": str(value) if not isinstance(value, int) else value})
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, key: InstrumentedAttribute[Any]) -> Any:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        value = json.loads(base64.urlsafe_b64decode(padded))["k"]
+        # back to the key's own type, sqlmodel's GUID (Profile.id) has no python_type
+        python_type = UUID if isinstance(key.type, GUID) else key.type.python_type
+        return python_type(value)
+    except (ValueError, TypeError, KeyError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def paginate(
+    statement: SelectOfScalar[Any],
+    key: InstrumentedAttribute[Any],
+    *,
+    skip: int,
+    limit: int,
+    cursor: str | None,
+) -> SelectOfScalar[Any]:
+    """
+    Apply either offset or keyset pagination, ordered by `key`.
+
+    With a cursor the query seeks past the last key of the previous page, so the
+    cost of a page does not grow with its depth; `skip` is ignored.
+    """
+    statement = statement.order_by(key).limit(limit)
+    if cursor is not None:
+        return statement.where(key > decode_cursor(cursor, key))
+    return statement.offset(skip)
+
+
+def next_cursor(
+    rows: Sequence[Any], key: InstrumentedAttribute[Any], limit: int
+) -> str | None:
+    """
+    Cursor for the page after `rows`, or None when this was the last page.
+    """
+    if not rows or len(rows) < limit:
+        return None
+    return encode_cursor(getattr(rows[-1], key.key))
@@ -0,0 +1,37 @@
+from typing import Any
+
+from fastapi.responses import JSONResponse, ORJSONResponse, Response
+from pydantic import BaseModel
+
+from app.core.config import settings
+
+
+class ModelResponse(Response):
+    """
+    An already validated response model, serialized to JSON by pydantic in one
+    pass.
+
+    Returning a model, FastAPI dumps it, validates the dump against the route's
+    `response_model`, converts the result to plain Python and only then encodes
+    it. Routes that build their response model themselves, from ORM rows, return
+    it in a ModelResponse instead: the model is the validated output, and the
+    route's `response_model` is only left for the OpenAPI schema.
+    """
+
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        assert isinstance(content, BaseModel)
+        return content.__pydantic_serializer__.to_json(content, by_alias=True)
+
+
+def default_response_class() -> type[JSONResponse]:
+    """
+    The response class of routes that return plain data, see JSON_RESPONSE_CLASS.
+    """
+    if settings.JSON_RESPONSE_CLASS == "orjson":
+        # fail at startup rather than on the first response
+        import orjson  # noqa: F401
+
+        return ORJSONResponse
+    return JSONResponse
@@ -1,13 +1,17 @@
 from typing import Any
-from fastapi import APIRouter, Depends, HTTPException
-from sqlmodel import func, select
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from sqlmodel import select
 from app import crud
 
 from app.api.deps import (
-    CurrentUser,
-    SessionDep,
-    get_current_active_superuser,
+    AsyncCurrentUser,
+    AsyncSessionDep,
+    get_current_active_superuser_async,
 )
+from app.api.etags import not_modified, set_version_etag
+from app.api.pagination import next_cursor, paginate
+from app.api.responses import ModelResponse
+from app.core.counts import CountMode, count_rows
 from app.models import (
     Badge,
     BadgeCreate,
@@ -21,55 +25,84 @@ router = APIRouter()
 
 
 @router.get(
-    "/", dependencies=[Depends(get_current_active_superuser)], response_model=BadgesOut
+    "/",
+    dependencies=[Depends(get_current_active_superuser_async)],
+    response_model=BadgesOut,
 )
-def read_badges(session: SessionDep, skip: int = 0, limit: int = 100) -> Any:
+async def read_badges(
+    session: AsyncSessionDep,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: str | None = None,
+    count_mode: CountMode = "exact",
+) -> Any:
     """
     Retrieve badges.
     """
 
-    count_statement = select(func.count()).select_from(Badge)
-    count = session.exec(count_statement).one()
+    count = await session.run_sync(lambda s: count_rows(s, Badge, mode=count_mode))
 
-    statement = select(Badge).offset(skip).limit(limit)
-    badges = session.exec(statement).all()
+    statement = paginate(select(Badge), Badge.id, skip=skip, limit=limit, cursor=cursor)
+    badges = (await session.exec(statement)).all()
 
-    return BadgesOut(data=badges, count=count)
+    return ModelResponse(
+        BadgesOut(
+            data=badges, count=count, next_cursor=next_cursor(badges, Badge.id, limit)
+        )
+    )
 
 
-@router.get("/{badge_id}", response_model=BadgeOut)
-def read_badge_by_id(session: SessionDep, badge_id: int) -> Any:
+@router.get("/{badge_id}", response_model=BadgeOut, responses={304: {}})
+async def read_badge_by_id(
+    request: Request, response: Response, session: AsyncSessionDep, badge_id: int
+) -> Any:
     """
-    Get badge by ID.
+    Get badge by ID. Answers 304 when `If-None-Match` has the current ETag.
     """
-    badge = session.get(Badge, badge_id)
+    if "if-none-match" in request.headers:
+        statement = select(Badge.version).where(Badge.id == badge_id)
+        version = (await session.exec(statement)).first()
+        if version is not None and (unchanged := not_modified(request, version)):
+            return unchanged
+    badge = await session.get(Badge, badge_id)
     if not badge:
         raise HTTPException(status_code=404, detail="Badge not found")
+    set_version_etag(response, badge.version)
     return badge
 
 
 @router.post(
-    "/", dependencies=[Depends(get_current_active_superuser)], response_model=BadgeOut
+    "/",
+    dependencies=[Depends(get_current_active_superuser_async)],
+    response_model=BadgeOut,
 )
-def create_badge(*, session: SessionDep, badge_in: BadgeCreate) -> Any:
+async def create_badge(
+    *, session: AsyncSessionDep, current_user: AsyncCurrentUser, badge_in: BadgeCreate
+) -> Any:
     """
     Create new badge.
     """
-    badge = crud.get_badge_by_name(session=session, name=badge_in.name)
+    badge = await session.run_sync(
+        lambda s: crud.get_badge_by_title(session=s, title=badge_in.title)
+    )
     if badge:
         raise HTTPException(
             status_code=400,
-            detail="The badge with this name already exists in the system.",
+            detail="The badge with this title already exists in the system.",
         )
 
-    badge = crud.create_badge(session=session, badge_create=badge_in)
+    badge = await session.run_sync(
+        lambda s: crud.create_badge(
+            session=s, badge_create=badge_in, owner_id=current_user.id
+        )
+    )
     return badge
 
 
 @router.patch("/{badge_id}", response_model=BadgeOut)
-def update_badge(
+async def update_badge(
     *,
-    session: SessionDep,
+    session: AsyncSessionDep,
     badge_id: int,
     badge_in: BadgeUpdate,
 ) -> Any:
@@ -77,31 +110,35 @@ def update_badge(
     Update a badge.
     """
 
-    db_badge = session.get(Badge, badge_id)
+    db_badge = await session.get(Badge, badge_id)
     if not db_badge:
         raise HTTPException(
             status_code=404,
             detail="The badge with this id does not exist in the system",
         )
-    if badge_in.name:
-        existing_badge = crud.get_badge_by_name(session=session, name=badge_in.name)
+    if badge_in.title:
+        existing_badge = await session.run_sync(
+            lambda s: crud.get_badge_by_title(session=s, title=badge_in.title)
+        )
         if existing_badge and existing_badge.id != badge_id:
             raise HTTPException(
-                status_code=409, detail="Badge with this name already exists"
+                status_code=409, detail="Badge with this title already exists"
             )
 
-    db_badge = crud.update_badge(session=session, db_badge=db_badge, badge_in=badge_in)
+    db_badge = await session.run_sync(
+        lambda s: crud.update_badge(session=s, db_badge=db_badge, badge_in=badge_in)
+    )
     return db_badge
 
 
 @router.delete("/{badge_id}")
-def delete_badge(
-    session: SessionDep, current_user: CurrentUser, badge_id: int
+async def delete_badge(
+    session: AsyncSessionDep, current_user: AsyncCurrentUser, badge_id: int
 ) -> Message:
     """
     Delete a badge.
     """
-    badge = session.get(Badge, badge_id)
+    badge = await session.get(Badge, badge_id)
     if not badge:
         raise HTTPException(status_code=404, detail="Badge not found")
     elif badge != current_user and not current_user.is_superuser:
@@ -109,6 +146,6 @@ def delete_badge(
             status_code=403, detail="The user doesn't have enough privileges"
         )
 
-    session.delete(badge)
-    session.commit()
+    await session.delete(badge)
+    await session.commit()
     return Message(message="Badge deleted successfully")
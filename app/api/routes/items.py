@@ -1,9 +1,12 @@
 from typing import Any
 
 from fastapi import APIRouter, HTTPException
-from sqlmodel import func, select
+from sqlmodel import select
 
 from app.api.deps import CurrentUser, SessionDep
+from app.api.pagination import next_cursor, paginate
+from app.api.responses import ModelResponse
+from app.core.counts import CountMode, count_rows
 from app.models import Item, ItemCreate, ItemOut, ItemsOut, ItemUpdate, Message
 
 router = APIRouter()
@@ -11,33 +14,31 @@ router = APIRouter()
 
 @router.get("/", response_model=ItemsOut)
 def read_items(
-    session: SessionDep, current_user: CurrentUser, skip: int = 0, limit: int = 100
+    session: SessionDep,
+    current_user: CurrentUser,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: str | None = None,
+    count_mode: CountMode = "exact",
 ) -> Any:
     """
     Retrieve items.
     """
 
     if current_user.is_superuser:
-        count_statement = select(func.count()).select_from(Item)
-        count = session.exec(count_statement).one()
-        statement = select(Item).offset(skip).limit(limit)
-        items = session.exec(statement).all()
+        filters = []
     else:
-        count_statement = (
-            select(func.count())
-            .select_from(Item)
-            .where(Item.owner_id == current_user.id)
-        )
-        count = session.exec(count_statement).one()
-        statement = (
-            select(Item)
-            .where(Item.owner_id == current_user.id)
-            .offset(skip)
-            .limit(limit)
-        )
-        items = session.exec(statement).all()
+        filters = [Item.owner_id == current_user.id]
+    count = count_rows(session, Item, *filters, mode=count_mode)
+    statement = select(Item).where(*filters)
+    statement = paginate(statement, Item.id, skip=skip, limit=limit, cursor=cursor)
+    items = session.exec(statement).all()
 
-    return ItemsOut(data=items, count=count)
+    return ModelResponse(
+        ItemsOut(
+            data=items, count=count, next_cursor=next_cursor(items, Item.id, limit)
+        )
+    )
 
 
 @router.get("/{id}", response_model=ItemOut)
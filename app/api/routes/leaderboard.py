@@ -0,0 +1,94 @@
+from typing import Any
+
+from fastapi import APIRouter, Query
+from sqlmodel import select
+
+from app.api.deps import AsyncCurrentUser, AsyncSessionDep
+from app.core.leaderboard import LeaderboardEntry, leaderboard
+from app.models import (
+    LeaderboardAroundOut,
+    LeaderboardEntryOut,
+    LeaderboardOut,
+    LeaderboardPlayerOut,
+    User,
+)
+
+router = APIRouter()
+
+
+async def _with_names(
+    session: AsyncSessionDep, entries: list[LeaderboardEntry]
+) -> list[LeaderboardEntryOut]:
+    """
+    Add the players' names, in one query by primary key.
+    """
+    if not entries:
+        return []
+    statement = select(User.id, User.full_name).where(
+        User.id.in_([e.user_id for e in entries])  # type: ignore[union-attr]
+    )
+    names = dict((await session.exec(statement)).all())
+    out = []
+    for entry in entries:
+        if entry.user_id not in names:
+            # deleted since their solves were read, their solves are gone too
+            leaderboard.remove(entry.user_id)
+            continue
+        out.append(
+            LeaderboardEntryOut(full_name=names[entry.user_id], **entry._asdict())
+        )
+    return out
+
+
+def _player(user_id: int) -> LeaderboardPlayerOut:
+    found = leaderboard.player(user_id)
+    if found is None:
+        return LeaderboardPlayerOut(user_id=user_id)
+    entry, percentile = found
+    return LeaderboardPlayerOut(
+        user_id=user_id, rank=entry.rank, score=entry.score, percentile=percentile
+    )
+
+
+@router.get("/", response_model=LeaderboardOut)
+async def read_leaderboard(
+    session: AsyncSessionDep,
+    current_user: AsyncCurrentUser,
+    limit: int = Query(default=10, ge=1, le=100),
+) -> Any:
+    """
+    Top players by score.
+    """
+    await session.run_sync(leaderboard.sync)
+    data = await _with_names(session, leaderboard.top(limit))
+    return LeaderboardOut(data=data, count=len(leaderboard))
+
+
+@router.get("/me", response_model=LeaderboardAroundOut)
+async def read_leaderboard_around_me(
+    session: AsyncSessionDep,
+    current_user: AsyncCurrentUser,
+    before: int = Query(default=5, ge=0, le=50),
+    after: int = Query(default=5, ge=0, le=50),
+) -> Any:
+    """
+    The current user's rank and percentile, with the players ranked just above
+    and below them.
+    """
+    await session.run_sync(leaderboard.sync)
+    user_id: int = current_user.id  # type: ignore[assignment]
+    player = _player(user_id)
+    entries = leaderboard.around(user_id, before, after)
+    data = await _with_names(session, entries)
+    return LeaderboardAroundOut(data=data, **player.model_dump())
+
+
+@router.get("/players/{user_id}", response_model=LeaderboardPlayerOut)
+async def read_leaderboard_player(
+    session: AsyncSessionDep, current_user: AsyncCurrentUser, user_id: int
+) -> Any:
+    """
+    A player's rank, score and percentile.
+    """
+    await session.run_sync(leaderboard.sync)
+    return _player(user_id)
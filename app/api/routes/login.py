@@ -6,10 +6,14 @@ from fastapi.responses import HTMLResponse
 from fastapi.security import OAuth2PasswordRequestForm
 
 from app import crud
-from app.api.deps import CurrentUser, SessionDep, get_current_active_superuser
+from app.api.deps import (
+    AsyncCurrentUser,
+    AsyncSessionDep,
+    get_current_active_superuser_async,
+)
 from app.core import security
 from app.core.config import settings
-from app.core.security import get_password_hash
+from app.core.hashing import password_hasher
 from app.models import Message, NewPassword, Token, UserOut
 from app.utils import (
     generate_password_reset_token,
@@ -22,16 +26,20 @@ router = APIRouter()
 
 
 @router.post("/login/access-token")
-def login_access_token(
-    session: SessionDep, form_data: Annotated[OAuth2PasswordRequestForm, Depends()]
+async def login_access_token(
+    session: AsyncSessionDep,
+    form_data: Annotated[OAuth2PasswordRequestForm, Depends()],
 ) -> Token:
     """
     OAuth2 compatible token login, get an access token for future requests
     """
-    user = crud.authenticate(
-        session=session, email=form_data.username, password=form_data.password
+    # Same as crud.authenticate, but bcrypt must not run on the event loop
+    user = await session.run_sync(
+        lambda s: crud.get_user_by_email(session=s, email=form_data.username)
     )
-    if not user:
+    if not user or not await password_hasher.verify_async(
+        form_data.password, user.hashed_password
+    ):
         raise HTTPException(status_code=400, detail="Incorrect email or password")
     elif not user.is_active:
         raise HTTPException(status_code=400, detail="Inactive user")
@@ -44,7 +52,7 @@ def login_access_token(
 
 
 @router.post("/login/test-token", response_model=UserOut)
-def test_token(current_user: CurrentUser) -> Any:
+async def test_token(current_user: AsyncCurrentUser) -> Any:
     """
     Test access token
     """
@@ -52,11 +60,13 @@ def test_token(current_user: CurrentUser) -> Any:
 
 
 @router.post("/password-recovery/{email}")
-def recover_password(email: str, session: SessionDep) -> Message:
+async def recover_password(email: str, session: AsyncSessionDep) -> Message:
     """
     Password Recovery
     """
-    user = crud.get_user_by_email(session=session, email=email)
+    user = await session.run_sync(
+        lambda s: crud.get_user_by_email(session=s, email=email)
+    )
 
     if not user:
         raise HTTPException(
@@ -67,6 +77,7 @@ def recover_password(email: str, session: SessionDep) -> Message:
     email_data = generate_reset_password_email(
         email_to=user.email, email=email, token=password_reset_token
     )
+    # only queued, the outbox sends it in the background
     send_email(
         email_to=user.email,
         subject=email_data.subject,
@@ -76,14 +87,16 @@ def recover_password(email: str, session: SessionDep) -> Message:
 
 
 @router.post("/reset-password/")
-def reset_password(session: SessionDep, body: NewPassword) -> Message:
+async def reset_password(session: AsyncSessionDep, body: NewPassword) -> Message:
     """
     Reset password
     """
     email = verify_password_reset_token(token=body.token)
     if not email:
         raise HTTPException(status_code=400, detail="Invalid token")
-    user = crud.get_user_by_email(session=session, email=email)
+    user = await session.run_sync(
+        lambda s: crud.get_user_by_email(session=s, email=email)
+    )
     if not user:
         raise HTTPException(
             status_code=404,
@@ -91,23 +104,25 @@ def reset_password(session: SessionDep, body: NewPassword) -> Message:
         )
     elif not user.is_active:
         raise HTTPException(status_code=400, detail="Inactive user")
-    hashed_password = get_password_hash(password=body.new_password)
+    hashed_password = await password_hasher.hash_async(body.new_password)
     user.hashed_password = hashed_password
     session.add(user)
-    session.commit()
+    await session.commit()
     return Message(message="Password updated successfully")
 
 
 @router.post(
     "/password-recovery-html-content/{email}",
-    dependencies=[Depends(get_current_active_superuser)],
+    dependencies=[Depends(get_current_active_superuser_async)],
     response_class=HTMLResponse,
 )
-def recover_password_html_content(email: str, session: SessionDep) -> Any:
+async def recover_password_html_content(email: str, session: AsyncSessionDep) -> Any:
     """
     HTML Content for Password Recovery
     """
-    user = crud.get_user_by_email(session=session, email=email)
+    user = await session.run_sync(
+        lambda s: crud.get_user_by_email(session=s, email=email)
+    )
 
     if not user:
         raise HTTPException(
@@ -1,10 +1,18 @@
 from typing import Any
 from uuid import UUID
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from fastapi.responses import StreamingResponse
 from sqlmodel import select
 
-from app.api.deps import CurrentUser, SessionDep
+from app.api.deps import (
+    AsyncCurrentUser,
+    AsyncSessionDep,
+    get_current_active_superuser_async,
+)
+from app.api.etags import not_modified, set_version_etag
+from app.api.exports import ExportFormat, export_response
+from app.api.pagination import next_cursor, paginate
 from app.models import Message, Profile, ProfileCreate, ProfileOut, ProfileUpdate
 from app import crud
 
@@ -12,40 +20,77 @@ router = APIRouter()
 
 
 @router.get("/", response_model=list[ProfileOut])
-def read_Profile(session: SessionDep, skip: int = 0, limit: int = 100) -> Any:
+async def read_Profile(
+    session: AsyncSessionDep,
+    response: Response,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: str | None = None,
+) -> Any:
     """
     List all Profiles.
+
+    The body stays a plain list, the cursor of the next page is sent in the
+    `X-Next-Cursor` header instead.
+    """
+    statement = paginate(
+        select(Profile), Profile.id, skip=skip, limit=limit, cursor=cursor
+    )
+    profiles = (await session.exec(statement)).all()
+    if cursor_out := next_cursor(profiles, Profile.id, limit):
+        response.headers["X-Next-Cursor"] = cursor_out
+    return profiles
+
+
+@router.get(
+    "/export",
+    dependencies=[Depends(get_current_active_superuser_async)],
+    response_class=StreamingResponse,
+)
+async def export_profiles(format: ExportFormat = "ndjson") -> StreamingResponse:
+    """
+    Export all profiles as NDJSON or CSV, streamed from one consistent snapshot.
     """
-    statement = select(Profile).offset(skip).limit(limit)
-    return session.exec(statement).all()
+    return export_response(Profile, ProfileOut, format)
 
 
-@router.get("/{profile_id}", response_model=ProfileOut)
-def read_Profile_by_id(session: SessionDep, profile_id: UUID) -> Any:
+@router.get("/{profile_id}", response_model=ProfileOut, responses={304: {}})
+async def read_Profile_by_id(
+    request: Request, response: Response, session: AsyncSessionDep, profile_id: UUID
+) -> Any:
     """
-    Get Profile by ID.
+    Get Profile by ID. Answers 304 when `If-None-Match` has the current ETag.
     """
-    if profile := session.get(Profile, profile_id):
+    if "if-none-match" in request.headers:
+        statement = select(Profile.version).where(Profile.id == profile_id)
+        version = (await session.exec(statement)).first()
+        if version is not None and (unchanged := not_modified(request, version)):
+            return unchanged
+    if profile := await session.get(Profile, profile_id):
+        set_version_etag(response, profile.version)
         return profile
     raise HTTPException(status_code=404, detail="User Profile not found")
 
 
 @router.put("/{id}", response_model=ProfileOut)
-def update_profile(
-    *, session: SessionDep, current_user: CurrentUser, id: UUID, profile: ProfileUpdate
+async def update_profile(
+    *,
+    session: AsyncSessionDep,
+    current_user: AsyncCurrentUser,
+    id: UUID,
+    profile_in: ProfileUpdate,
 ) -> Any:
     """
     Update a profile.
     """
-    profile = session.get(Profile, id)
+    profile = await session.get(Profile, id)
     if not profile:
         raise HTTPException(status_code=404, detail="Profile not found")
     if not current_user.is_superuser and (profile.user_id != current_user.id):
         raise HTTPException(status_code=400, detail="Not enough permissions")
-    update_dict = profile.model_dump(exclude_unset=True)
+    update_dict = profile_in.model_dump(exclude_unset=True)
     profile.sqlmodel_update(update_dict)
     session.add(profile)
-    session.commit()
-    session.refresh(profile)
+    await session.commit()
+    await session.refresh(profile)
     return profile
-
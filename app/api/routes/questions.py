@@ -1,21 +1,32 @@
 from typing import Any
 from fastapi import APIRouter, Depends
-from sqlmodel import func, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlmodel import select
 from app import crud
 from fastapi import APIRouter, Depends, HTTPException
 
 from app.api.deps import (
-    CurrentUser,
-    SessionDep,
-    get_current_active_superuser,
+    AsyncCurrentUser,
+    AsyncSessionDep,
+    get_current_active_superuser_async,
 )
+from app.api.pagination import next_cursor, paginate
+from app.api.responses import ModelResponse
+from app.core.answers import AnswerMatcher, answer_matchers, hash_answer
+from app.core.counts import CountMode, count_rows
+from app.core.leaderboard import leaderboard
 from app.models import (
+    AnswerResult,
+    AnswerSubmit,
     Message,
     Question,
     QuestionCreate,
     QuestionOut,
+    QuestionPublicOut,
     QuestionsOut,
     QuestionUpdate,
+    Section,
+    Solve,
 )
 
 router = APIRouter()
@@ -23,95 +34,158 @@ router = APIRouter()
 
 @router.get(
     "/",
-    dependencies=[Depends(get_current_active_superuser)],
+    dependencies=[Depends(get_current_active_superuser_async)],
     response_model=QuestionsOut,
 )
-def read_questions(session: SessionDep, skip: int = 0, limit: int = 100) -> Any:
+async def read_questions(
+    session: AsyncSessionDep,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: str | None = None,
+    count_mode: CountMode = "exact",
+) -> Any:
     """
     Retrieve questions.
     """
 
-    count_statement = select(func.count()).select_from(Question)
-    count = session.exec(count_statement).one()
+    count = await session.run_sync(lambda s: count_rows(s, Question, mode=count_mode))
 
-    statement = select(Question).offset(skip).limit(limit)
-    questions = session.exec(statement).all()
+    statement = paginate(
+        select(Question), Question.id, skip=skip, limit=limit, cursor=cursor
+    )
+    questions = (await session.exec(statement)).all()
 
-    return QuestionsOut(data=questions, count=count)
+    return ModelResponse(
+        QuestionsOut(
+            data=questions,
+            count=count,
+            next_cursor=next_cursor(questions, Question.id, limit),
+        )
+    )
 
 
 @router.post(
     "/",
-    dependencies=[Depends(get_current_active_superuser)],
+    dependencies=[Depends(get_current_active_superuser_async)],
     response_model=QuestionOut,
 )
-def create_question(*, session: SessionDep, question_in: QuestionCreate) -> Any:
+async def create_question(
+    *, session: AsyncSessionDep, section_id: int, question_in: QuestionCreate
+) -> Any:
     """
-    Create new question.
+    Create new question in the section `section_id`.
     """
-    question = crud.get_question_by_name(session=session, name=question_in.name)
-    if question:
-        raise HTTPException(
-            status_code=400,
-            detail="The question with this name already exists in the system.",
+    if not await session.get(Section, section_id):
+        raise HTTPException(status_code=404, detail="Section not found")
+    question = await session.run_sync(
+        lambda s: crud.create_question(
+            session=s, question_in=question_in, section_id=section_id
         )
-    question = crud.create_question(session=session, question_create=question_in)
+    )
     return question
 
 
-@router.get("/{question_id}", response_model=QuestionOut)
-def read_question_by_id(
-    question_id: int, session: SessionDep, current_user: CurrentUser
+# QuestionOut first: a QuestionPublicOut instance fails its validation for lack of
+# an answer, while a Question would pass QuestionPublicOut's
+@router.get("/{question_id}", response_model=QuestionOut | QuestionPublicOut)
+async def read_question_by_id(
+    question_id: int, session: AsyncSessionDep, current_user: AsyncCurrentUser
 ) -> Any:
     """
-    Get a specific question by id.
+    Get a specific question by id, with its answer for superusers only.
     """
-    question = session.get(Question, question_id)
+    question = await session.get(Question, question_id)
     if not question:
         raise HTTPException(status_code=404, detail="Question not found")
-    return question
+    if current_user.is_superuser:
+        return question
+    return QuestionPublicOut.model_validate(question)
+
+
+@router.post("/{question_id}/submit", response_model=AnswerResult)
+async def submit_answer(
+    session: AsyncSessionDep,
+    current_user: AsyncCurrentUser,
+    question_id: int,
+    submission: AnswerSubmit,
+) -> Any:
+    """
+    Check an answer to a question. The first correct answer of a player adds the
+    question's points to their score.
+    """
+    matcher = answer_matchers.get(question_id)
+    if matcher is None:
+        generation = answer_matchers.generation
+        # only the columns the matcher needs, never the answer itself
+        statement = select(
+            Question.answer_type, Question.answer_hash, Question.points
+        ).where(Question.id == question_id)
+        row = (await session.exec(statement)).first()
+        if not row:
+            raise HTTPException(status_code=404, detail="Question not found")
+        answer_type, answer_hash, points = row
+        if answer_hash is None:
+            # written around the ORM, hash it once from the stored answer
+            answer = (
+                await session.exec(
+                    select(Question.answer).where(Question.id == question_id)
+                )
+            ).one()
+            answer_hash = hash_answer(answer_type, answer)
+        matcher = AnswerMatcher(answer_type, answer_hash, points)
+        answer_matchers.set(question_id, matcher, generation)
+    if not matcher.matches(submission.answer):
+        return AnswerResult(correct=False)
+
+    # the unique (user_id, question_id) constraint makes repeats no-ops
+    statement = (
+        insert(Solve)
+        .values(user_id=current_user.id, question_id=question_id, points=matcher.points)
+        .on_conflict_do_nothing(index_elements=["user_id", "question_id"])
+        .returning(Solve.id)  # type: ignore[arg-type]
+    )
+    solved = (await session.execute(statement)).first()
+    await session.commit()
+    if solved is None:
+        return AnswerResult(correct=True)
+    await session.run_sync(lambda s: leaderboard.sync(s, force=True))
+    return AnswerResult(correct=True, points=matcher.points)
 
 
 @router.patch(
     "/{question_id}",
-    dependencies=[Depends(get_current_active_superuser)],
+    dependencies=[Depends(get_current_active_superuser_async)],
     response_model=QuestionOut,
 )
-def update_question(
+async def update_question(
     *,
-    session: SessionDep,
+    session: AsyncSessionDep,
     question_id: int,
     question_in: QuestionUpdate,
 ) -> Any:
     """
     Update a question.
     """
-    db_question = session.get(Question, question_id)
+    db_question = await session.get(Question, question_id)
     if not db_question:
         raise HTTPException(status_code=404, detail="Question not found")
-    if question_in.name:
-        existing_badge = crud.get_badge_by_name(session=session, name=question_in.name)
-        if existing_badge and existing_badge.id != question_id:
-            raise HTTPException(
-                status_code=409, detail="Badge with this name already exists"
-            )
-
-    db_badge = crud.update_badge(
-        session=session,
-        db_badge=db_badge,
-        question_in=question_in,
+
+    db_question = await session.run_sync(
+        lambda s: crud.update_question(
+            session=s, db_question=db_question, question_in=question_in
+        )
     )
-    return db_badge
+    return db_question
 
 
 @router.delete("/{question_id}")
-def delete_question(
-    session: SessionDep, current_user: CurrentUser, question_id: int
+async def delete_question(
+    session: AsyncSessionDep, current_user: AsyncCurrentUser, question_id: int
 ) -> Message:
     """
     Delete a question.
     """
-    question = session.get(Question, question_id)
+    question = await session.get(Question, question_id)
     if not question:
         raise HTTPException(status_code=404, detail="Question not found")
     elif question != current_user and not current_user.is_superuser:
@@ -119,6 +193,6 @@ def delete_question(
             status_code=403, detail="The user doesn't have enough privileges"
         )
 
-    session.delete(question)
-    session.commit()
+    await session.delete(question)
+    await session.commit()
     return Message(message="Question deleted successfully")
@@ -1,57 +1,138 @@
-from typing import Any
-
-from fastapi import APIRouter, File, HTTPException, UploadFile
-from sqlmodel import func, select
-
-from app.api.deps import CurrentUser, SessionDep
-from app.models import Message, Room, RoomCreate, RoomOut, RoomsOut, RoomUpdate
-from azure.storage.blob import BlobServiceClient
-from datetime import datetime, timedelta
-from azure.storage.blob import (
-    BlobServiceClient,
-    generate_account_sas,
-    ResourceTypes,
-    AccountSasPermissions,
+from typing import Any, Literal
+
+from fastapi import (
+    APIRouter,
+    Depends,
+    File,
+    HTTPException,
+    Request,
+    Response,
+    UploadFile,
+)
+from fastapi.responses import StreamingResponse
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.orm import selectinload
+from sqlmodel import select
+
+from app import crud
+from app.api.deps import (
+    AsyncCurrentUser,
+    AsyncSessionDep,
+    get_current_active_superuser_async,
+)
+from app.api.downloads import file_response
+from app.api.etags import not_modified, set_version_etag
+from app.api.exports import ExportFormat, export_response
+from app.api.pagination import next_cursor, paginate
+from app.api.responses import ModelResponse
+from app.core.counts import CountMode, count_rows
+from app.core.storage import storage
+from app.models import (
+    Message,
+    Room,
+    RoomCreate,
+    RoomOut,
+    RoomsImport,
+    RoomsImportOut,
+    RoomsOut,
+    RoomsTreeOut,
+    RoomTreeOut,
+    RoomUpdate,
+    Section,
 )
 
 
 router = APIRouter()
 
+# One SELECT ... IN per level, whatever the number of rooms and sections
+room_tree_options = selectinload(Room.sections).selectinload(Section.questions)
 
-@router.get("/", response_model=RoomsOut)
-def read_rooms(
-    session: SessionDep, current_user: CurrentUser, skip: int = 0, limit: int = 100
+
+@router.get("/", response_model=RoomsOut | RoomsTreeOut)
+async def read_rooms(
+    session: AsyncSessionDep,
+    current_user: AsyncCurrentUser,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: str | None = None,
+    count_mode: CountMode = "exact",
+    expand: Literal["questions"] | None = None,
 ) -> Any:
     """
     Retrieve rooms.
+
+    With `expand=questions` every section also embeds its questions.
     """
     if current_user.is_superuser:
-        count_statement = select(func.count()).select_from(Room)
-        count = session.exec(count_statement).one()
-        statement = select(Room).offset(skip).limit(limit)
+        filters = []
     else:
-        count_statement = (
-            select(func.count())
-            .select_from(Room)
-            .where(Room.owner_id == current_user.id)
-        )
-        count = session.exec(count_statement).one()
-        statement = (
-            select(Room)
-            .where(Room.owner_id == current_user.id)
-            .offset(skip)
-            .limit(limit)
+        filters = [Room.owner_id == current_user.id]
+    count = await session.run_sync(
+        lambda s: count_rows(s, Room, *filters, mode=count_mode)
+    )
+    statement = select(Room).where(*filters)
+    statement = paginate(statement, Room.id, skip=skip, limit=limit, cursor=cursor)
+    if expand == "questions":
+        statement = statement.options(room_tree_options)
+    rooms = (await session.exec(statement)).all()
+    rooms_out = RoomsTreeOut if expand == "questions" else RoomsOut
+    return ModelResponse(
+        rooms_out(
+            data=rooms, count=count, next_cursor=next_cursor(rooms, Room.id, limit)
         )
-    rooms = session.exec(statement).all()
-    return RoomsOut(data=rooms, count=count)
+    )
+
+
+@router.get(
+    "/export",
+    dependencies=[Depends(get_current_active_superuser_async)],
+    response_class=StreamingResponse,
+)
+async def export_rooms(format: ExportFormat = "ndjson") -> StreamingResponse:
+    """
+    Export all rooms, without their sections, as NDJSON or CSV, streamed from
+    one consistent snapshot.
+    """
+    return export_response(Room, RoomOut, format)
+
+
+@router.get("/{id}", response_model=RoomOut, responses={304: {}})
+async def read_room(
+    request: Request,
+    response: Response,
+    session: AsyncSessionDep,
+    current_user: AsyncCurrentUser,
+    id: int,
+) -> Any:
+    """
+    Get room by ID. Answers 304 when `If-None-Match` has the current ETag.
+    """
+    if "if-none-match" in request.headers:
+        # the version and the owner only, not the room and its sections
+        statement = select(Room.version, Room.owner_id).where(Room.id == id)
+        if row := (await session.exec(statement)).first():
+            version, owner_id = row
+            if current_user.is_superuser or owner_id == current_user.id:
+                if unchanged := not_modified(request, version):
+                    return unchanged
+    room = await session.get(Room, id)
+    if not room:
+        raise HTTPException(status_code=404, detail="Room not found")
+    if not current_user.is_superuser and (room.owner_id != current_user.id):
+        raise HTTPException(status_code=400, detail="Not enough permissions")
+    set_version_etag(response, room.version)
+    return room
 
 
-@router.get("/{id}", response_model=RoomOut)
-def read_room(session: SessionDep, current_user: CurrentUser, id: int) -> Any:
+@router.get("/{id}/tree", response_model=RoomTreeOut)
+async def read_room_tree(
+    session: AsyncSessionDep, current_user: AsyncCurrentUser, id: int
+) -> Any:
     """
-    Get room by ID.
+    Get room by ID with its sections and their questions.
     """
-    room = session.get(Room, id)
+    statement = select(Room).where(Room.id == id).options(room_tree_options)
+    room = (await session.exec(statement)).first()
     if not room:
         raise HTTPException(status_code=404, detail="Room not found")
     if not current_user.is_superuser and (room.owner_id != current_user.id):
@@ -60,68 +141,98 @@ def read_room(session: SessionDep, current_user: CurrentUser, id: int) -> Any:
 
 
 @router.post("/", response_model=RoomOut)
-def create_room(
-    *, session: SessionDep, current_user: CurrentUser, room_in: RoomCreate
+async def create_room(
+    *, session: AsyncSessionDep, current_user: AsyncCurrentUser, room_in: RoomCreate
 ) -> Any:
     """
     Create new room.
     """
     room = Room.model_validate(room_in, update={"owner_id": current_user.id})
     session.add(room)
-    session.commit()
-    session.refresh(room)
+    await session.commit()
+    await session.refresh(room)
     return room
 
 
+@router.post("/bulk", response_model=RoomsImportOut)
+async def import_rooms(
+    *, session: AsyncSessionDep, current_user: AsyncCurrentUser, rooms_in: RoomsImport
+) -> Any:
+    """
+    Create rooms with their sections and questions, all or nothing.
+    """
+    room_ids, sections, questions = await session.run_sync(
+        lambda s: crud.import_rooms(
+            session=s,
+            rooms_in=rooms_in.data,
+            owner_id=current_user.id,  # type: ignore[arg-type]
+        )
+    )
+    return RoomsImportOut(data=room_ids, sections=sections, questions=questions)
+
+
 @router.post("/{id}/upload/")
-def upload_room_file(
-    session: SessionDep,
-    current_user: CurrentUser,
+async def upload_room_file(
+    session: AsyncSessionDep,
+    current_user: AsyncCurrentUser,
     id: int,
     file_name: UploadFile = File(...),
 ):
-    room = session.get(Room, id)
+    room = await session.get(Room, id)
     if not room:
         raise HTTPException(status_code=404, detail="Room not found")
     if not current_user.is_superuser and (room.owner_id != current_user.id):
         raise HTTPException(status_code=400, detail="Not enough permissions")
-    from app.core.config import settings
-
-    # TODO: cache the sas token
-    sas_token = generate_account_sas(
-        account_name=settings.AZURE_ACCOUNT_NAME,
-        account_key=settings.AZURE_ACCOUNT_KEY,
-        resource_types=ResourceTypes(service=True),
-        permission=AccountSasPermissions(read=True),
-        expiry=datetime.now() + timedelta(days=7),
-    )
-
-    blob_service_client = BlobServiceClient(
-        account_url=f"https://{settings.AZURE_ACCOUNT_NAME}.blob.core.windows.net",
-        credential=sas_token,
-    )
-
-    blob = blob_service_client.get_blob_client(
-        container=settings.AZURE_CONTAINER_NAME,
-        blob=file_name.filename,
-    )
-    blob.upload_blob(file_name.file)
+    # storage drivers block (Azure SDK, disk), keep them off the event loop
+    try:
+        await run_in_threadpool(storage.upload, file_name.filename, file_name.file)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid file name")
 
     room.file_name = file_name.filename
     session.add(room)
-    session.commit()
-    session.refresh(room)
+    await session.commit()
+    await session.refresh(room)
     return room
 
 
+@router.get("/{id}/file", response_class=Response)
+async def download_room_file(
+    request: Request,
+    session: AsyncSessionDep,
+    current_user: AsyncCurrentUser,
+    id: int,
+) -> Response:
+    """
+    Download the room's file, supports `Range` and `If-None-Match`.
+    """
+    room = await session.get(Room, id)
+    if not room:
+        raise HTTPException(status_code=404, detail="Room not found")
+    if not current_user.is_superuser and (room.owner_id != current_user.id):
+        raise HTTPException(status_code=400, detail="Not enough permissions")
+    stored = (
+        await run_in_threadpool(storage.stat, room.file_name)
+        if room.file_name
+        else None
+    )
+    if not stored:
+        raise HTTPException(status_code=404, detail="Room has no file")
+    return file_response(request, storage, stored)
+
+
 @router.put("/{id}", response_model=RoomOut)
-def update_room(
-    *, session: SessionDep, current_user: CurrentUser, id: int, room_in: RoomUpdate
+async def update_room(
+    *,
+    session: AsyncSessionDep,
+    current_user: AsyncCurrentUser,
+    id: int,
+    room_in: RoomUpdate,
 ) -> Any:
     """
     Update a room.
     """
-    room = session.get(Room, id)
+    room = await session.get(Room, id)
     if not room:
         raise HTTPException(status_code=404, detail="Room not found")
     if not current_user.is_superuser and (room.owner_id != current_user.id):
@@ -129,21 +240,23 @@ def update_room(
     update_dict = room_in.model_dump(exclude_unset=True)
     room.sqlmodel_update(update_dict)
     session.add(room)
-    session.commit()
-    session.refresh(room)
+    await session.commit()
+    await session.refresh(room)
     return room
 
 
 @router.delete("/{id}", response_model=Message)
-def delete_room(session: SessionDep, current_user: CurrentUser, id: int) -> Message:
+async def delete_room(
+    session: AsyncSessionDep, current_user: AsyncCurrentUser, id: int
+) -> Message:
     """
     Delete a room.
     """
-    room = session.get(Room, id)
+    room = await session.get(Room, id)
     if not room:
         raise HTTPException(status_code=404, detail="Room not found")
-    if room.user_id != current_user.id:
+    if not current_user.is_superuser and (room.owner_id != current_user.id):
         raise HTTPException(status_code=400, detail="Not enough permissions")
-    session.delete(room)
-    session.commit()
+    await session.delete(room)
+    await session.commit()
     return Message(message="Room deleted successfully")
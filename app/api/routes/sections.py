@@ -1,11 +1,14 @@
 from fastapi import APIRouter
-from sqlmodel import func, select
+from sqlmodel import select
 
 from app import crud
 from app.api.deps import (
     CurrentUser,
     SessionDep,
 )
+from app.api.pagination import next_cursor, paginate
+from app.api.responses import ModelResponse
+from app.core.counts import CountMode, count_rows
 from app.models import (
     Message,
     Section,
@@ -22,18 +25,32 @@ router = APIRouter()
     "/",
     response_model=SectionsOut,
 )
-def read_sections(session: SessionDep, skip: int = 0, limit: int = 100):
+def read_sections(
+    session: SessionDep,
+    current_user: CurrentUser,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: str | None = None,
+    count_mode: CountMode = "exact",
+):
     """
     Retrieve sections.
     """
 
-    count_statement = select(func.count()).select_from(Section)
-    count = session.exec(count_statement).one()
-
-    statement = select(Section).offset(skip).limit(limit)
-    sections = session.exec(statement).all()    
+    count = count_rows(session, Section, mode=count_mode)
 
-    return SectionsOut(data=sections, count=count)
+    statement = paginate(
+        select(Section), Section.id, skip=skip, limit=limit, cursor=cursor
+    )
+    sections = session.exec(statement).all()
+
+    return ModelResponse(
+        SectionsOut(
+            data=sections,
+            count=count,
+            next_cursor=next_cursor(sections, Section.id, limit),
+        )
+    )
 
 
 @router.post("/", response_model=SectionOut)
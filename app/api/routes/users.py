@@ -1,9 +1,12 @@
+import csv
+import io
 from typing import Any
-from fastapi import APIRouter, Depends, HTTPException
-from sqlmodel import col, delete, func, select
+from fastapi import APIRouter, Depends, HTTPException, UploadFile
+from fastapi.responses import StreamingResponse
+from sqlmodel import col, delete, select
 from app import crud
 from app.core.config import settings
-from app.core.security import get_password_hash, verify_password
+from app.core.hashing import password_hasher
 from app.utils import generate_new_account_email, send_email
 
 from app.api.deps import (
@@ -11,6 +14,10 @@ from app.api.deps import (
     SessionDep,
     get_current_active_superuser,
 )
+from app.api.exports import ExportFormat, export_response
+from app.api.pagination import next_cursor, paginate
+from app.api.responses import ModelResponse
+from app.core.counts import CountMode, count_rows
 from app.models import (
     Profile,
     Message,
@@ -18,6 +25,8 @@ from app.models import (
     User,
     UserCreate,
     UserCreateOpen,
+    UserImportError,
+    UsersImportOut,
     UserOut,
     UsersOut,
     UserUpdate,
@@ -26,22 +35,34 @@ from app.models import (
 
 router = APIRouter()
 
+# Users hashed and inserted together by POST /users/bulk
+IMPORT_BATCH_SIZE = 500
+
 
 @router.get(
     "/", dependencies=[Depends(get_current_active_superuser)], response_model=UsersOut
 )
-def read_users(session: SessionDep, skip: int = 0, limit: int = 100) -> Any:
+def read_users(
+    session: SessionDep,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: str | None = None,
+    count_mode: CountMode = "exact",
+) -> Any:
     """
     Retrieve users.
     """
 
-    count_statement = select(func.count()).select_from(User)
-    count = session.exec(count_statement).one()
+    count = count_rows(session, User, mode=count_mode)
 
-    statement = select(User).offset(skip).limit(limit)
+    statement = paginate(select(User), User.id, skip=skip, limit=limit, cursor=cursor)
     users = session.exec(statement).all()
 
-    return UsersOut(data=users, count=count)
+    return ModelResponse(
+        UsersOut(
+            data=users, count=count, next_cursor=next_cursor(users, User.id, limit)
+        )
+    )
 
 
 @router.post(
@@ -71,6 +92,77 @@ def create_user(*, session: SessionDep, user_in: UserCreate) -> Any:
     return user
 
 
+@router.post(
+    "/bulk",
+    dependencies=[Depends(get_current_active_superuser)],
+    response_model=UsersImportOut,
+)
+def import_users(*, session: SessionDep, file: UploadFile) -> Any:
+    """
+    Create users from a CSV file with `email`, `password` and optional
+    `full_name` columns.
+
+    The file is read row by row and imported in batches. Invalid rows and
+    emails that already exist are reported by line and skipped, the other rows
+    are created. No welcome emails are sent.
+    """
+    reader = csv.DictReader(io.TextIOWrapper(file.file, encoding="utf-8-sig"))
+    if not reader.fieldnames or not {"email", "password"} <= set(reader.fieldnames):
+        raise HTTPException(
+            status_code=400, detail="The CSV file needs email and password columns"
+        )
+    created = 0
+    errors: list[UserImportError] = []
+    seen: set[str] = set()
+    batch: list[tuple[int, UserCreate]] = []
+
+    def flush() -> None:
+        nonlocal created
+        ids = crud.import_users(session=session, users_in=[u for _, u in batch])
+        created += len(ids)
+        errors.extend(
+            UserImportError(line=line, email=u.email, error="Email already exists")
+            for line, u in batch
+            if u.email not in ids
+        )
+        batch.clear()
+
+    def read_rows() -> None:
+        for row in reader:
+            email = (row.get("email") or "").strip()
+            try:
+                if not email or not row.get("password"):
+                    raise ValueError("Email and password are required")
+                if email in seen:
+                    raise ValueError("Duplicate email in file")
+                user_in = UserCreate(
+                    email=email,
+                    password=row["password"],
+                    full_name=row.get("full_name") or None,
+                )
+            except ValueError as e:  # pydantic's ValidationError included
+                errors.append(
+                    UserImportError(
+                        line=reader.line_num, email=email or None, error=str(e)
+                    )
+                )
+                continue
+            seen.add(email)
+            batch.append((reader.line_num, user_in))
+            if len(batch) >= IMPORT_BATCH_SIZE:
+                flush()
+
+    try:
+        read_rows()
+    except UnicodeDecodeError:
+        # the rows before this point are still imported
+        errors.append(UserImportError(line=reader.line_num + 1, error="Not UTF-8"))
+    if batch:
+        flush()
+    errors.sort(key=lambda e: e.line)
+    return UsersImportOut(created=created, errors=errors)
+
+
 @router.patch("/me", response_model=UserOut)
 def update_user_me(
     *, session: SessionDep, user_in: UserUpdateMe, current_user: CurrentUser
@@ -100,13 +192,13 @@ def update_password_me(
     """
     Update own password.
     """
-    if not verify_password(body.current_password, current_user.hashed_password):
+    if not password_hasher.verify(body.current_password, current_user.hashed_password):
         raise HTTPException(status_code=400, detail="Incorrect password")
     if body.current_password == body.new_password:
         raise HTTPException(
             status_code=400, detail="New password cannot be the same as the current one"
         )
-    hashed_password = get_password_hash(body.new_password)
+    hashed_password = password_hasher.hash(body.new_password)
     current_user.hashed_password = hashed_password
     session.add(current_user)
     session.commit()
@@ -142,6 +234,18 @@ def create_user_open(session: SessionDep, user_in: UserCreateOpen) -> Any:
     return user
 
 
+@router.get(
+    "/export",
+    dependencies=[Depends(get_current_active_superuser)],
+    response_class=StreamingResponse,
+)
+def export_users(format: ExportFormat = "ndjson") -> StreamingResponse:
+    """
+    Export all users as NDJSON or CSV, streamed from one consistent snapshot.
+    """
+    return export_response(User, UserOut, format)
+
+
 @router.get("/{user_id}", response_model=UserOut)
 def read_user_by_id(
     user_id: int, session: SessionDep, current_user: CurrentUser
@@ -1,8 +1,31 @@
-from fastapi import APIRouter, Depends
+import os
+
+from fastapi import APIRouter, Depends, HTTPException
 from pydantic.networks import EmailStr
 
 from app.api.deps import get_current_active_superuser
-from app.models import Message
+from app.core import query_advisor
+from app.core.compression import response_compressor
+from app.core.db import async_engine, engine
+from app.core.hashing import password_hasher
+from app.core.invalidation import invalidation_bus
+from app.core.outbox import email_outbox
+from app.core.pool import pool_stats
+from app.core.query_stats import route_query_stats
+from app.core.storage import storage
+from app.core.user_cache import user_cache
+from app.models import (
+    CacheInvalidationStatsOut,
+    CompressionStatsOut,
+    DbPoolStatsOut,
+    EmailOutboxStatsOut,
+    Message,
+    PasswordHasherStatsOut,
+    QueryAdvisorStatsOut,
+    QueryStatsOut,
+    StorageStatsOut,
+    UserCacheStatsOut,
+)
 from app.utils import generate_test_email, send_email
 
 router = APIRouter()
@@ -15,7 +38,7 @@ router = APIRouter()
 )
 def test_email(email_to: EmailStr) -> Message:
     """
-    Test emails.
+    Test emails. The email is queued, see /utils/email-outbox/ for delivery.
     """
     email_data = generate_test_email(email_to=email_to)
     send_email(
@@ -24,3 +47,124 @@ def test_email(email_to: EmailStr) -> Message:
         html_content=email_data.html_content,
     )
     return Message(message="Test email sent")
+
+
+@router.get(
+    "/db-pool/",
+    dependencies=[Depends(get_current_active_superuser)],
+    response_model=DbPoolStatsOut,
+)
+def db_pool_stats() -> DbPoolStatsOut:
+    """
+    Connection pool usage of the worker process that served this request.
+    """
+    return DbPoolStatsOut(
+        pid=os.getpid(),
+        pools=[
+            pool_stats("sync", engine.pool),
+            pool_stats("async", async_engine.sync_engine.pool),
+        ],
+    )
+
+
+@router.get(
+    "/user-cache/",
+    dependencies=[Depends(get_current_active_superuser)],
+    response_model=UserCacheStatsOut,
+)
+def user_cache_stats() -> UserCacheStatsOut:
+    """
+    Authenticated-user cache usage of the worker process that served this request.
+    """
+    return UserCacheStatsOut(pid=os.getpid(), **user_cache.stats())
+
+
+@router.get(
+    "/cache-invalidation/",
+    dependencies=[Depends(get_current_active_superuser)],
+    response_model=CacheInvalidationStatsOut,
+)
+def cache_invalidation_stats() -> CacheInvalidationStatsOut:
+    """
+    Cache invalidation messages published and received by the worker process that
+    served this request.
+    """
+    return CacheInvalidationStatsOut(pid=os.getpid(), **invalidation_bus.stats())
+
+
+@router.get(
+    "/password-hasher/",
+    dependencies=[Depends(get_current_active_superuser)],
+    response_model=PasswordHasherStatsOut,
+)
+def password_hasher_stats() -> PasswordHasherStatsOut:
+    """
+    Password hashing queue of the worker process that served this request.
+    """
+    return PasswordHasherStatsOut(pid=os.getpid(), **password_hasher.stats())
+
+
+@router.get(
+    "/email-outbox/",
+    dependencies=[Depends(get_current_active_superuser)],
+    response_model=EmailOutboxStatsOut,
+)
+def email_outbox_stats() -> EmailOutboxStatsOut:
+    """
+    Email queue of the worker process that served this request.
+    """
+    return EmailOutboxStatsOut(pid=os.getpid(), **email_outbox.stats())
+
+
+@router.get(
+    "/compression/",
+    dependencies=[Depends(get_current_active_superuser)],
+    response_model=CompressionStatsOut,
+)
+def compression_stats() -> CompressionStatsOut:
+    """
+    Response compression, and its cache, of the worker process that served this
+    request.
+    """
+    return CompressionStatsOut(pid=os.getpid(), **response_compressor.stats())
+
+
+@router.get(
+    "/storage/",
+    dependencies=[Depends(get_current_active_superuser)],
+    response_model=StorageStatsOut,
+)
+def storage_stats() -> StorageStatsOut:
+    """
+    Room file uploads of the worker process that served this request.
+    """
+    return StorageStatsOut(pid=os.getpid(), **storage.stats())
+
+
+@router.get(
+    "/queries/",
+    dependencies=[Depends(get_current_active_superuser)],
+    response_model=QueryStatsOut,
+)
+def query_stats() -> QueryStatsOut:
+    """
+    SQL statements run by each route in the worker process that served this
+    request, the routes spending the most time in the database first.
+    """
+    return QueryStatsOut(pid=os.getpid(), routes=route_query_stats.stats())
+
+
+@router.get(
+    "/query-advisor/",
+    dependencies=[Depends(get_current_active_superuser)],
+    response_model=QueryAdvisorStatsOut,
+)
+def query_advisor_stats() -> QueryAdvisorStatsOut:
+    """
+    Slow queries that scanned large tables in the worker process that served this
+    request. Only available when the advisor is enabled.
+    """
+    advisor = query_advisor.query_advisor
+    if advisor is None:
+        raise HTTPException(status_code=404, detail="The query advisor is disabled")
+    return QueryAdvisorStatsOut(pid=os.getpid(), **advisor.stats())
@@ -0,0 +1,82 @@
+"""
+Compare the sync (threadpool) and async (event loop) database paths.
+
+Both endpoints run the same query through the app's own session dependencies, so
+the only difference is `SessionDep` + `def` versus `AsyncSessionDep` + `async def`:
+
+    python -m app.benchmarks.async_db --concurrency 500 --requests 10000
+"""
+import argparse
+import asyncio
+import json
+import logging
+from typing import Any
+
+from fastapi import FastAPI
+from sqlalchemy import func
+from sqlmodel import select
+
+from app.api.deps import AsyncSessionDep, SessionDep
+from app.benchmarks.utils import http_client, print_results, run_load, serve
+from app.main import lifespan
+from app.models import User
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+bench_app = FastAPI(lifespan=lifespan)
+
+
+def _statement(db_latency_ms: int) -> Any:
+    # pg_sleep stands in for a query that keeps the connection busy
+    return select(func.count(User.id), func.pg_sleep(db_latency_ms / 1000))
+
+
+@bench_app.get("/sync")
+def sync_path(session: SessionDep, db_latency_ms: int = 0) -> int:
+    return session.exec(_statement(db_latency_ms)).one()[0]
+
+
+@bench_app.get("/async")
+async def async_path(session: AsyncSessionDep, db_latency_ms: int = 0) -> int:
+    return (await session.exec(_statement(db_latency_ms))).one()[0]
+
+
+async def _bench(base_url: str, args: argparse.Namespace) -> list[Any]:
+    results = []
+    async with http_client(base_url, args.concurrency) as client:
+        params = {"db_latency_ms": args.db_latency_ms}
+        for path in ("/sync", "/async"):
+            results.append(
+                await run_load(
+                    client,
+                    f"{path[1:]} db path",
+                    lambda c, _n, path=path: c.get(path, params=params),
+                    concurrency=args.concurrency,
+                    total=args.requests,
+                )
+            )
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--concurrency", type=int, default=500)
+    parser.add_argument("--requests", type=int, default=10_000)
+    parser.add_argument("--db-latency-ms", type=int, default=5)
+    parser.add_argument("--output", help="write the results as JSON to this file")
+    args = parser.parse_args()
+
+    logger.info(
+        "Running %s requests at concurrency %s", args.requests, args.concurrency
+    )
+    with serve(bench_app) as base_url:
+        results = asyncio.run(_bench(base_url, args))
+    print_results(results)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump([r.as_dict() for r in results], f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+Email rendering throughput, compiling the template on every call (as
+`render_email_template` used to) versus the shared `get_email_templates()`
+environment.
+
+Also times compiling all templates in a new process's environment, with and
+without a bytecode cache:
+
+    python -m app.benchmarks.email_templates --renders 2000
+"""
+import argparse
+import json
+import logging
+import tempfile
+import time
+from pathlib import Path
+from typing import Any
+
+from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader, Template
+
+from app.utils import get_email_templates, render_email_template
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+TEMPLATES_DIR = Path(__file__).parent.parent / "email-templates" / "build"
+
+CONTEXT = {
+    "project_name": "Benchmark",
+    "username": "user@example.com",
+    "password": "password",
+    "email": "user@example.com",
+    "valid_hours": 48,
+    "link": "https://example.com/reset-password?token=token",
+}
+
+
+def _render_uncached(template_name: str, context: dict[str, Any]) -> str:
+    template_str = (TEMPLATES_DIR / template_name).read_text()
+    return Template(template_str).render(context)
+
+
+def _renders_per_s(render: Any, template_name: str, renders: int) -> float:
+    start = time.perf_counter()
+    for _ in range(renders):
+        render(template_name=template_name, context=CONTEXT)
+    return round(renders / (time.perf_counter() - start), 1)
+
+
+def _compile_ms(bytecode_dir: str | None) -> float:
+    environment = Environment(
+        loader=FileSystemLoader(TEMPLATES_DIR),
+        bytecode_cache=FileSystemBytecodeCache(bytecode_dir) if bytecode_dir else None,
+    )
+    start = time.perf_counter()
+    for template_name in environment.list_templates():
+        environment.get_template(template_name)
+    return round((time.perf_counter() - start) * 1000, 3)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--renders", type=int, default=2_000)
+    parser.add_argument("--output", help="write the results as JSON to this file")
+    args = parser.parse_args()
+
+    results = []
+    for template_name in get_email_templates().list_templates():
+        assert render_email_template(
+            template_name=template_name, context=CONTEXT
+        ) == _render_uncached(template_name, CONTEXT)
+        logger.info("Rendering %s %s times", template_name, args.renders)
+        uncached = _renders_per_s(
+            lambda **kw: _render_uncached(kw["template_name"], kw["context"]),
+            template_name,
+            args.renders,
+        )
+        cached = _renders_per_s(render_email_template, template_name, args.renders)
+        results.append(
+            {
+                "template": template_name,
+                "uncached_per_s": uncached,
+                "cached_per_s": cached,
+                "speedup": round(cached / uncached, 1),
+            }
+        )
+
+    with tempfile.TemporaryDirectory() as bytecode_dir:
+        # the first process fills the cache, the next ones load from it
+        _compile_ms(bytecode_dir)
+        startup = {
+            "compile_ms": _compile_ms(None),
+            "bytecode_cache_ms": _compile_ms(bytecode_dir),
+        }
+
+    print(f"{'template':<24}{'uncached/s':>12}{'cached/s':>12}{'speedup':>10}")
+    for r in results:
+        print(
+            f"{r['template']:<24}{r['uncached_per_s']:>12}"
+            f"{r['cached_per_s']:>12}{r['speedup']:>10}"
+        )
+    print(
+        f"\ncompiling all templates at startup: {startup['compile_ms']} ms, "
+        f"{startup['bytecode_cache_ms']} ms from the bytecode cache"
+    )
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"renders": results, "startup": startup}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,376 @@
+"""
+Endpoint benchmark suite: scripted scenarios against the real app.
+
+Seeds `--users` users, each owning `--rooms` rooms of `--sections` sections of
+`--questions` questions (all removed afterwards), then runs every scenario
+in-process through ASGI, over a local uvicorn, or both:
+
+- login: POST /login/access-token as the seeded users
+- browse-rooms: GET /rooms/ pages, as read_rooms is paged by the frontend
+- room-tree: GET /rooms/{id}/tree
+- submit-answer: POST /questions/{id}/submit, every other answer right
+- update-profile: PUT /profile/{id}
+
+Which user, page, room or question a request picks is drawn from `--seed`, so
+two runs replay the same requests. Results (throughput, p50/p95/p99 and
+queries per request, read from the X-DB-Queries header sent outside
+production) are saved with the current commit, and `--baseline` prints the
+change against a previous run:
+
+    python -m app.benchmarks.endpoints --transport both --output after.json \\
+        --baseline before.json
+"""
+import argparse
+import asyncio
+import json
+import logging
+import random
+import subprocess
+from collections.abc import Callable
+from typing import Any
+
+import httpx
+from sqlmodel import Session, col, delete, select
+
+from app import crud
+from app.benchmarks.utils import (
+    LoadResult,
+    asgi_client,
+    http_client,
+    print_results,
+    run_load,
+    serve,
+)
+from app.core.config import settings
+from app.core.db import async_engine, engine
+from app.core.hashing import password_hasher
+from app.main import app
+from app.models import (
+    Profile,
+    Question,
+    QuestionCreate,
+    Room,
+    RoomImport,
+    Section,
+    SectionImport,
+    User,
+    UserCreate,
+)
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+SEED_TITLE = "benchmark-endpoints"
+EMAIL_DOMAIN = "benchmark-endpoints.example.com"
+PASSWORD = "benchmark-password"
+PAGE_SIZE = 20
+SCENARIOS = ("login", "browse-rooms", "room-tree", "submit-answer", "update-profile")
+
+Scenario = Callable[[httpx.AsyncClient, int], Any]
+
+
+class Fixture:
+    """
+    The seeded users with their tokens, profiles, rooms and questions.
+    """
+
+    def __init__(self) -> None:
+        self.emails: list[str] = []
+        self.headers: list[dict[str, str]] = []
+        self.profile_ids: list[str] = []
+        # per user
+        self.room_ids: list[list[int]] = []
+        self.questions: list[list[tuple[int, str]]] = []
+
+
+def _seed(session: Session, args: argparse.Namespace) -> Fixture:
+    fixture = Fixture()
+    user_ids = crud.import_users(
+        session=session,
+        users_in=[
+            UserCreate(
+                email=f"user{n}@{EMAIL_DOMAIN}",
+                password=PASSWORD,
+                full_name=f"user {n}",
+            )
+            for n in range(args.users)
+        ],
+    )
+    now = "2024-01-01T00:00:00"
+    for email, user_id in user_ids.items():
+        rooms_in = [
+            RoomImport(
+                title=SEED_TITLE,
+                difficulty=1,
+                level="easy",
+                is_active=True,
+                room_type="challenge",
+                visibility="private",
+                created_at=now,
+                updated_at=now,
+                file_name="",
+                sections=[
+                    SectionImport(
+                        title=f"section {s}",
+                        created_at=now,
+                        updated_at=now,
+                        questions=[
+                            QuestionCreate(
+                                content=f"question {q}",
+                                answer=f"answer {r} {s} {q}",
+                                answer_type="text",
+                            )
+                            for q in range(args.questions)
+                        ],
+                    )
+                    for s in range(args.sections)
+                ],
+            )
+            for r in range(args.rooms)
+        ]
+        room_ids, _, _ = crud.import_rooms(
+            session=session, rooms_in=rooms_in, owner_id=user_id
+        )
+        questions = session.exec(
+            select(Question.id, Question.answer)
+            .join(Section)
+            .where(col(Section.room_id).in_(room_ids))
+            .order_by(Question.id)
+        ).all()
+        profile_id = session.exec(
+            select(Profile.id).where(Profile.user_id == user_id)
+        ).first()
+        fixture.emails.append(email)
+        fixture.profile_ids.append(str(profile_id))
+        fixture.room_ids.append(room_ids)
+        fixture.questions.append(list(questions))
+    return fixture
+
+
+def _cleanup(session: Session) -> None:
+    user_ids = select(User.id).where(col(User.email).endswith(f"@{EMAIL_DOMAIN}"))
+    room_ids = select(Room.id).where(Room.title == SEED_TITLE)
+    section_ids = select(Section.id).where(col(Section.room_id).in_(room_ids))
+    session.exec(delete(Question).where(col(Question.section_id).in_(section_ids)))
+    session.exec(delete(Section).where(col(Section.room_id).in_(room_ids)))
+    session.exec(delete(Room).where(Room.title == SEED_TITLE))
+    session.exec(delete(Profile).where(col(Profile.user_id).in_(user_ids)))
+    # solves go with their users
+    session.exec(delete(User).where(col(User.email).endswith(f"@{EMAIL_DOMAIN}")))
+    session.commit()
+
+
+def _scenarios(
+    fixture: Fixture, args: argparse.Namespace
+) -> dict[str, tuple[Scenario, int]]:
+    """
+    Each scenario's request maker and number of requests. The choices are
+    drawn up front, so they do not depend on the order requests complete in.
+    """
+    rng = random.Random(args.seed)
+    users = len(fixture.emails)
+    pages = max(1, -(-args.rooms // PAGE_SIZE))
+    api = settings.API_V1_STR
+
+    def draw(n: int) -> list[int]:
+        return [rng.randrange(users) for _ in range(n)]
+
+    login_users = draw(args.logins)
+    browse = [(u, rng.randrange(pages)) for u in draw(args.requests)]
+    trees = [(u, rng.choice(fixture.room_ids[u])) for u in draw(args.requests)]
+    answers = [(u, rng.choice(fixture.questions[u])) for u in draw(args.requests)]
+    updates = draw(args.requests)
+
+    def login(c: httpx.AsyncClient, n: int) -> Any:
+        data = {"username": fixture.emails[login_users[n]], "password": PASSWORD}
+        return c.post(f"{api}/login/access-token", data=data)
+
+    def browse_rooms(c: httpx.AsyncClient, n: int) -> Any:
+        user, page = browse[n]
+        return c.get(
+            f"{api}/rooms/",
+            params={"skip": page * PAGE_SIZE, "limit": PAGE_SIZE},
+            headers=fixture.headers[user],
+        )
+
+    def room_tree(c: httpx.AsyncClient, n: int) -> Any:
+        user, room_id = trees[n]
+        return c.get(f"{api}/rooms/{room_id}/tree", headers=fixture.headers[user])
+
+    def submit_answer(c: httpx.AsyncClient, n: int) -> Any:
+        user, (question_id, answer) = answers[n]
+        return c.post(
+            f"{api}/questions/{question_id}/submit",
+            headers=fixture.headers[user],
+            json={"answer": answer if n % 2 else "wrong"},
+        )
+
+    def update_profile(c: httpx.AsyncClient, n: int) -> Any:
+        user = updates[n]
+        return c.put(
+            f"{api}/profile/{fixture.profile_ids[user]}",
+            headers=fixture.headers[user],
+            json={"bio": f"bio {n}"},
+        )
+
+    return {
+        "login": (login, args.logins),
+        "browse-rooms": (browse_rooms, args.requests),
+        "room-tree": (room_tree, args.requests),
+        "submit-answer": (submit_answer, args.requests),
+        "update-profile": (update_profile, args.requests),
+    }
+
+
+async def _run(
+    client: httpx.AsyncClient,
+    transport: str,
+    fixture: Fixture,
+    args: argparse.Namespace,
+) -> list[LoadResult]:
+    fixture.headers = []
+    for email in fixture.emails:
+        r = await client.post(
+            f"{settings.API_V1_STR}/login/access-token",
+            data={"username": email, "password": PASSWORD},
+        )
+        fixture.headers.append({"Authorization": f"Bearer {r.json()['access_token']}"})
+    results = []
+    for name, (make_request, total) in _scenarios(fixture, args).items():
+        if name not in args.scenarios:
+            continue
+        logger.info("%s: %s, %s requests", transport, name, total)
+        results.append(
+            await run_load(
+                client,
+                f"{transport}: {name}",
+                make_request,
+                concurrency=args.concurrency,
+                total=total,
+            )
+        )
+    return results
+
+
+async def _run_asgi(fixture: Fixture, args: argparse.Namespace) -> list[LoadResult]:
+    try:
+        async with asgi_client(app) as client:
+            return await _run(client, "asgi", fixture, args)
+    finally:
+        # no lifespan in-process: close the connections bound to this loop
+        await async_engine.dispose()
+
+
+async def _run_uvicorn(
+    base_url: str, fixture: Fixture, args: argparse.Namespace
+) -> list[LoadResult]:
+    async with http_client(base_url, args.concurrency) as client:
+        return await _run(client, "uvicorn", fixture, args)
+
+
+def _commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _print_comparison(results: list[LoadResult], baseline: dict[str, Any]) -> None:
+    before = {r["name"]: r for r in baseline["results"]}
+    print(f"\ncompared with {baseline.get('commit') or 'baseline'}")
+    print(f"{'scenario':<32}{'req/s':>10}{'p95 ms':>10}{'q/req':>10}")
+    for r in results:
+        if r.name not in before:
+            continue
+        old = before[r.name]
+
+        def change(new: float | None, old: float | None) -> str:
+            if not new or not old:
+                return "-"
+            return f"{(new - old) / old:+.1%}"
+
+        print(
+            f"{r.name:<32}{change(r.rps, old['rps']):>10}"
+            f"{change(r.p95_ms, old['p95_ms']):>10}"
+            f"{change(r.queries_per_request, old.get('queries_per_request')):>10}"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument(
+        "--transport", choices=("asgi", "uvicorn", "both"), default="both"
+    )
+    parser.add_argument(
+        "--scenarios",
+        nargs="+",
+        choices=SCENARIOS,
+        default=list(SCENARIOS),
+    )
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--rooms", type=int, default=50, help="per user")
+    parser.add_argument("--sections", type=int, default=3)
+    parser.add_argument("--questions", type=int, default=5)
+    parser.add_argument("--requests", type=int, default=2_000, help="per scenario")
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write the results as JSON to this file")
+    parser.add_argument("--baseline", help="a previous --output to compare with")
+    args = parser.parse_args()
+
+    transports = ("asgi", "uvicorn") if args.transport == "both" else (args.transport,)
+    results: list[LoadResult] = []
+    with Session(engine) as session:
+        _cleanup(session)
+        logger.info("Seeding %s users with %s rooms each", args.users, args.rooms)
+        fixture = _seed(session, args)
+        try:
+            for transport in transports:
+                if transport == "asgi":
+                    results += asyncio.run(_run_asgi(fixture, args))
+                else:
+                    with serve(app) as base_url:
+                        results += asyncio.run(_run_uvicorn(base_url, fixture, args))
+        finally:
+            _cleanup(session)
+            password_hasher.shutdown()
+
+    print_results(results)
+    if args.baseline:
+        with open(args.baseline) as f:
+            _print_comparison(results, json.load(f))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(
+                {
+                    "commit": _commit(),
+                    "seed": args.seed,
+                    "config": {
+                        key: getattr(args, key)
+                        for key in (
+                            "users",
+                            "rooms",
+                            "sections",
+                            "questions",
+                            "requests",
+                            "logins",
+                            "concurrency",
+                        )
+                    },
+                    "results": [r.as_dict() for r in results],
+                },
+                f,
+                indent=2,
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+"""
+Import time of a module in a fresh interpreter, what every worker, test run and
+prestart script pays before doing anything, from `python -X importtime`.
+
+Reports the modules and top-level packages taking the most time, medians over
+`--runs` interpreters, and checks the total against the cold-start budget:
+
+    python -m app.benchmarks.import_time app.main --runs 5
+    python -m app.benchmarks.import_time app.backend_pre_start
+"""
+import argparse
+import json
+import logging
+import os
+import statistics
+import subprocess
+import sys
+from dataclasses import asdict, dataclass
+from pathlib import Path
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Import time, in milliseconds, `import app.main` must stay under in
+# app/tests/core/test_startup.py; generous, to hold on slow CI machines
+COLD_START_BUDGET_MS = 3_000
+
+# Loaded on first use, never by importing the app
+LAZY_MODULES = ("azure.storage.blob", "azure.core", "emails", "jinja2")
+
+
+@dataclass
+class ModuleTime:
+    name: str
+    depth: int
+    self_us: int
+    cumulative_us: int
+
+
+def parse_importtime(stderr: str) -> list[ModuleTime]:
+    """
+    The modules of `-X importtime` output, in the order their imports finished.
+    """
+    modules = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, name = line.removeprefix("import time:").split("|")
+        modules.append(
+            ModuleTime(
+                name=name.strip(),
+                # two spaces per nesting level
+                depth=(len(name) - len(name.lstrip()) - 1) // 2,
+                self_us=int(self_us),
+                cumulative_us=int(cumulative_us),
+            )
+        )
+    return modules
+
+
+def import_times(module: str) -> list[ModuleTime]:
+    """
+    The import times of `module` and of everything it imports, in a fresh
+    interpreter.
+    """
+    root = Path(__file__).resolve().parents[2]
+    env = {**os.environ, "PYTHONPATH": str(root), "PYTHONWARNINGS": "ignore"}
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        env=env,
+        cwd=root,
+        check=True,
+    )
+    return parse_importtime(result.stderr)
+
+
+def _medians(runs: list[list[ModuleTime]], key: str) -> dict[str, float]:
+    samples: dict[str, list[int]] = {}
+    for modules in runs:
+        totals: dict[str, int] = {}
+        for m in modules:
+            name = m.name.split(".")[0] if key == "package" else m.name
+            value = m.self_us if key == "package" else m.cumulative_us
+            totals[name] = totals.get(name, 0) + value
+        for name, value in totals.items():
+            samples.setdefault(name, []).append(value)
+    return {name: statistics.median(values) / 1000 for name, values in samples.items()}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("module", nargs="?", default="app.main")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=20)
+    parser.add_argument("--output", help="write the results as JSON to this file")
+    args = parser.parse_args()
+
+    runs = []
+    for n in range(args.runs + 1):
+        logger.info("Importing %s, run %s of %s", args.module, n, args.runs)
+        modules = import_times(args.module)
+        # the first run also writes the bytecode caches
+        if n:
+            runs.append(modules)
+
+    total_ms = statistics.median(
+        next(m.cumulative_us for m in modules if m.name == args.module) / 1000
+        for modules in runs
+    )
+    cumulative = _medians(runs, "module")
+    packages = _medians(runs, "package")
+    loaded = {m.name for m in runs[-1]}
+    lazy_loaded = [m for m in LAZY_MODULES if m in loaded]
+
+    print(f"import {args.module}: {total_ms:.1f} ms (budget {COLD_START_BUDGET_MS} ms)")
+    print(f"\n{'module':<48}{'cumulative ms':>14}")
+    for name, ms in sorted(cumulative.items(), key=lambda i: -i[1])[: args.top]:
+        print(f"{name:<48}{ms:>14.1f}")
+    print(f"\n{'package':<48}{'self ms':>14}")
+    for name, ms in sorted(packages.items(), key=lambda i: -i[1])[: args.top]:
+        print(f"{name:<48}{ms:>14.1f}")
+    if lazy_loaded:
+        print(f"\nloaded though lazy: {', '.join(lazy_loaded)}")
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(
+                {
+                    "module": args.module,
+                    "runs": args.runs,
+                    "total_ms": total_ms,
+                    "budget_ms": COLD_START_BUDGET_MS,
+                    "lazy_loaded": lazy_loaded,
+                    "cumulative_ms": cumulative,
+                    "package_self_ms": packages,
+                    "last_run": [asdict(m) for m in runs[-1]],
+                },
+                f,
+                indent=2,
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,226 @@
+"""
+CPU time per response of 100-row list pages, by response path:
+
+- json: the route returns its list model, FastAPI validates it again against
+  `response_model` and encodes it with the standard library (the default)
+- orjson: the same, encoded with orjson (JSON_RESPONSE_CLASS=orjson)
+- model: the route returns it in a `ModelResponse`, serialized by pydantic in
+  one pass (what the list endpoints do)
+
+Pages are built from in-memory ORM rows, so no database is involved; `floor`
+is a route returning a constant body, the cost of the framework and client:
+
+    python -m app.benchmarks.json_responses --rows 100 --requests 500
+"""
+import argparse
+import asyncio
+import json
+import logging
+import time
+from typing import Any
+
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse, ORJSONResponse, Response
+from sqlmodel import SQLModel
+
+from app.api.responses import ModelResponse
+from app.benchmarks.utils import asgi_client
+from app.models import (
+    Question,
+    QuestionsOut,
+    Room,
+    RoomsOut,
+    RoomsTreeOut,
+    Section,
+    User,
+    UsersOut,
+)
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+VARIANTS = ("json", "orjson", "model")
+
+
+def _users(rows: int) -> list[Any]:
+    return [
+        User(
+            id=n,
+            email=f"user{n}@example.com",
+            full_name=f"User {n}",
+            hashed_password="x" * 60,
+        )
+        for n in range(rows)
+    ]
+
+
+def _questions(rows: int, section_id: int = 1) -> list[Any]:
+    return [
+        Question(
+            id=n,
+            content=f"What is question {n} about? " * 4,
+            answer=f"answer {n}",
+            hint="Think about it",
+            answer_type="text",
+            points=10,
+            section_id=section_id,
+        )
+        for n in range(rows)
+    ]
+
+
+def _rooms(rows: int, sections: int = 3, questions: int = 0) -> list[Any]:
+    timestamp = "2024-01-01T00:00:00"
+    rooms = []
+    for n in range(rows):
+        room = Room(
+            id=n,
+            title=f"Room {n}",
+            description="A room to benchmark the list responses. " * 3,
+            difficulty=n % 5,
+            level="beginner",
+            is_active=True,
+            room_type="challenge",
+            visibility="public",
+            created_at=timestamp,
+            updated_at=timestamp,
+            file_name=f"room-{n}.zip",
+            owner_id=1,
+        )
+        room.sections = [
+            Section(
+                id=n * sections + s,
+                title=f"Section {s}",
+                description="What this section covers",
+                room_id=n,
+                created_at=timestamp,
+                updated_at=timestamp,
+            )
+            for s in range(sections)
+        ]
+        for section in room.sections:
+            section.questions = _questions(questions, section.id or 0)
+        rooms.append(room)
+    return rooms
+
+
+def _pages(rows: int) -> dict[str, tuple[type[SQLModel], list[Any]]]:
+    return {
+        "users": (UsersOut, _users(rows)),
+        "questions": (QuestionsOut, _questions(rows)),
+        "rooms": (RoomsOut, _rooms(rows)),
+        # a tenth of the rooms, with about as many questions in total
+        "rooms-tree": (RoomsTreeOut, _rooms(rows // 10, questions=rows // 30)),
+    }
+
+
+def _app(pages: dict[str, tuple[type[SQLModel], list[Any]]]) -> FastAPI:
+    app = FastAPI()
+
+    def add(page: str, out_model: type[SQLModel], rows: list[Any]) -> None:
+        def build() -> Any:
+            return out_model(  # type: ignore[call-arg]
+                data=rows, count=len(rows), next_cursor="next"
+            )
+
+        async def validated() -> Any:
+            return build()
+
+        async def trusted() -> Any:
+            return ModelResponse(build())
+
+        for variant, response_class in (
+            ("json", JSONResponse),
+            ("orjson", ORJSONResponse),
+        ):
+            app.get(
+                f"/{page}/{variant}",
+                response_model=out_model,
+                response_class=response_class,
+            )(validated)
+        app.get(f"/{page}/model", response_model=out_model)(trusted)
+
+    for page, (out_model, rows) in pages.items():
+        add(page, out_model, rows)
+
+    @app.get("/floor")
+    async def floor() -> Response:
+        return Response(b"{}", media_type="application/json")
+
+    return app
+
+
+async def _cpu_us(client: Any, path: str, requests: int) -> tuple[float, int]:
+    """
+    CPU time per response in microseconds, and the size of the body.
+    """
+    # warm up, the first requests build the serializers
+    response = await client.get(path)
+    response.raise_for_status()
+    start = time.process_time()
+    for _ in range(requests):
+        await client.get(path)
+    return (time.process_time() - start) / requests * 1e6, len(response.content)
+
+
+async def _run(rows: int, requests: int) -> tuple[float, list[dict[str, Any]]]:
+    pages = _pages(rows)
+    async with asgi_client(_app(pages)) as client:
+        for page in pages:
+            bodies = [(await client.get(f"/{page}/{v}")).json() for v in VARIANTS]
+            assert all(body == bodies[0] for body in bodies), page
+        floor, _ = await _cpu_us(client, "/floor", requests)
+        results = []
+        for page in pages:
+            logger.info("Requesting the %s page %s times per variant", page, requests)
+            cpu: dict[str, float] = {}
+            for variant in VARIANTS:
+                cpu[variant], size = await _cpu_us(
+                    client, f"/{page}/{variant}", requests
+                )
+            results.append(
+                {
+                    "page": page,
+                    "bytes": size,
+                    **{f"{v}_cpu_us": round(cpu[v], 1) for v in VARIANTS},
+                    # excluding the framework and client floor
+                    "speedup": round(
+                        (cpu["json"] - floor) / max(cpu["model"] - floor, 1e-3), 1
+                    ),
+                }
+            )
+    return floor, results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=100, help="rows per page")
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--output", help="write the results as JSON to this file")
+    args = parser.parse_args()
+
+    floor, results = asyncio.run(_run(args.rows, args.requests))
+
+    print(f"CPU time per response, {args.rows}-row pages (floor {floor:.1f} us)")
+    print(
+        f"{'page':<12}{'bytes':>8}"
+        + "".join(f"{v + ' us':>12}" for v in VARIANTS)
+        + f"{'speedup':>10}"
+    )
+    for r in results:
+        print(
+            f"{r['page']:<12}{r['bytes']:>8}"
+            + "".join(f"{r[v + '_cpu_us']:>12}" for v in VARIANTS)
+            + f"{r['speedup']:>10}"
+        )
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(
+                {"rows": args.rows, "floor_cpu_us": round(floor, 1), "pages": results},
+                f,
+                indent=2,
+            )
+
+
+if __name__ == "__main__":
+    main()
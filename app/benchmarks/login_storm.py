@@ -0,0 +1,92 @@
+"""
+Latency of cheap requests while a login storm is hashing passwords.
+
+Runs the real app twice, hashing inline in request threads and in the bcrypt
+process pool, each time firing `--logins` logins for the first superuser while
+other clients keep reading /users/me:
+
+    python -m app.benchmarks.login_storm --logins 200 --workers 2
+"""
+import argparse
+import asyncio
+import json
+import logging
+from typing import Any
+
+from app.benchmarks.utils import http_client, print_results, run_load, serve
+from app.core.config import settings
+from app.core.hashing import password_hasher
+from app.main import app
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+async def _storm(base_url: str, mode: str, args: argparse.Namespace) -> list[Any]:
+    login_data = {
+        "username": settings.FIRST_SUPERUSER,
+        "password": settings.FIRST_SUPERUSER_PASSWORD,
+    }
+    async with http_client(
+        base_url, args.login_concurrency + args.read_concurrency
+    ) as client:
+        r = await client.post(
+            f"{settings.API_V1_STR}/login/access-token", data=login_data
+        )
+        headers = {"Authorization": f"Bearer {r.json()['access_token']}"}
+        return list(
+            await asyncio.gather(
+                run_load(
+                    client,
+                    f"{mode}: login",
+                    lambda c, _n: c.post(
+                        f"{settings.API_V1_STR}/login/access-token", data=login_data
+                    ),
+                    concurrency=args.login_concurrency,
+                    total=args.logins,
+                ),
+                run_load(
+                    client,
+                    f"{mode}: GET /users/me",
+                    lambda c, _n: c.get(
+                        f"{settings.API_V1_STR}/users/me", headers=headers
+                    ),
+                    concurrency=args.read_concurrency,
+                    total=args.reads,
+                ),
+            )
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--login-concurrency", type=int, default=50)
+    parser.add_argument("--reads", type=int, default=2_000)
+    parser.add_argument("--read-concurrency", type=int, default=10)
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=settings.PASSWORD_HASH_WORKERS or 2,
+        help="bcrypt processes in pool mode",
+    )
+    parser.add_argument("--output", help="write the results as JSON to this file")
+    args = parser.parse_args()
+
+    results = []
+    for mode, workers in (("inline", 0), ("pool", args.workers)):
+        password_hasher.shutdown()
+        password_hasher.workers = workers
+        logger.info("Login storm with password hashing %s", mode)
+        with serve(app) as base_url:
+            results.extend(asyncio.run(_storm(base_url, mode, args)))
+    password_hasher.shutdown()
+
+    print_results(results)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump([r.as_dict() for r in results], f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+Latency of the first and a deep page, offset versus keyset pagination.
+
+Seeds `--pages * --limit` rows into the item table (removed afterwards) and times
+the statements built by `app.api.pagination.paginate`, as the list endpoints do:
+
+    python -m app.benchmarks.pagination --pages 10000 --limit 100
+"""
+import argparse
+import json
+import logging
+import statistics
+import time
+from typing import Any
+
+from sqlalchemy import text
+from sqlmodel import Session, delete, select
+
+from app.api.pagination import encode_cursor, paginate
+from app.core.config import settings
+from app.core.db import engine
+from app.models import Item, User
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+SEED_TITLE = "benchmark-pagination"
+
+
+def _seed(session: Session, rows: int) -> None:
+    owner = session.exec(
+        select(User).where(User.email == settings.FIRST_SUPERUSER)
+    ).one()
+    session.execute(
+        text(
+            "INSERT INTO item (title, description, owner_id) "
+            "SELECT :title, md5(n::text), :owner_id FROM generate_series(1, :rows) n"
+        ),
+        {"title": SEED_TITLE, "owner_id": owner.id, "rows": rows},
+    )
+    session.commit()
+    session.execute(text("ANALYZE item"))
+
+
+def _time_ms(session: Session, statement: Any, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        session.exec(statement).all()
+        samples.append(time.perf_counter() - start)
+    return round(statistics.median(samples) * 1000, 3)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--pages", type=int, default=10_000)
+    parser.add_argument("--limit", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--output", help="write the results as JSON to this file")
+    args = parser.parse_args()
+
+    rows = args.pages * args.limit
+    deep_skip = (args.pages - 1) * args.limit
+    results = []
+    with Session(engine) as session:
+        logger.info("Seeding %s items", rows)
+        _seed(session, rows)
+        try:
+            base = select(Item).where(Item.title == SEED_TITLE)
+            # the key the previous page ended on, as a client would have received
+            deep_key = session.exec(
+                base.order_by(Item.id).offset(deep_skip - 1).limit(1)
+            ).one()
+            for page, skip, cursor in (
+                (1, 0, None),
+                (args.pages, deep_skip, encode_cursor(deep_key.id)),
+            ):
+                offset_statement = paginate(
+                    base, Item.id, skip=skip, limit=args.limit, cursor=None
+                )
+                keyset_statement = paginate(
+                    base, Item.id, skip=0, limit=args.limit, cursor=cursor
+                )
+                results.append(
+                    {
+                        "page": page,
+                        "offset_ms": _time_ms(session, offset_statement, args.repeat),
+                        "keyset_ms": _time_ms(session, keyset_statement, args.repeat),
+                    }
+                )
+        finally:
+            session.exec(delete(Item).where(Item.title == SEED_TITLE))
+            session.commit()
+
+    print(f"{'page':>8}{'offset ms':>12}{'keyset ms':>12}")
+    for r in results:
+        print(f"{r['page']:>8}{r['offset_ms']:>12}{r['keyset_ms']:>12}")
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,181 @@
+"""
+Throughput of room imports, one object at a time versus `crud.import_rooms`.
+
+Creates `--rooms` rooms with `--sections` sections of `--questions` questions
+each, first the way POST /rooms/, /pages/ and /questions/ do (a commit and a
+refresh per object), then through POST /rooms/bulk's single transaction. The
+rooms are removed afterwards:
+
+    python -m app.benchmarks.room_import --rooms 1000 --sections 3 --questions 5
+"""
+import argparse
+import json
+import logging
+import time
+from collections.abc import Callable, Generator
+from contextlib import contextmanager
+from typing import Any
+
+from sqlalchemy import event
+from sqlmodel import Session, col, delete, select
+
+from app import crud
+from app.core.config import settings
+from app.core.db import engine
+from app.models import (
+    Question,
+    QuestionCreate,
+    Room,
+    RoomImport,
+    Section,
+    SectionCreate,
+    SectionImport,
+    User,
+)
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+SEED_TITLE = "benchmark-room-import"
+
+
+def _document(args: argparse.Namespace) -> list[RoomImport]:
+    now = "2024-01-01T00:00:00"
+    return [
+        RoomImport(
+            title=SEED_TITLE,
+            difficulty=1,
+            level="easy",
+            is_active=True,
+            room_type="challenge",
+            visibility="private",
+            created_at=now,
+            updated_at=now,
+            file_name="",
+            sections=[
+                SectionImport(
+                    title=f"section {s}",
+                    created_at=now,
+                    updated_at=now,
+                    questions=[
+                        QuestionCreate(
+                            content=f"question {q}",
+                            answer=f"answer {q}",
+                            answer_type="text",
+                        )
+                        for q in range(args.questions)
+                    ],
+                )
+                for s in range(args.sections)
+            ],
+        )
+        for _ in range(args.rooms)
+    ]
+
+
+def _one_by_one(session: Session, rooms_in: list[RoomImport], owner_id: int) -> None:
+    for room_in in rooms_in:
+        room = Room.model_validate(
+            room_in.model_dump(exclude={"sections"}), update={"owner_id": owner_id}
+        )
+        session.add(room)
+        session.commit()
+        session.refresh(room)
+        for section_in in room_in.sections:
+            section = crud.create_section(
+                session=session,
+                section_in=SectionCreate.model_validate(
+                    section_in.model_dump(exclude={"questions"}),
+                    update={"room_id": room.id},
+                ),
+            )
+            for question_in in section_in.questions:
+                question = Question.model_validate(
+                    question_in, update={"section_id": section.id}
+                )
+                session.add(question)
+                session.commit()
+                session.refresh(question)
+
+
+def _bulk(session: Session, rooms_in: list[RoomImport], owner_id: int) -> None:
+    crud.import_rooms(session=session, rooms_in=rooms_in, owner_id=owner_id)
+
+
+@contextmanager
+def _count_statements() -> Generator[list[int], None, None]:
+    counter = [0]
+
+    def before_cursor_execute(*args: Any) -> None:
+        counter[0] += 1
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield counter
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+
+def _cleanup(session: Session) -> None:
+    room_ids = select(Room.id).where(Room.title == SEED_TITLE)
+    section_ids = select(Section.id).where(col(Section.room_id).in_(room_ids))
+    session.exec(delete(Question).where(col(Question.section_id).in_(section_ids)))
+    session.exec(delete(Section).where(col(Section.room_id).in_(room_ids)))
+    session.exec(delete(Room).where(Room.title == SEED_TITLE))
+    session.commit()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rooms", type=int, default=1000)
+    parser.add_argument("--sections", type=int, default=3)
+    parser.add_argument("--questions", type=int, default=5)
+    parser.add_argument("--output", help="write the results as JSON to this file")
+    args = parser.parse_args()
+
+    rooms_in = _document(args)
+    rows = args.rooms * (1 + args.sections * (1 + args.questions))
+    modes: dict[str, Callable[[Session, list[RoomImport], int], None]] = {
+        "one by one": _one_by_one,
+        "bulk": _bulk,
+    }
+    results = []
+    with Session(engine) as session:
+        owner_id = session.exec(
+            select(User.id).where(User.email == settings.FIRST_SUPERUSER)
+        ).one()
+        try:
+            for name, run in modes.items():
+                logger.info("Importing %s rows %s", rows, name)
+                with _count_statements() as statements:
+                    start = time.perf_counter()
+                    run(session, rooms_in, owner_id)
+                    seconds = time.perf_counter() - start
+                results.append(
+                    {
+                        "mode": name,
+                        "rooms": args.rooms,
+                        "rows": rows,
+                        "seconds": round(seconds, 3),
+                        "rooms_per_s": round(args.rooms / seconds, 1),
+                        "rows_per_s": round(rows / seconds, 1),
+                        "statements": statements[0],
+                    }
+                )
+                _cleanup(session)
+        finally:
+            _cleanup(session)
+
+    print(f"{'mode':<12}{'seconds':>10}{'rooms/s':>10}{'rows/s':>12}{'statements':>12}")
+    for r in results:
+        print(
+            f"{r['mode']:<12}{r['seconds']:>10}{r['rooms_per_s']:>10}"
+            f"{r['rows_per_s']:>12}{r['statements']:>12}"
+        )
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+"""
+Throughput of answer submissions, POST /questions/{id}/submit.
+
+Creates a room with `--questions` questions (removed afterwards) and has
+`--concurrency` clients submit right and wrong answers to them through the real
+app under uvicorn:
+
+    python -m app.benchmarks.submissions --requests 20000 --concurrency 100
+"""
+import argparse
+import asyncio
+import json
+import logging
+from datetime import datetime
+from typing import Any
+
+from sqlmodel import Session, select
+
+from app.benchmarks.utils import http_client, print_results, run_load, serve
+from app.core.config import settings
+from app.core.db import engine
+from app.main import app
+from app.models import Question, Room, Section, User
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+SEED_TITLE = "benchmark-submissions"
+
+
+def _seed(session: Session, questions: int) -> Room:
+    owner = session.exec(
+        select(User).where(User.email == settings.FIRST_SUPERUSER)
+    ).one()
+    now = datetime.utcnow().isoformat()
+    room = Room(
+        title=SEED_TITLE,
+        difficulty=1,
+        level="easy",
+        is_active=True,
+        room_type="challenge",
+        visibility="private",
+        created_at=now,
+        updated_at=now,
+        file_name="",
+        owner_id=owner.id,
+    )
+    session.add(room)
+    session.commit()
+    section = Section(title=SEED_TITLE, room_id=room.id, created_at=now, updated_at=now)
+    session.add(section)
+    session.commit()
+    for n in range(questions):
+        session.add(
+            Question(
+                content=f"question {n}",
+                answer=f"Answer {n}",
+                answer_type="text",
+                section_id=section.id,
+            )
+        )
+    session.commit()
+    session.refresh(room)
+    return room
+
+
+async def _bench(
+    base_url: str, question_ids: list[int], args: argparse.Namespace
+) -> list[Any]:
+    async with http_client(base_url, args.concurrency) as client:
+        r = await client.post(
+            f"{settings.API_V1_STR}/login/access-token",
+            data={
+                "username": settings.FIRST_SUPERUSER,
+                "password": settings.FIRST_SUPERUSER_PASSWORD,
+            },
+        )
+        headers = {"Authorization": f"Bearer {r.json()['access_token']}"}
+
+        def submit(c: Any, n: int) -> Any:
+            index = n % len(question_ids)
+            # every other submission is right
+            answer = f"answer {index}" if n % 2 else "wrong"
+            return c.post(
+                f"{settings.API_V1_STR}/questions/{question_ids[index]}/submit",
+                headers=headers,
+                json={"answer": answer},
+            )
+
+        return [
+            await run_load(
+                client,
+                "submit answer",
+                submit,
+                concurrency=args.concurrency,
+                total=args.requests,
+            )
+        ]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--questions", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("--requests", type=int, default=20_000)
+    parser.add_argument("--output", help="write the results as JSON to this file")
+    args = parser.parse_args()
+
+    with Session(engine) as session:
+        room = _seed(session, args.questions)
+        question_ids = [q.id for s in room.sections for q in s.questions]
+        try:
+            logger.info(
+                "Submitting %s answers at concurrency %s",
+                args.requests,
+                args.concurrency,
+            )
+            with serve(app) as base_url:
+                results = asyncio.run(_bench(base_url, question_ids, args))
+        finally:
+            for section in room.sections:
+                for question in section.questions:
+                    session.delete(question)
+                session.delete(section)
+            session.delete(room)
+            session.commit()
+
+    print_results(results)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump([r.as_dict() for r in results], f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
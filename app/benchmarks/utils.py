@@ -0,0 +1,162 @@
+import asyncio
+import logging
+import statistics
+import threading
+import time
+from collections.abc import Callable, Generator
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from typing import Any
+
+import httpx
+import uvicorn
+
+# one log line per request would dominate the measurement
+logging.getLogger("httpx").setLevel(logging.WARNING)
+
+
+@dataclass
+class LoadResult:
+    name: str
+    requests: int
+    errors: int
+    concurrency: int
+    seconds: float
+    rps: float
+    p50_ms: float
+    p95_ms: float
+    p99_ms: float
+    # mean X-DB-Queries of the responses that carried it
+    queries_per_request: float | None = None
+
+    def as_dict(self) -> dict[str, Any]:
+        return asdict(self)
+
+
+def percentile(samples: list[float], pct: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def summarize(
+    name: str,
+    latencies: list[float],
+    errors: int,
+    concurrency: int,
+    seconds: float,
+    queries: list[int] | None = None,
+) -> LoadResult:
+    total = len(latencies) + errors
+    return LoadResult(
+        name=name,
+        requests=total,
+        errors=errors,
+        concurrency=concurrency,
+        seconds=round(seconds, 3),
+        rps=round(total / seconds, 1) if seconds else 0.0,
+        p50_ms=round(statistics.median(latencies) * 1000, 2) if latencies else 0.0,
+        p95_ms=round(percentile(latencies, 95) * 1000, 2),
+        p99_ms=round(percentile(latencies, 99) * 1000, 2),
+        queries_per_request=(round(statistics.mean(queries), 2) if queries else None),
+    )
+
+
+async def run_load(
+    client: httpx.AsyncClient,
+    name: str,
+    make_request: Callable[[httpx.AsyncClient, int], Any],
+    *,
+    concurrency: int,
+    total: int,
+) -> LoadResult:
+    """
+    Fire `total` requests from `concurrency` concurrent clients.
+
+    `make_request(client, n)` must return the awaitable for the n-th request; any
+    response with a status code >= 400 (or any exception) counts as an error.
+    The X-DB-Queries header, sent outside production, gives the queries per
+    request.
+    """
+    latencies: list[float] = []
+    queries: list[int] = []
+    errors = 0
+    counter = iter(range(total))
+
+    async def worker() -> None:
+        nonlocal errors
+        for n in counter:
+            start = time.perf_counter()
+            try:
+                response = await make_request(client, n)
+                failed = response.status_code >= 400
+            except httpx.HTTPError:
+                failed = True
+            if failed:
+                errors += 1
+            else:
+                latencies.append(time.perf_counter() - start)
+                if "X-DB-Queries" in response.headers:
+                    queries.append(int(response.headers["X-DB-Queries"]))
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return summarize(
+        name, latencies, errors, concurrency, time.perf_counter() - start, queries
+    )
+
+
+def http_client(base_url: str, concurrency: int) -> httpx.AsyncClient:
+    limits = httpx.Limits(
+        max_connections=concurrency, max_keepalive_connections=concurrency
+    )
+    return httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60)
+
+
+def asgi_client(app: Any) -> httpx.AsyncClient:
+    """
+    A client calling `app` in-process, without sockets or a server: what is
+    left is the cost of the app itself. Lifespan events are not run.
+    """
+    return httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=app), base_url="http://testserver", timeout=60
+    )
+
+
+@contextmanager
+def serve(app: Any, port: int = 8765, **config: Any) -> Generator[str, None, None]:
+    """
+    Run `app` under uvicorn in a background thread for the duration of the block.
+    """
+    server = uvicorn.Server(
+        uvicorn.Config(
+            app,
+            host="127.0.0.1",
+            port=port,
+            log_level="warning",
+            backlog=4096,
+            **config,
+        )
+    )
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.05)
+    try:
+        yield f"http://127.0.0.1:{port}"
+    finally:
+        server.should_exit = True
+        thread.join()
+
+
+def print_results(results: list[LoadResult]) -> None:
+    header = f"{'scenario':<32}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'q/req':>8}{'errors':>8}"
+    print(header)
+    print("-" * len(header))
+    for r in results:
+        queries = "-" if r.queries_per_request is None else r.queries_per_request
+        print(
+            f"{r.name:<32}{r.rps:>10}{r.p50_ms:>10}{r.p95_ms:>10}{r.p99_ms:>10}{queries:>8}{r.errors:>8}"
+        )
@@ -0,0 +1,77 @@
+import hashlib
+import hmac
+import unicodedata
+from collections.abc import Callable
+from decimal import Decimal, InvalidOperation
+from typing import Any, NamedTuple
+
+from sqlalchemy import event
+
+from app.core.cache import LRUCache, invalidate_rows_on_commit
+from app.core.config import settings
+from app.models import Question
+
+
+def _normalize_exact(answer: str) -> str:
+    return answer.strip()
+
+
+def _normalize_text(answer: str) -> str:
+    # "Hello  World" == "hello world", full-width and ligature forms fold too
+    return " ".join(unicodedata.normalize("NFKC", answer).casefold().split())
+
+
+def _normalize_number(answer: str) -> str:
+    # "1.50" == "1.5" == "+1.5"
+    try:
+        number = Decimal(answer.strip())
+    except InvalidOperation:
+        return answer.strip()
+    if not number.is_finite():
+        return answer.strip()
+    return format(number.normalize(), "f")
+
+
+# How answers are compared, by Question.answer_type; other types compare exactly
+ANSWER_NORMALIZERS: dict[str, Callable[[str], str]] = {
+    "exact": _normalize_exact,
+    "flag": _normalize_exact,
+    "text": _normalize_text,
+    "number": _normalize_number,
+}
+
+
+def hash_answer(answer_type: str, answer: str) -> str:
+    """
+    Hex SHA-256 of the answer normalized for its type. The type is part of the
+    hashed value, so changing a question's type changes its hash.
+    """
+    normalized = ANSWER_NORMALIZERS.get(answer_type, _normalize_exact)(answer)
+    return hashlib.sha256(f"{answer_type}\0{normalized}".encode()).hexdigest()
+
+
+class AnswerMatcher(NamedTuple):
+    answer_type: str
+    answer_hash: str
+    points: int
+
+    def matches(self, answer: str) -> bool:
+        # constant time, the response time does not leak how much of it matched
+        return hmac.compare_digest(
+            hash_answer(self.answer_type, answer), self.answer_hash
+        )
+
+
+# Matchers by question id, so that repeated submissions skip the database
+answer_matchers: LRUCache[int, AnswerMatcher] = LRUCache(
+    ttl=settings.ANSWER_MATCHER_CACHE_TTL_SECONDS,
+    maxsize=settings.ANSWER_MATCHER_CACHE_MAXSIZE,
+)
+
+invalidate_rows_on_commit(answer_matchers, Question, name="answer_matcher")
+
+
+@event.listens_for(Question, "before_insert")
+@event.listens_for(Question, "before_update")
+def _set_answer_hash(mapper: Any, connection: Any, question: Question) -> None:
+    question.answer_hash = hash_answer(question.answer_type, question.answer)
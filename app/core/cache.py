@@ -0,0 +1,202 @@
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable, Hashable, Iterable
+from dataclasses import dataclass
+from typing import Any, Generic, TypeVar
+
+from sqlalchemy import event
+from sqlalchemy.orm import ORMExecuteState, Session, UOWTransaction
+
+from app.core.invalidation import invalidation_bus
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+class LRUCache(Generic[K, V]):
+    """
+    Thread-safe, per-worker LRU cache whose entries expire after `ttl` seconds.
+
+    Writers invalidate the keys they change, in the other workers too through
+    `invalidation_bus`; the TTL bounds how long changes go unseen should a
+    message be lost. Callers read `generation` before loading a value
+    and pass it to `set`, so a value loaded before a concurrent invalidation is
+    not stored afterwards.
+    """
+
+    def __init__(self, *, ttl: float, maxsize: int) -> None:
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[K, tuple[V, float]] = OrderedDict()
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def generation(self) -> int:
+        return self._generation
+
+    def get(self, key: K) -> V | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[1] < time.monotonic():
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def set(self, key: K, value: V, generation: int) -> None:
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            if self._generation != generation:
+                return
+            self._entries[key] = (value, time.monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, keys: Iterable[K] | None = None) -> None:
+        """
+        Drop the given keys, or every entry when `keys` is None.
+        """
+        with self._lock:
+            self._generation += 1
+            if keys is None:
+                self._entries.clear()
+                return
+            for key in keys:
+                self._entries.pop(key, None)
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+# Stands for every key, for writes whose rows are unknown (UPDATE/DELETE
+# statements)
+ALL_KEYS = "*"
+
+Invalidate = Callable[[Iterable[Any] | None], None]
+
+
+@dataclass
+class _Watch:
+    invalidate: Invalidate
+    flushed: Callable[[Session], Iterable[Any]]
+    executed: Callable[[ORMExecuteState], Iterable[Any]]
+
+
+_watches: dict[str, _Watch] = {}
+# Keys changed by the session's transaction, by watch name
+_CHANGED = "invalidate_on_commit_changed"
+
+
+def invalidate_on_commit(
+    name: str,
+    invalidate: Invalidate,
+    *,
+    flushed: Callable[[Session], Iterable[Any]],
+    executed: Callable[[ORMExecuteState], Iterable[Any]] = lambda state: (),
+) -> None:
+    """
+    Call `invalidate(keys)` once a transaction commits, with the keys it
+    changed: in this worker directly, in the others through `invalidation_bus`
+    under `name`. Keys are None, for all, when ALL_KEYS is among them.
+
+    `flushed(session)` gives the keys changed by a flush, from the session's
+    new, dirty and deleted objects, and `executed(state)` those of a statement
+    run around the unit of work, such as UPDATE and DELETE statements.
+    """
+    invalidation_bus.register(name, invalidate)
+    _watches[name] = _Watch(invalidate, flushed, executed)
+
+
+def mark_changed(session: Session, name: str, keys: Iterable[Any]) -> None:
+    """
+    Record changes the watches cannot see (COPY, textual SQL), so that watch
+    `name` invalidates `keys` when the session commits.
+    """
+    session.info.setdefault(_CHANGED, {}).setdefault(name, set()).update(keys)
+
+
+def invalidate_rows_on_commit(
+    cache: LRUCache[Any, Any], model: type[Any], *, name: str
+) -> None:
+    """
+    Drop the entries of `cache`, keyed by `model` primary key, for the rows a
+    transaction changed or deleted, once it commits.
+
+    UPDATE/DELETE statements on the table bypass the unit of work and clear the
+    whole cache.
+    """
+
+    def flushed(session: Session) -> set[Any]:
+        return {
+            obj.id
+            for obj in (*session.dirty, *session.deleted)
+            if isinstance(obj, model) and obj.id is not None
+        }
+
+    def executed(state: ORMExecuteState) -> set[Any]:
+        if state.is_update or state.is_delete:
+            if statement_table(state) == model.__tablename__:
+                return {ALL_KEYS}
+        return set()
+
+    invalidate_on_commit(name, cache.invalidate, flushed=flushed, executed=executed)
+
+
+def statement_table(state: ORMExecuteState) -> str | None:
+    """
+    The table an INSERT, UPDATE or DELETE statement writes to.
+    """
+    table = getattr(state.statement, "table", None)
+    return table.name if table is not None else None
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_flushed(session: Session, flush_context: UOWTransaction) -> None:
+    for name, watch in _watches.items():
+        if keys := set(watch.flushed(session)):
+            mark_changed(session, name, keys)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _collect_executed(state: ORMExecuteState) -> None:
+    for name, watch in _watches.items():
+        if keys := set(watch.executed(state)):
+            mark_changed(state.session, name, keys)
+
+
+@event.listens_for(Session, "before_commit")
+def _publish_changed(session: Session) -> None:
+    # commit flushes after this event, flush first to publish those changes
+    session.flush()
+    for name, keys in session.info.get(_CHANGED, {}).items():
+        invalidation_bus.publish(session, name, None if ALL_KEYS in keys else keys)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_changed(session: Session) -> None:
+    for name, keys in session.info.pop(_CHANGED, {}).items():
+        _watches[name].invalidate(None if ALL_KEYS in keys else keys)
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_changed(session: Session) -> None:
+    session.info.pop(_CHANGED, None)
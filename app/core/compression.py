@@ -0,0 +1,144 @@
+import gzip
+import hashlib
+import threading
+import time
+from typing import Any
+
+from app.core.cache import LRUCache
+from app.core.config import settings
+
+try:
+    import brotli
+except ImportError:  # optional, only gzip is offered without it
+    brotli = None
+
+GZIP_LEVEL = 6
+# 4-6 compress close to gzip's speed and better than it, 11 is for static assets
+BROTLI_QUALITY = 5
+
+COMPRESSIBLE_TYPES = (
+    "application/json",
+    "application/x-ndjson",
+    "application/javascript",
+    "image/svg+xml",
+    "text/",
+)
+
+# (URL, ETag) or (digest of the body,)
+CacheKey = tuple[Any, ...]
+
+
+def _compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        compressed: bytes = brotli.compress(body, quality=BROTLI_QUALITY)
+        return compressed
+    # mtime=0: the same body always compresses to the same bytes
+    return gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+class ResponseCompressor:
+    """
+    Compresses response bodies of at least `minimum_size` bytes and keeps the
+    compressed bodies of GET responses in a per-worker LRU cache, so that a
+    body served again costs a lookup instead of a compression.
+
+    Bodies are keyed by their URL and ETag when they have one, a version ETag
+    only ever names one body for a URL, and otherwise by a digest of the body,
+    which is much cheaper to compute than the compression.
+    """
+
+    def __init__(self, *, minimum_size: int | None, cache_maxsize: int) -> None:
+        self.minimum_size = minimum_size
+        self.encodings = ("br", "gzip") if brotli is not None else ("gzip",)
+        # entries never go stale, the LRU order alone drops the unused ones
+        self.cache: LRUCache[CacheKey, bytes] = LRUCache(
+            ttl=float("inf"), maxsize=cache_maxsize
+        )
+        self._lock = threading.Lock()
+        self.compressions = {encoding: 0 for encoding in self.encodings}
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.compress_seconds = 0.0
+
+    def negotiate(self, accept_encoding: str) -> str | None:
+        """
+        The preferred encoding of ours the client accepts, None for identity.
+        """
+        accepted = set()
+        for item in accept_encoding.split(","):
+            coding, _, params = item.partition(";")
+            quality = params.strip().removeprefix("q=").strip() or "1"
+            try:
+                if float(quality) > 0:
+                    accepted.add(coding.strip().lower())
+            except ValueError:
+                continue
+        for encoding in self.encodings:
+            if encoding in accepted or "*" in accepted:
+                return encoding
+        return None
+
+    def compressible(self, content_type: str, size: int) -> bool:
+        return (
+            self.minimum_size is not None
+            and size >= self.minimum_size
+            and content_type.startswith(COMPRESSIBLE_TYPES)
+        )
+
+    def cache_key(self, url: str, etag: str | None, body: bytes) -> CacheKey | None:
+        """
+        The key `body`'s compressed forms are cached under, None when the cache
+        is disabled.
+        """
+        if self.cache.maxsize <= 0:
+            return None
+        if etag:
+            return (url, etag.removeprefix("W/"))
+        return (hashlib.blake2b(body, digest_size=16).digest(),)
+
+    def compress(
+        self, body: bytes, encoding: str, key: CacheKey | None = None
+    ) -> bytes:
+        """
+        `body` compressed with `encoding`, from the cache when it has a `key`.
+        """
+        if key is not None:
+            key = (*key, encoding)
+            generation = self.cache.generation
+            if (compressed := self.cache.get(key)) is not None:
+                return compressed
+        start = time.perf_counter()
+        compressed = _compress(body, encoding)
+        elapsed = time.perf_counter() - start
+        if key is not None:
+            self.cache.set(key, compressed, generation)
+        with self._lock:
+            self.compressions[encoding] += 1
+            self.bytes_in += len(body)
+            self.bytes_out += len(compressed)
+            self.compress_seconds += elapsed
+        return compressed
+
+    def stats(self) -> dict[str, Any]:
+        cache = self.cache.stats()
+        with self._lock:
+            return {
+                "minimum_size": self.minimum_size,
+                "encodings": list(self.encodings),
+                "compressions": dict(self.compressions),
+                "ratio": (
+                    round(self.bytes_out / self.bytes_in, 4) if self.bytes_in else 0.0
+                ),
+                "compress_ms": round(self.compress_seconds * 1000, 3),
+                "cache_size": cache["size"],
+                "cache_maxsize": cache["maxsize"],
+                "cache_hits": cache["hits"],
+                "cache_misses": cache["misses"],
+                "cache_hit_rate": cache["hit_rate"],
+            }
+
+
+response_compressor = ResponseCompressor(
+    minimum_size=settings.COMPRESSION_MINIMUM_SIZE,
+    cache_maxsize=settings.COMPRESSION_CACHE_MAXSIZE,
+)
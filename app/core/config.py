@@ -66,12 +66,76 @@ class Settings(BaseSettings):
             path=self.POSTGRES_DB,
         )
 
+    # Connection pool, per engine and per worker process: with N gunicorn workers
+    # Postgres sees up to N * 2 * (DB_POOL_SIZE + DB_MAX_OVERFLOW) connections
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    # Seconds to wait for a free connection before failing the request
+    DB_POOL_TIMEOUT: float = 30
+    # Seconds after which a connection is replaced, -1 to disable
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_PRE_PING: bool = True
+    # LIFO lets idle connections time out server-side when traffic drops
+    DB_POOL_USE_LIFO: bool = False
+    # Upper bound on how stale a cached list count can be (count_mode=cached)
+    COUNT_CACHE_TTL_SECONDS: int = 60
+    # Development only: EXPLAIN the SELECTs slower than this and log sequential
+    # scans of tables with at least QUERY_ADVISOR_MIN_ROWS rows. Unset disables
+    # it, production never enables it
+    QUERY_ADVISOR_THRESHOLD_MS: float | None = None
+    QUERY_ADVISOR_MIN_ROWS: int = 10_000
+    # A statement run this many times by one request is reported as an N+1
+    N_PLUS_ONE_THRESHOLD: int = 5
+    # Directory where worker processes share their metrics, so that /metrics
+    # covers all of them. Empty it before starting the server. Unset: each
+    # worker reports only its own
+    METRICS_DIR: str | None = None
+    METRICS_FLUSH_SECONDS: float = 5.0
+    # Authenticated users cached per worker, so most requests skip the user lookup.
+    # The TTL bounds how long a change made through another worker goes unseen,
+    # USER_CACHE_MAXSIZE=0 disables the cache
+    USER_CACHE_TTL_SECONDS: int = 30
+    USER_CACHE_MAXSIZE: int = 10_000
+    # Processes hashing and verifying passwords, per worker: at most this many
+    # bcrypt operations run at once, the rest queue. 0 hashes in request threads
+    PASSWORD_HASH_WORKERS: int = 2
+    # Answer matchers cached per worker for POST /questions/{id}/submit, the TTL
+    # bounds how long an answer changed through another worker is still accepted
+    ANSWER_MATCHER_CACHE_TTL_SECONDS: int = 300
+    ANSWER_MATCHER_CACHE_MAXSIZE: int = 100_000
+    # How often each worker reads new solves into its leaderboard, solves made
+    # through the same worker show up at once
+    LEADERBOARD_SYNC_SECONDS: float = 1.0
+    # Encoder of the JSON responses FastAPI validates and serializes itself,
+    # orjson needs the orjson package
+    JSON_RESPONSE_CLASS: Literal["json", "orjson"] = "json"
+    # Responses of at least this many bytes are compressed (gzip, or brotli when
+    # the brotli package is installed). Unset disables compression, for when the
+    # proxy compresses. The compressed bodies of GET responses are cached per
+    # worker, COMPRESSION_CACHE_MAXSIZE=0 disables the cache
+    COMPRESSION_MINIMUM_SIZE: int | None = 1000
+    COMPRESSION_CACHE_MAXSIZE: int = 1000
+    # Postgres NOTIFY channel on which workers tell each other what to evict from
+    # the per-worker caches above. Unset: other workers wait for the TTLs
+    CACHE_INVALIDATION_CHANNEL: str | None = "cache_invalidation"
+
     SMTP_TLS: bool = True
     SMTP_SSL: bool = False
     SMTP_PORT: int = 587
     SMTP_HOST: str | None = None
     SMTP_USER: str | None = None
     SMTP_PASSWORD: str | None = None
+    # Emails are queued and sent from background threads, each with its own
+    # SMTP connection, closed after SMTP_IDLE_SECONDS without mail
+    SMTP_CONNECTIONS: int = 2
+    SMTP_IDLE_SECONDS: float = 30.0
+    SMTP_TIMEOUT_SECONDS: float = 10.0
+    # Queued emails sent over a connection in a row, before the next thread
+    # gets a turn
+    EMAIL_BATCH_SIZE: int = 50
+    # Failed sends are retried after EMAIL_RETRY_SECONDS, doubling each time
+    EMAIL_MAX_ATTEMPTS: int = 5
+    EMAIL_RETRY_SECONDS: float = 2.0
     # TODO: update type to EmailStr when sqlmodel supports it
     EMAILS_FROM_EMAIL: str | None = None
     EMAILS_FROM_NAME: str | None = None
@@ -83,6 +147,8 @@ class Settings(BaseSettings):
         return self
 
     EMAIL_RESET_TOKEN_EXPIRE_HOURS: int = 48
+    # Directory where compiled email templates are shared between processes
+    EMAIL_TEMPLATES_BYTECODE_DIR: str | None = None
 
     @computed_field  # type: ignore[misc]
     @property
@@ -96,10 +162,23 @@ class Settings(BaseSettings):
     FIRST_SUPERUSER_PASSWORD: str
     USERS_OPEN_REGISTRATION: bool = False
 
+    # Where room files are stored: "azure" (below) or "local", a directory on this
+    # host, by default the files/ directory of the backend
+    STORAGE_BACKEND: Literal["azure", "local"] = "azure"
+    STORAGE_LOCAL_ROOT: str | None = None
+
     # Azure Blob Storage
     AZURE_ACCOUNT_NAME: str = "<account-name>"
     AZURE_ACCOUNT_KEY: str = "<account-access-key>"
     AZURE_CONTAINER_NAME: str = "<container-name>"
+    # Defaults to https://<AZURE_ACCOUNT_NAME>.blob.core.windows.net, set it to use
+    # a local emulator such as Azurite (http://127.0.0.1:10000/devstoreaccount1)
+    AZURE_ACCOUNT_URL: str | None = None
+    AZURE_SAS_TTL_SECONDS: int = 3600
+    # Files above one block are uploaded as blocks staged in parallel, buffering
+    # at most AZURE_UPLOAD_BLOCK_SIZE * AZURE_UPLOAD_CONCURRENCY bytes per upload
+    AZURE_UPLOAD_BLOCK_SIZE: int = 4 * 1024 * 1024
+    AZURE_UPLOAD_CONCURRENCY: int = 4
 
     def _check_default_secret(self, var_name: str, value: str | None) -> None:
         if value == "changethis":
@@ -0,0 +1,140 @@
+import threading
+import time
+from collections.abc import Iterable
+from typing import Any, Literal
+
+from sqlalchemy import and_, func, text
+from sqlalchemy.orm import ORMExecuteState, Session
+from sqlmodel import select
+
+from app.core.cache import invalidate_on_commit, mark_changed, statement_table
+from app.core.config import settings
+
+# exact: COUNT(*) on every call
+# cached: COUNT(*) once per filter, reused until a write to the table commits
+# estimate: planner statistics (pg_class.reltuples), only for unfiltered lists
+CountMode = Literal["exact", "cached", "estimate"]
+
+
+class CountCache:
+    """
+    Per-worker cache of exact counts keyed by table and filter.
+
+    Entries are dropped when a transaction writing to the table commits, in the
+    other workers through `invalidation_bus`, and expire after `ttl` seconds in
+    case a message is lost.
+    """
+
+    def __init__(self, ttl: float) -> None:
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries: dict[tuple[str, str], tuple[int, float]] = {}
+        # bumped on every invalidation, so a count computed before a concurrent
+        # write committed is not stored afterwards
+        self._generations: dict[str, int] = {}
+
+    def generation(self, table: str) -> int:
+        return self._generations.get(table, 0)
+
+    def get(self, key: tuple[str, str]) -> int | None:
+        entry = self._entries.get(key)
+        if entry is None or entry[1] < time.monotonic():
+            return None
+        return entry[0]
+
+    def set(self, key: tuple[str, str], count: int, generation: int) -> None:
+        with self._lock:
+            if self.generation(key[0]) == generation:
+                self._entries[key] = (count, time.monotonic() + self.ttl)
+
+    def invalidate(self, tables: Iterable[str] | None) -> None:
+        """
+        Drop the counts of `tables`, None for all of them.
+        """
+        with self._lock:
+            if tables is None:
+                tables = {*self._generations, *(key[0] for key in self._entries)}
+            tables = set(tables)
+            for table in tables:
+                self._generations[table] = self.generation(table) + 1
+            for key in [key for key in self._entries if key[0] in tables]:
+                del self._entries[key]
+
+
+count_cache = CountCache(ttl=settings.COUNT_CACHE_TTL_SECONDS)
+
+
+def _exact_count(session: Session, model: Any, where: tuple[Any, ...]) -> int:
+    statement = select(func.count()).select_from(model).where(*where)
+    return session.exec(statement).one()  # type: ignore[attr-defined, no-any-return]
+
+
+def _estimated_count(session: Session, table: str) -> int | None:
+    reltuples = session.execute(
+        text("SELECT reltuples FROM pg_class WHERE oid = to_regclass(:table)"),
+        {"table": f'"{table}"'},
+    ).scalar()
+    # -1 until the table has been vacuumed or analyzed at least once
+    if reltuples is None or reltuples < 0:
+        return None
+    return int(reltuples)
+
+
+def count_rows(
+    session: Session, model: Any, *where: Any, mode: CountMode = "exact"
+) -> int:
+    """
+    Count the rows of `model` matching `where` with the given strategy.
+
+    "estimate" falls back to "cached" for filtered counts and for tables that
+    have no statistics yet.
+    """
+    if mode == "exact":
+        return _exact_count(session, model, where)
+    table = model.__tablename__
+    if mode == "estimate" and not where:
+        estimate = _estimated_count(session, table)
+        if estimate is not None:
+            return estimate
+    filter_key = (
+        str(and_(*where).compile(compile_kwargs={"literal_binds": True}))
+        if where
+        else ""
+    )
+    key = (table, filter_key)
+    cached = count_cache.get(key)
+    if cached is not None:
+        return cached
+    generation = count_cache.generation(table)
+    count = _exact_count(session, model, where)
+    count_cache.set(key, count, generation)
+    return count
+
+
+def _flushed_tables(session: Session) -> set[str]:
+    # Only inserts and deletes change counts
+    return {obj.__tablename__ for obj in (*session.new, *session.deleted)}
+
+
+def _executed_tables(state: ORMExecuteState) -> set[str]:
+    # insert(Model) / delete(Model) statements bypass the unit of work
+    if state.is_insert or state.is_delete:
+        if (table := statement_table(state)) is not None:
+            return {table}
+    return set()
+
+
+invalidate_on_commit(
+    "count",
+    count_cache.invalidate,
+    flushed=_flushed_tables,
+    executed=_executed_tables,
+)
+
+
+def mark_written(session: Session, *tables: str) -> None:
+    """
+    Record writes made around the ORM (COPY, textual SQL), so that the counts of
+    `tables` are dropped when the session commits.
+    """
+    mark_changed(session, "count", tables)
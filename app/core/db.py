@@ -1,10 +1,42 @@
+from typing import Any
+
+from sqlalchemy.ext.asyncio import create_async_engine
 from sqlmodel import Session, create_engine, select
 
 from app import crud
 from app.core.config import settings
+from app.core.pool import TimedAsyncAdaptedQueuePool, TimedQueuePool
+from app.core.query_advisor import install_query_advisor
+from app.core.query_stats import install_query_stats
+from app.core.versions import install_versioning
 from app.models import User, UserCreate
 
-engine = create_engine(str(settings.SQLALCHEMY_DATABASE_URI))
+
+def _pool_options() -> dict[str, Any]:
+    return {
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+        "pool_use_lifo": settings.DB_POOL_USE_LIFO,
+    }
+
+
+engine = create_engine(
+    str(settings.SQLALCHEMY_DATABASE_URI),
+    poolclass=TimedQueuePool,
+    **_pool_options(),
+)
+# psycopg 3 speaks both sync and asyncio, so the same URL serves the async engine
+async_engine = create_async_engine(
+    str(settings.SQLALCHEMY_DATABASE_URI),
+    poolclass=TimedAsyncAdaptedQueuePool,
+    **_pool_options(),
+)
+install_query_stats(engine, async_engine.sync_engine)
+install_query_advisor(engine, async_engine.sync_engine)
+install_versioning()
 
 
 # make sure all SQLModel models are imported (app.models) before initializing DB
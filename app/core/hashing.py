@@ -0,0 +1,135 @@
+import asyncio
+import multiprocessing
+import threading
+import time
+from collections.abc import Callable
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, TypeVar
+
+from starlette.concurrency import run_in_threadpool
+
+from app.core import security
+from app.core.config import settings
+
+T = TypeVar("T")
+
+
+class PasswordHasher:
+    """
+    Runs bcrypt in a pool of `workers` processes, per worker process of the app.
+
+    A hash costs a few hundred milliseconds of CPU. Running it in request threads
+    lets a login storm take every core and starve cheap requests; here at most
+    `workers` hashes run at a time and the rest queue. With `workers=0` hashing
+    runs inline in the calling thread.
+    """
+
+    def __init__(self, workers: int) -> None:
+        self.workers = workers
+        self._executor: ProcessPoolExecutor | None = None
+        self._lock = threading.Lock()
+        self.submitted = 0
+        self.completed = 0
+        self.pending = 0
+        self.max_pending = 0
+        self.seconds_total = 0.0
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                # spawn: forking a process that runs threads (uvicorn, the
+                # threadpool) can leave locks held in the child
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+            return self._executor
+
+    def _submit(self, fn: Callable[..., T], *args: Any) -> "Future[T]":
+        start = time.perf_counter()
+        with self._lock:
+            self.submitted += 1
+            self.pending += 1
+            self.max_pending = max(self.max_pending, self.pending)
+
+        def done(_: Future[T]) -> None:
+            with self._lock:
+                self.completed += 1
+                self.pending -= 1
+                self.seconds_total += time.perf_counter() - start
+
+        executor = self._get_executor()
+        try:
+            future = executor.submit(fn, *args)
+        except BrokenProcessPool:
+            # a hashing process died, start over with a fresh pool next time
+            with self._lock:
+                if self._executor is executor:
+                    self._executor = None
+            done(Future())
+            raise
+        future.add_done_callback(done)
+        return future
+
+    def verify(self, plain_password: str, hashed_password: str) -> bool:
+        if not self.workers:
+            return security.verify_password(plain_password, hashed_password)
+        return self._submit(
+            security.verify_password, plain_password, hashed_password
+        ).result()
+
+    def hash(self, password: str) -> str:
+        if not self.workers:
+            return security.get_password_hash(password)
+        return self._submit(security.get_password_hash, password).result()
+
+    def hash_many(self, passwords: list[str]) -> list[str]:
+        """
+        Hash on all of the pool's processes at once. The queue is shared with
+        logins, which wait behind the batch.
+        """
+        if not self.workers:
+            return [security.get_password_hash(password) for password in passwords]
+        futures = [
+            self._submit(security.get_password_hash, password) for password in passwords
+        ]
+        return [future.result() for future in futures]
+
+    async def verify_async(self, plain_password: str, hashed_password: str) -> bool:
+        if not self.workers:
+            return await run_in_threadpool(
+                security.verify_password, plain_password, hashed_password
+            )
+        return await asyncio.wrap_future(
+            self._submit(security.verify_password, plain_password, hashed_password)
+        )
+
+    async def hash_async(self, password: str) -> str:
+        if not self.workers:
+            return await run_in_threadpool(security.get_password_hash, password)
+        return await asyncio.wrap_future(
+            self._submit(security.get_password_hash, password)
+        )
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "pending": self.pending,
+                # not yet picked up by a worker process
+                "queued": max(self.pending - self.workers, 0),
+                "max_pending": self.max_pending,
+                "submitted": self.submitted,
+                "completed": self.completed,
+                "seconds_total": round(self.seconds_total, 6),
+            }
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+
+password_hasher = PasswordHasher(workers=settings.PASSWORD_HASH_WORKERS)
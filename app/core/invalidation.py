@@ -0,0 +1,173 @@
+import json
+import logging
+import secrets
+import select
+import threading
+import time
+from collections.abc import Callable, Iterable
+from typing import Any
+
+import psycopg
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# NOTIFY payloads are limited to 8000 bytes, past that the receivers clear the
+# whole cache instead
+MAX_PAYLOAD = 7_900
+
+Evict = Callable[[list[Any] | None], None]
+
+
+class InvalidationBus:
+    """
+    Tells the other worker processes, on this host or any other, which cache
+    entries a committed transaction made stale.
+
+    Writers `publish` the keys inside their transaction with pg_notify, so
+    Postgres delivers them when, and only if, it commits. Every worker runs a
+    listener thread, started by `start`, that passes the keys to the `evict`
+    function registered under the cache's name. The writer's own worker has
+    already evicted them and skips its messages.
+
+    Lag is measured between the writer's and the listener's clocks, so across
+    hosts it includes their skew.
+    """
+
+    def __init__(self, channel: str | None) -> None:
+        self.channel = channel
+        # tells this process's messages apart, pids repeat across hosts
+        self.origin = secrets.token_hex(8)
+        self._caches: dict[str, Evict] = {}
+        self._lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+        self._stop = threading.Event()
+        self.listening = False
+        self.published = 0
+        self.received = 0
+        self.reconnects = 0
+        self.last_lag_seconds = 0.0
+        self.max_lag_seconds = 0.0
+        self._lag_total = 0.0
+
+    def register(self, name: str, evict: Evict) -> None:
+        """
+        Have messages for cache `name` call `evict(keys)`, keys None for all.
+        """
+        self._caches[name] = evict
+
+    def publish(self, session: Session, name: str, keys: Iterable[Any] | None) -> None:
+        """
+        Queue an invalidation of `keys` (None for all) in cache `name` on the
+        other workers, delivered when `session`'s transaction commits.
+        """
+        if not self.channel:
+            return
+        message = {
+            "origin": self.origin,
+            "cache": name,
+            "keys": None if keys is None else sorted(keys),
+            "sent": time.time(),
+        }
+        payload = json.dumps(message)
+        if len(payload) > MAX_PAYLOAD:
+            payload = json.dumps({**message, "keys": None})
+        session.connection().execute(
+            text("SELECT pg_notify(:channel, :payload)"),
+            {"channel": self.channel, "payload": payload},
+        )
+        with self._lock:
+            self.published += 1
+
+    def receive(self, payload: str) -> None:
+        message = json.loads(payload)
+        if message["origin"] == self.origin:
+            return
+        lag = max(0.0, time.time() - message["sent"])
+        with self._lock:
+            self.received += 1
+            self.last_lag_seconds = lag
+            self.max_lag_seconds = max(self.max_lag_seconds, lag)
+            self._lag_total += lag
+        if evict := self._caches.get(message["cache"]):
+            evict(message["keys"])
+
+    def _evict_all(self) -> None:
+        for evict in self._caches.values():
+            evict(None)
+
+    def start(self) -> None:
+        if not self.channel or self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._listen, name="cache-invalidation", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        thread, self._thread = self._thread, None
+        if thread is not None:
+            self._stop.set()
+            thread.join()
+
+    def _listen(self) -> None:
+        # a connection of its own, outside the pools: it is held for good
+        url = str(settings.SQLALCHEMY_DATABASE_URI).replace(
+            "postgresql+psycopg://", "postgresql://", 1
+        )
+        delay = 0.5
+        while not self._stop.is_set():
+            try:
+                with psycopg.connect(url, autocommit=True) as connection:
+                    connection.execute(f'LISTEN "{self.channel}"')
+                    # messages sent while not listening are lost
+                    self._evict_all()
+                    self.listening = True
+                    delay = 0.5
+                    self._wait_for_notifies(connection)
+            except Exception:
+                if self._stop.is_set():
+                    break
+                logger.exception("Cache invalidation listener failed, reconnecting")
+                with self._lock:
+                    self.reconnects += 1
+                self._stop.wait(delay)
+                delay = min(delay * 2, 30.0)
+            finally:
+                self.listening = False
+
+    def _wait_for_notifies(self, connection: psycopg.Connection[Any]) -> None:
+        # Connection.notifies() only takes a timeout from psycopg 3.2 on: wait
+        # on the socket instead, waking up every second to check for stop
+        pgconn = connection.pgconn
+        while not self._stop.is_set():
+            readable, _, _ = select.select([connection.fileno()], [], [], 1.0)
+            if not readable:
+                continue
+            # raises OperationalError once the server has closed the connection
+            pgconn.consume_input()
+            while (notify := pgconn.notifies()) is not None:
+                self.receive(notify.extra.decode())
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "channel": self.channel,
+                "listening": self.listening,
+                "caches": sorted(self._caches),
+                "published": self.published,
+                "received": self.received,
+                "reconnects": self.reconnects,
+                "last_lag_seconds": round(self.last_lag_seconds, 6),
+                "max_lag_seconds": round(self.max_lag_seconds, 6),
+                "mean_lag_seconds": (
+                    round(self._lag_total / self.received, 6) if self.received else 0.0
+                ),
+            }
+
+
+invalidation_bus = InvalidationBus(channel=settings.CACHE_INVALIDATION_CHANNEL)
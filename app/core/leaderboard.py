@@ -0,0 +1,296 @@
+import bisect
+import threading
+import time
+from typing import NamedTuple
+
+from sqlalchemy import func, orm
+from sqlalchemy.orm import ORMExecuteState
+from sqlmodel import Session, select
+
+from app.core.cache import ALL_KEYS, invalidate_on_commit, statement_table
+from app.core.config import settings
+from app.models import Question, Solve, User
+
+# A solve id that is still missing after this long belongs to a transaction that
+# rolled back (sequences have gaps), not to one that has yet to commit
+GAP_GRACE_SECONDS = 60.0
+# The initial load watches for gaps among this many of the latest solve ids, the
+# ones whose transactions may still be in flight
+LOAD_GAP_WINDOW = 10_000
+
+
+class LeaderboardEntry(NamedTuple):
+    rank: int
+    user_id: int
+    score: int
+
+
+class _Fenwick:
+    """
+    Number of players at each score, with O(log n) prefix counts and selection.
+    Grows by doubling when a score does not fit.
+    """
+
+    def __init__(self, capacity: int = 1024) -> None:
+        self.capacity = capacity
+        self.tree = [0] * (capacity + 1)
+
+    def add(self, score: int, delta: int) -> None:
+        if score >= self.capacity:
+            self._grow(score)
+        i = score + 1
+        while i <= self.capacity:
+            self.tree[i] += delta
+            i += i & -i
+
+    def at_most(self, score: int) -> int:
+        """
+        Players with a score <= `score`.
+        """
+        i = min(score + 1, self.capacity)
+        count = 0
+        while i > 0:
+            count += self.tree[i]
+            i -= i & -i
+        return count
+
+    def select(self, m: int) -> int:
+        """
+        Score of the m-th lowest player, 1-based.
+        """
+        position = 0
+        step = 1 << self.capacity.bit_length()
+        while step:
+            nxt = position + step
+            if nxt <= self.capacity and self.tree[nxt] < m:
+                position = nxt
+                m -= self.tree[nxt]
+            step >>= 1
+        # tree index position + 1 holds score `position`
+        return position
+
+    def _grow(self, score: int) -> None:
+        counts = [self.at_most(s) - self.at_most(s - 1) for s in range(self.capacity)]
+        capacity = self.capacity
+        while capacity <= score:
+            capacity *= 2
+        self.capacity = capacity
+        self.tree = [0] * (capacity + 1)
+        for s, count in enumerate(counts):
+            if count:
+                self.add(s, count)
+
+
+class Leaderboard:
+    """
+    Per-worker ranking of players by score, built from the `solve` table.
+
+    Solves are applied incrementally: `sync` reads only the rows added since the
+    last sync, so no request scans profiles or solves. Players are ordered by
+    score, then by user id; players with the same score share a rank.
+
+    Deleting users or questions deletes their solves by cascade, which no sync
+    sees: those commits `reset` the leaderboard, in every worker, and the next
+    sync loads it again.
+    """
+
+    def __init__(self, sync_interval: float) -> None:
+        self.sync_interval = sync_interval
+        self._lock = threading.Lock()
+        self._loaded = False
+        self._last_sync = 0.0
+        self._scores: dict[int, int] = {}
+        # user ids by score, ascending
+        self._buckets: dict[int, list[int]] = {}
+        self._counts = _Fenwick()
+        # every solve id <= _floor has been applied or given up on
+        self._floor = 0
+        self._applied: set[int] = set()
+        # bumped by reset, rows read before it are not applied
+        self._generation = 0
+        self._gaps: dict[int, float] = {}
+
+    def __len__(self) -> int:
+        return len(self._scores)
+
+    def _add(self, user_id: int, points: int) -> None:
+        old = self._scores.get(user_id)
+        if old is not None:
+            self._counts.add(old, -1)
+            bucket = self._buckets[old]
+            bucket.pop(bisect.bisect_left(bucket, user_id))
+            if not bucket:
+                del self._buckets[old]
+        new = (old or 0) + points
+        self._scores[user_id] = new
+        self._counts.add(new, 1)
+        bisect.insort(self._buckets.setdefault(new, []), user_id)
+
+    def remove(self, user_id: int) -> None:
+        with self._lock:
+            score = self._scores.pop(user_id, None)
+            if score is not None:
+                self._counts.add(score, -1)
+                bucket = self._buckets[score]
+                bucket.pop(bisect.bisect_left(bucket, user_id))
+                if not bucket:
+                    del self._buckets[score]
+
+    def reset(self) -> None:
+        """
+        Forget every score, the next sync loads them again.
+        """
+        with self._lock:
+            self._generation += 1
+            self._loaded = False
+            self._scores.clear()
+            self._buckets.clear()
+            self._counts = _Fenwick()
+            self._floor = 0
+            self._applied.clear()
+            self._gaps.clear()
+
+    def sync(self, session: Session, *, force: bool = False) -> None:
+        """
+        Apply the solves committed since the last sync, at most once per
+        `sync_interval` unless forced.
+        """
+        now = time.monotonic()
+        if not force and self._loaded and now - self._last_sync < self.sync_interval:
+            return
+        # Query without holding the lock: under AsyncSession.run_sync a query
+        # yields to the event loop, where another sync waiting on the lock would
+        # block the loop for good. Rows already applied are skipped by id.
+        generation = self._generation
+        if not self._loaded:
+            self._load(session, now, generation)
+            return
+        rows = session.exec(
+            select(Solve.id, Solve.user_id, Solve.points)
+            .where(Solve.id > self._floor)  # type: ignore[operator]
+            .order_by(Solve.id)  # type: ignore[arg-type]
+        ).all()
+        with self._lock:
+            if generation != self._generation or not self._loaded:
+                return
+            max_seen = 0
+            for solve_id, user_id, points in rows:
+                assert solve_id is not None  # a primary key
+                max_seen = max(max_seen, solve_id)
+                if solve_id > self._floor and solve_id not in self._applied:
+                    self._applied.add(solve_id)
+                    self._add(user_id, points)
+            self._advance_floor(max_seen, now)
+            self._last_sync = now
+
+    def _load(self, session: Session, now: float, generation: int) -> None:
+        # never None, coalesced
+        top = session.exec(select(func.coalesce(func.max(Solve.id), 0))).one() or 0
+        floor = max(top - LOAD_GAP_WINDOW, 0)
+        totals = session.exec(
+            select(Solve.user_id, func.sum(Solve.points))
+            .where(Solve.id <= floor)  # type: ignore[operator]
+            .group_by(Solve.user_id)  # type: ignore[arg-type]
+        ).all()
+        # applied one by one, so that the gaps among them are read again
+        recent = session.exec(
+            select(Solve.id, Solve.user_id, Solve.points).where(
+                Solve.id > floor,  # type: ignore[operator]
+                Solve.id <= top,  # type: ignore[operator]
+            )
+        ).all()
+        with self._lock:
+            if self._loaded or generation != self._generation:
+                return
+            self._floor = floor
+            for user_id, points in totals:
+                self._add(user_id, int(points))
+            for solve_id, user_id, points in recent:
+                assert solve_id is not None  # a primary key
+                self._applied.add(solve_id)
+                self._add(user_id, points)
+            self._advance_floor(top, now)
+            self._loaded = True
+            self._last_sync = now
+
+    def _advance_floor(self, max_seen: int, now: float) -> None:
+        while self._floor < max_seen:
+            nxt = self._floor + 1
+            if nxt in self._applied:
+                self._applied.discard(nxt)
+            elif now - self._gaps.setdefault(nxt, now) < GAP_GRACE_SECONDS:
+                # may still commit, read it again on the next sync
+                break
+            self._gaps.pop(nxt, None)
+            self._floor = nxt
+
+    def _entry_at(self, position: int) -> LeaderboardEntry:
+        # position is 1-based, in leaderboard order
+        total = len(self._scores)
+        score = self._counts.select(total - position + 1)
+        higher = total - self._counts.at_most(score)
+        bucket = self._buckets[score]
+        return LeaderboardEntry(
+            rank=higher + 1, user_id=bucket[position - higher - 1], score=score
+        )
+
+    def _position(self, user_id: int) -> int | None:
+        score = self._scores.get(user_id)
+        if score is None:
+            return None
+        higher = len(self._scores) - self._counts.at_most(score)
+        return higher + bisect.bisect_left(self._buckets[score], user_id) + 1
+
+    def top(self, n: int) -> list[LeaderboardEntry]:
+        with self._lock:
+            return [self._entry_at(p) for p in range(1, min(n, len(self._scores)) + 1)]
+
+    def around(self, user_id: int, before: int, after: int) -> list[LeaderboardEntry]:
+        with self._lock:
+            position = self._position(user_id)
+            if position is None:
+                return []
+            first = max(position - before, 1)
+            last = min(position + after, len(self._scores))
+            return [self._entry_at(p) for p in range(first, last + 1)]
+
+    def player(self, user_id: int) -> tuple[LeaderboardEntry, float] | None:
+        """
+        The player's entry and percentile, the share of ranked players with a
+        lower score, or None if they have not solved anything.
+        """
+        with self._lock:
+            score = self._scores.get(user_id)
+            if score is None:
+                return None
+            total = len(self._scores)
+            lower = self._counts.at_most(score - 1) if score else 0
+            higher = total - self._counts.at_most(score)
+            percentile = round(100 * lower / total, 2)
+            return LeaderboardEntry(higher + 1, user_id, score), percentile
+
+
+leaderboard = Leaderboard(sync_interval=settings.LEADERBOARD_SYNC_SECONDS)
+
+# deleting from these deletes solves
+_SOLVE_TABLES = {User.__tablename__, Question.__tablename__, Solve.__tablename__}
+
+
+def _flushed_deletes(session: orm.Session) -> set[str]:
+    if any(isinstance(obj, User | Question | Solve) for obj in session.deleted):
+        return {ALL_KEYS}
+    return set()
+
+
+def _executed_deletes(state: ORMExecuteState) -> set[str]:
+    if state.is_delete and statement_table(state) in _SOLVE_TABLES:
+        return {ALL_KEYS}
+    return set()
+
+
+invalidate_on_commit(
+    "leaderboard",
+    lambda keys: leaderboard.reset(),
+    flushed=_flushed_deletes,
+    executed=_executed_deletes,
+)
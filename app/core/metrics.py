@@ -0,0 +1,301 @@
+import bisect
+import json
+import logging
+import os
+import threading
+from collections.abc import Iterable
+from pathlib import Path
+from typing import Any
+
+from app.core.config import settings
+from app.core.db import async_engine, engine
+from app.core.hashing import password_hasher
+from app.core.invalidation import invalidation_bus
+from app.core.outbox import email_outbox
+from app.core.pool import pool_stats
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds of the request duration buckets, in seconds
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+HELP = {
+    "http_requests_total": ("counter", "Requests by route, method and status."),
+    "http_request_duration_seconds": (
+        "histogram",
+        "Request duration by route and method, until the body is sent.",
+    ),
+    "http_requests_in_flight": ("gauge", "Requests being served."),
+    "db_pool_size": ("gauge", "Configured connections per pool."),
+    "db_pool_checked_out": ("gauge", "Connections in use."),
+    "db_pool_overflow": ("gauge", "Connections open beyond the pool size."),
+    "db_pool_checkouts_total": ("counter", "Connections handed out."),
+    "db_pool_timeouts_total": ("counter", "Checkouts that timed out."),
+    "password_hash_workers": ("gauge", "Password hashing processes."),
+    "password_hash_pending": ("gauge", "Hashes running or queued."),
+    "password_hash_queued": ("gauge", "Hashes waiting for a hashing process."),
+    "email_outbox_queued": ("gauge", "Emails not sent yet."),
+    "email_outbox_lag_seconds": ("gauge", "Wait of the oldest email not sent yet."),
+    "email_outbox_sent_total": ("counter", "Emails sent."),
+    "email_outbox_failed_total": ("counter", "Emails given up on."),
+    "cache_invalidation_published_total": (
+        "counter",
+        "Cache invalidations sent to the other workers.",
+    ),
+    "cache_invalidation_received_total": (
+        "counter",
+        "Cache invalidations received from the other workers.",
+    ),
+    "cache_invalidation_listening": ("gauge", "1 while listening for invalidations."),
+    "cache_invalidation_lag_seconds": (
+        "gauge",
+        "Delay of the last invalidation received, from commit to eviction.",
+    ),
+}
+
+Labels = tuple[tuple[str, str], ...]
+Series = tuple[str, Labels, float]
+
+
+def _process_values() -> tuple[list[Series], list[Series]]:
+    """
+    Counters and gauges of this process's connection pools, password hasher,
+    email outbox and cache invalidation bus.
+    """
+    counters: list[Series] = []
+    gauges: list[Series] = []
+    for name, pool in (("sync", engine.pool), ("async", async_engine.sync_engine.pool)):
+        stats = pool_stats(name, pool)
+        labels = (("pool", name),)
+        counters += [
+            ("db_pool_checkouts_total", labels, stats["checkouts"]),
+            ("db_pool_timeouts_total", labels, stats["timeouts"]),
+        ]
+        gauges += [
+            ("db_pool_size", labels, stats["size"]),
+            ("db_pool_checked_out", labels, stats["checked_out"]),
+            ("db_pool_overflow", labels, stats["overflow"]),
+        ]
+    hasher = password_hasher.stats()
+    gauges += [
+        ("password_hash_workers", (), hasher["workers"]),
+        ("password_hash_pending", (), hasher["pending"]),
+        ("password_hash_queued", (), hasher["queued"]),
+    ]
+    outbox = email_outbox.stats()
+    counters += [
+        ("email_outbox_sent_total", (), outbox["sent"]),
+        ("email_outbox_failed_total", (), outbox["failed"]),
+    ]
+    gauges += [
+        ("email_outbox_queued", (), outbox["queued"]),
+        ("email_outbox_lag_seconds", (), outbox["lag_seconds"]),
+    ]
+    bus = invalidation_bus.stats()
+    counters += [
+        ("cache_invalidation_published_total", (), bus["published"]),
+        ("cache_invalidation_received_total", (), bus["received"]),
+    ]
+    gauges += [
+        ("cache_invalidation_listening", (), int(bus["listening"])),
+        ("cache_invalidation_lag_seconds", (), bus["last_lag_seconds"]),
+    ]
+    return counters, gauges
+
+
+def _format_labels(labels: Iterable[tuple[str, str]]) -> str:
+    pairs = ",".join(
+        '{}="{}"'.format(
+            key,
+            value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"'),
+        )
+        for key, value in labels
+    )
+    return f"{{{pairs}}}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+class Metrics:
+    """
+    Request, connection pool, password hashing and email metrics in the
+    Prometheus text format.
+
+    Each worker process counts its own requests. With `directory` set, a thread
+    started by `start` writes a snapshot there every `flush_interval` seconds,
+    off the event loop, and /metrics adds up the snapshots of every worker, so
+    any worker can answer a scrape. Counters and histograms of exited workers
+    are kept, their gauges dropped.
+    """
+
+    def __init__(self, directory: str | None, flush_interval: float) -> None:
+        self.directory = Path(directory) if directory else None
+        self.flush_interval = flush_interval
+        self._lock = threading.Lock()
+        self._requests: dict[tuple[str, str, str], int] = {}
+        # per (route, method): a count per bucket, +Inf last, then the sum
+        self._durations: dict[tuple[str, str], list[float]] = {}
+        self._in_flight = 0
+        self._thread: threading.Thread | None = None
+        self._stop = threading.Event()
+
+    def start(self) -> None:
+        if self.directory is None or self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._flush_periodically, name="metrics-flush", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        """
+        Stop flushing and write the last snapshot.
+        """
+        thread, self._thread = self._thread, None
+        if thread is not None:
+            self._stop.set()
+            thread.join()
+        self.flush()
+
+    def _flush_periodically(self) -> None:
+        while not self._stop.wait(self.flush_interval):
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("Could not flush metrics")
+
+    def request_started(self) -> None:
+        with self._lock:
+            self._in_flight += 1
+
+    def request_finished(
+        self, route: str, method: str, status: int, seconds: float
+    ) -> None:
+        with self._lock:
+            self._in_flight -= 1
+            key = (route, method, str(status))
+            self._requests[key] = self._requests.get(key, 0) + 1
+            counts = self._durations.setdefault(
+                (route, method), [0.0] * (len(DURATION_BUCKETS) + 2)
+            )
+            # le buckets: the first bound >= seconds, or +Inf
+            counts[bisect.bisect_left(DURATION_BUCKETS, seconds)] += 1
+            counts[-1] += seconds
+
+    def snapshot(self) -> dict[str, Any]:
+        """
+        This process's metrics, JSON serializable.
+        """
+        with self._lock:
+            requests = [[*key, n] for key, n in self._requests.items()]
+            durations = [[*key, list(c)] for key, c in self._durations.items()]
+            in_flight = self._in_flight
+        counters, gauges = _process_values()
+        gauges.append(("http_requests_in_flight", (), in_flight))
+        return {
+            "pid": os.getpid(),
+            "requests": requests,
+            "durations": durations,
+            "counters": [[n, list(labels), v] for n, labels, v in counters],
+            "gauges": [[n, list(labels), v] for n, labels, v in gauges],
+        }
+
+    def flush(self, snapshot: dict[str, Any] | None = None) -> None:
+        if self.directory is None:
+            return
+        path = self.directory / f"{os.getpid()}.json"
+        tmp = path.with_suffix(".tmp")
+        try:
+            tmp.write_text(json.dumps(snapshot or self.snapshot()))
+            os.replace(tmp, path)
+        except OSError:
+            logger.exception("Could not write metrics to %s", path)
+
+    def _snapshots(self) -> list[tuple[dict[str, Any], bool]]:
+        """
+        Snapshots of all workers, with whether that worker is still running.
+        """
+        own = self.snapshot()
+        if self.directory is None:
+            return [(own, True)]
+        self.flush(own)
+        snapshots = [(own, True)]
+        for path in self.directory.glob("*.json"):
+            try:
+                snapshot = json.loads(path.read_text())
+            except (OSError, ValueError):
+                continue
+            if snapshot["pid"] != own["pid"]:
+                snapshots.append((snapshot, _is_running(snapshot["pid"])))
+        return snapshots
+
+    def render(self) -> str:
+        requests: dict[tuple[str, str, str], float] = {}
+        durations: dict[tuple[str, str], list[float]] = {}
+        values: dict[tuple[str, Labels], float] = {}
+        for snapshot, running in self._snapshots():
+            for route, method, status, n in snapshot["requests"]:
+                key = (route, method, status)
+                requests[key] = requests.get(key, 0) + n
+            for route, method, counts in snapshot["durations"]:
+                total = durations.setdefault((route, method), [0.0] * len(counts))
+                for i, count in enumerate(counts):
+                    total[i] += count
+            series = snapshot["counters"] + (snapshot["gauges"] if running else [])
+            for name, labels, value in series:
+                key = (name, tuple(tuple(pair) for pair in labels))
+                values[key] = values.get(key, 0) + value
+
+        lines: list[str] = []
+
+        def header(name: str) -> None:
+            kind, text = HELP[name]
+            lines.append(f"# HELP {name} {text}")
+            lines.append(f"# TYPE {name} {kind}")
+
+        header("http_requests_total")
+        for (route, method, status), n in sorted(requests.items()):
+            labels = _format_labels(
+                (("route", route), ("method", method), ("status", status))
+            )
+            lines.append(f"http_requests_total{labels} {_format_value(n)}")
+        name = "http_request_duration_seconds"
+        header(name)
+        for (route, method), counts in sorted(durations.items()):
+            base = (("route", route), ("method", method))
+            cumulative = 0.0
+            for bound, count in zip(
+                (*DURATION_BUCKETS, "+Inf"), counts[:-1], strict=True
+            ):
+                cumulative += count
+                labels = _format_labels((*base, ("le", str(bound))))
+                lines.append(f"{name}_bucket{labels} {_format_value(cumulative)}")
+            labels = _format_labels(base)
+            lines.append(f"{name}_sum{labels} {_format_value(counts[-1])}")
+            lines.append(f"{name}_count{labels} {_format_value(cumulative)}")
+        for metric in HELP:
+            samples = sorted((k[1], v) for k, v in values.items() if k[0] == metric)
+            if not samples:
+                continue
+            header(metric)
+            for labels, value in samples:
+                lines.append(f"{metric}{_format_labels(labels)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+def _is_running(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+metrics = Metrics(
+    directory=settings.METRICS_DIR, flush_interval=settings.METRICS_FLUSH_SECONDS
+)
@@ -0,0 +1,321 @@
+import heapq
+import itertools
+import logging
+import smtplib
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(order=True)
+class OutboxMessage:
+    # heap order: the earliest due first, then in the order queued
+    due: float
+    seq: int
+    email_to: str = field(compare=False)
+    message: str = field(compare=False)
+    queued_at: float = field(compare=False)
+    attempts: int = field(default=0, compare=False)
+
+
+class EmailOutbox:
+    """
+    Queues emails and delivers them from background threads, per worker process
+    of the app, so a slow mail relay never holds up a request.
+
+    Each of the `connections` threads keeps its own SMTP connection open while
+    there is mail to send, sending up to `batch_size` queued messages over it in
+    a row, and closes it after `idle_seconds` without mail. A failed message is
+    retried after `retry_seconds`, doubling on every attempt, and dropped after
+    `max_attempts`.
+    """
+
+    def __init__(
+        self,
+        connections: int,
+        batch_size: int,
+        max_attempts: int,
+        retry_seconds: float,
+        idle_seconds: float,
+    ) -> None:
+        self.connections = connections
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.retry_seconds = retry_seconds
+        self.idle_seconds = idle_seconds
+        self._lock = threading.Lock()
+        self._changed = threading.Condition(self._lock)
+        self._queue: list[OutboxMessage] = []
+        self._seq = itertools.count()
+        self._threads: list[threading.Thread] = []
+        self._closing = False
+        # bumped by shutdown: threads of an earlier generation exit when idle
+        self._generation = 0
+        self.queued = 0
+        self.sending = 0
+        self.sent = 0
+        self.retried = 0
+        self.failed = 0
+        self.connects = 0
+        self.last_lag_seconds = 0.0
+        self.max_lag_seconds = 0.0
+
+    def send(self, *, email_to: str, message: str) -> None:
+        """
+        Queue `message`, a complete RFC 5322 message, for `email_to`.
+        """
+        now = time.monotonic()
+        with self._lock:
+            heapq.heappush(
+                self._queue,
+                OutboxMessage(
+                    due=now,
+                    seq=next(self._seq),
+                    email_to=email_to,
+                    message=message,
+                    queued_at=now,
+                ),
+            )
+            self.queued += 1
+            if len(self._threads) < self.connections:
+                self._start_thread()
+            self._changed.notify()
+
+    def _start_thread(self) -> None:
+        # with the lock held
+        thread = threading.Thread(
+            target=self._worker,
+            args=(self._generation,),
+            name="email-outbox",
+            daemon=True,
+        )
+        self._threads.append(thread)
+        thread.start()
+
+    def _take(self, generation: int) -> list[OutboxMessage] | None:
+        """
+        The next batch of due messages, [] after `idle_seconds` without any,
+        None when there are none and the thread should stop.
+        """
+        deadline = time.monotonic() + self.idle_seconds
+        with self._lock:
+            while True:
+                now = time.monotonic()
+                if self._queue and self._queue[0].due <= now:
+                    batch: list[OutboxMessage] = []
+                    while (
+                        self._queue
+                        and self._queue[0].due <= now
+                        and len(batch) < self.batch_size
+                    ):
+                        batch.append(heapq.heappop(self._queue))
+                    self.sending += len(batch)
+                    return batch
+                if self._closing or generation != self._generation:
+                    return None
+                if now >= deadline:
+                    return []
+                wait = deadline - now
+                if self._queue:
+                    wait = min(wait, self._queue[0].due - now)
+                self._changed.wait(wait)
+
+    def _worker(self, generation: int) -> None:
+        smtp: smtplib.SMTP | None = None
+        batch: list[OutboxMessage] | None = []
+        try:
+            while (batch := self._take(generation)) is not None:
+                if not batch:
+                    self._close(smtp)
+                    smtp = None
+                    continue
+                while batch:
+                    smtp = self._deliver(smtp, batch[0])
+                    batch.pop(0)
+        except Exception as e:
+            logger.exception("Email outbox thread failed")
+            if batch:
+                # counts as an attempt, so a message that keeps failing is dropped
+                self._failed(batch.pop(0), e, permanent=False)
+        finally:
+            self._close(smtp)
+            with self._lock:
+                # leave room for a new thread, and hand it what was left over
+                if threading.current_thread() in self._threads:
+                    self._threads.remove(threading.current_thread())
+                for item in batch or ():
+                    self.sending -= 1
+                    heapq.heappush(self._queue, item)
+                if (
+                    self._queue
+                    and not self._closing
+                    and generation == self._generation
+                    and len(self._threads) < self.connections
+                ):
+                    self._start_thread()
+
+    def _deliver(
+        self, smtp: smtplib.SMTP | None, item: OutboxMessage
+    ) -> smtplib.SMTP | None:
+        try:
+            if smtp is None:
+                smtp = self._connect()
+            sender = settings.EMAILS_FROM_EMAIL
+            assert sender is not None  # the outbox only runs with emails enabled
+            try:
+                smtp.sendmail(sender, [item.email_to], item.message)
+            except smtplib.SMTPServerDisconnected:
+                # the relay closed an idle connection, reconnect once
+                self._close(smtp)
+                smtp = self._connect()
+                smtp.sendmail(sender, [item.email_to], item.message)
+        except (OSError, smtplib.SMTPException) as e:
+            self._failed(item, e, permanent=_is_permanent(e))
+            # a message the relay answered leaves the connection usable, anything
+            # else starts over with a new one
+            if not isinstance(
+                e, smtplib.SMTPRecipientsRefused | smtplib.SMTPResponseException
+            ):
+                self._close(smtp)
+                smtp = None
+            return smtp
+        lag = time.monotonic() - item.queued_at
+        with self._lock:
+            self.sending -= 1
+            self.queued -= 1
+            self.sent += 1
+            self.last_lag_seconds = lag
+            self.max_lag_seconds = max(self.max_lag_seconds, lag)
+            self._changed.notify_all()
+        return smtp
+
+    def _failed(
+        self, item: OutboxMessage, error: Exception, *, permanent: bool
+    ) -> None:
+        item.attempts += 1
+        with self._lock:
+            self.sending -= 1
+            if permanent or item.attempts >= self.max_attempts or self._closing:
+                self.queued -= 1
+                self.failed += 1
+                logger.error(
+                    "Giving up on email to %s after %s attempts: %s",
+                    item.email_to,
+                    item.attempts,
+                    error,
+                )
+            else:
+                self.retried += 1
+                delay = self.retry_seconds * 2 ** (item.attempts - 1)
+                item.due = time.monotonic() + delay
+                heapq.heappush(self._queue, item)
+                logger.warning(
+                    "Email to %s failed, retrying in %.1fs: %s",
+                    item.email_to,
+                    delay,
+                    error,
+                )
+            self._changed.notify_all()
+
+    def _connect(self) -> smtplib.SMTP:
+        assert settings.SMTP_HOST, "no provided configuration for email variables"
+        smtp_class = smtplib.SMTP_SSL if settings.SMTP_SSL else smtplib.SMTP
+        smtp = smtp_class(
+            settings.SMTP_HOST,
+            settings.SMTP_PORT,
+            timeout=settings.SMTP_TIMEOUT_SECONDS,
+        )
+        try:
+            if settings.SMTP_TLS and not settings.SMTP_SSL:
+                smtp.starttls()
+            if settings.SMTP_USER:
+                smtp.login(settings.SMTP_USER, settings.SMTP_PASSWORD or "")
+        except BaseException:
+            smtp.close()
+            raise
+        with self._lock:
+            self.connects += 1
+        return smtp
+
+    def _close(self, smtp: smtplib.SMTP | None) -> None:
+        if smtp is not None:
+            try:
+                smtp.quit()
+            except (OSError, smtplib.SMTPException):
+                smtp.close()
+
+    def flush(self, timeout: float) -> bool:
+        """
+        Wait until no message is queued. False if some still are after `timeout`.
+        """
+        deadline = time.monotonic() + timeout
+        with self._lock:
+            while self.queued:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._changed.wait(remaining)
+            return True
+
+    def shutdown(self, timeout: float = 5.0) -> None:
+        """
+        Deliver the messages that are due and stop the threads, messages waiting
+        for a retry are dropped. `send` starts new threads afterwards.
+        """
+        with self._lock:
+            self._closing = True
+            self._generation += 1
+            threads, self._threads = self._threads, []
+            self._changed.notify_all()
+        deadline = time.monotonic() + timeout
+        for thread in threads:
+            thread.join(max(0.0, deadline - time.monotonic()))
+        with self._lock:
+            if self._queue:
+                logger.warning("Dropping %s queued emails", len(self._queue))
+                self.failed += len(self._queue)
+                self.queued -= len(self._queue)
+                self._queue.clear()
+            self._closing = False
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            now = time.monotonic()
+            oldest = min((m.queued_at for m in self._queue), default=now)
+            return {
+                "connections": self.connections,
+                "threads": len(self._threads),
+                "queued": self.queued,
+                "sending": self.sending,
+                "sent": self.sent,
+                "retried": self.retried,
+                "failed": self.failed,
+                "connects": self.connects,
+                # how long the oldest message not yet sent has waited
+                "lag_seconds": round(now - oldest, 3),
+                "last_lag_seconds": round(self.last_lag_seconds, 3),
+                "max_lag_seconds": round(self.max_lag_seconds, 3),
+            }
+
+
+def _is_permanent(error: Exception) -> bool:
+    # 5xx replies will not change on a retry, 4xx and network errors might
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        return all(code >= 500 for code, _ in error.recipients.values())
+    if isinstance(error, smtplib.SMTPResponseException):
+        return error.smtp_code >= 500
+    return False
+
+
+email_outbox = EmailOutbox(
+    connections=settings.SMTP_CONNECTIONS,
+    batch_size=settings.EMAIL_BATCH_SIZE,
+    max_attempts=settings.EMAIL_MAX_ATTEMPTS,
+    retry_seconds=settings.EMAIL_RETRY_SECONDS,
+    idle_seconds=settings.SMTP_IDLE_SECONDS,
+)
@@ -0,0 +1,107 @@
+import threading
+import time
+from typing import Any
+
+from sqlalchemy import exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+# Upper bounds, in milliseconds, of the checkout latency histogram buckets
+CHECKOUT_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+
+class PoolMetrics:
+    """
+    Checkout wait times of one connection pool, for this worker process.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.buckets = [0] * (len(CHECKOUT_BUCKETS_MS) + 1)
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+
+    def observe(self, seconds: float, *, timed_out: bool = False) -> None:
+        ms = seconds * 1000
+        index = next(
+            (i for i, bound in enumerate(CHECKOUT_BUCKETS_MS) if ms <= bound),
+            len(CHECKOUT_BUCKETS_MS),
+        )
+        with self._lock:
+            self.buckets[index] += 1
+            self.wait_seconds_total += seconds
+            self.wait_seconds_max = max(self.wait_seconds_max, seconds)
+            if timed_out:
+                self.timeouts += 1
+            else:
+                self.checkouts += 1
+
+    def histogram(self) -> dict[str, int]:
+        """
+        Cumulative counts keyed by bucket upper bound, Prometheus style.
+        """
+        with self._lock:
+            buckets = list(self.buckets)
+        histogram = {}
+        running = 0
+        for bound, count in zip(CHECKOUT_BUCKETS_MS, buckets[:-1], strict=True):
+            running += count
+            histogram[str(bound)] = running
+        histogram["+Inf"] = running + buckets[-1]
+        return histogram
+
+
+class _TimedPoolMixin:
+    """
+    Time every checkout, including the time spent queued for a free connection.
+
+    SQLAlchemy has no event that fires before a checkout starts waiting, so
+    the pool's own `_do_get` is wrapped instead.
+    """
+
+    metrics: PoolMetrics
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self.metrics = PoolMetrics()
+
+    def _do_get(self) -> Any:
+        start = time.perf_counter()
+        try:
+            connection = super()._do_get()  # type: ignore[misc]
+        except exc.TimeoutError:
+            self.metrics.observe(time.perf_counter() - start, timed_out=True)
+            raise
+        self.metrics.observe(time.perf_counter() - start)
+        return connection
+
+    def recreate(self) -> Any:
+        # engine.dispose() swaps in a fresh pool, keep counting into the same one
+        pool = super().recreate()  # type: ignore[misc]
+        pool.metrics = self.metrics
+        return pool
+
+
+class TimedQueuePool(_TimedPoolMixin, QueuePool):
+    pass
+
+
+class TimedAsyncAdaptedQueuePool(_TimedPoolMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+def pool_stats(name: str, pool: Any) -> dict[str, Any]:
+    metrics: PoolMetrics = pool.metrics
+    return {
+        "name": name,
+        "size": pool.size(),
+        "checked_out": pool.checkedout(),
+        "checked_in": pool.checkedin(),
+        "overflow": max(pool.overflow(), 0),
+        "checkouts": metrics.checkouts,
+        "timeouts": metrics.timeouts,
+        "wait_seconds_total": round(metrics.wait_seconds_total, 6),
+        "wait_seconds_max": round(metrics.wait_seconds_max, 6),
+        "checkout_latency_ms": metrics.histogram(),
+    }
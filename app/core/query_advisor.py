@@ -0,0 +1,164 @@
+import json
+import logging
+import threading
+import time
+from collections import deque
+from collections.abc import Iterator
+from typing import Any
+
+from sqlalchemy import event
+from sqlalchemy.engine import Connection, Engine
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+_STARTS = "query_advisor_starts"
+
+
+def _seq_scans(plan: dict[str, Any]) -> Iterator[str]:
+    if plan.get("Node Type") == "Seq Scan":
+        yield plan["Relation Name"]
+    for child in plan.get("Plans", ()):
+        yield from _seq_scans(child)
+
+
+class QueryAdvisor:
+    """
+    Development aid: EXPLAINs the SELECTs slower than `threshold_ms` and warns
+    about sequential scans of tables estimated at `min_rows` rows or more.
+
+    Runs an extra EXPLAIN (and a savepoint around it) after each slow query, so
+    it is only installed outside production, see `install_query_advisor`.
+    """
+
+    def __init__(self, threshold_ms: float, min_rows: int, keep: int = 100) -> None:
+        self.threshold_ms = threshold_ms
+        self.min_rows = min_rows
+        self.explained = 0
+        self.flagged = 0
+        # the last `keep` slow queries that scanned a large table
+        self.findings: deque[dict[str, Any]] = deque(maxlen=keep)
+        self._table_rows: dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def install(self, engine: Engine) -> None:
+        event.listen(engine, "before_cursor_execute", self._before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", self._after_cursor_execute)
+
+    def _before_cursor_execute(self, conn: Connection, *args: Any) -> None:
+        conn.info.setdefault(_STARTS, []).append(time.perf_counter())
+
+    def _after_cursor_execute(
+        self,
+        conn: Connection,
+        cursor: Any,
+        statement: str,
+        parameters: Any,
+        context: Any,
+        executemany: bool,
+    ) -> None:
+        duration_ms = (time.perf_counter() - conn.info[_STARTS].pop()) * 1000
+        if (
+            duration_ms < self.threshold_ms
+            or executemany
+            or not statement.lstrip().upper().startswith(("SELECT", "WITH"))
+        ):
+            return
+        dbapi_connection = conn.connection.dbapi_connection
+        if dbapi_connection is None:
+            return
+        try:
+            self.check(dbapi_connection, statement, parameters, duration_ms)
+        except Exception:
+            logger.exception("Could not EXPLAIN %s", statement)
+
+    def check(
+        self,
+        dbapi_connection: Any,
+        statement: str,
+        parameters: Any,
+        duration_ms: float,
+    ) -> dict[str, Any] | None:
+        """
+        EXPLAIN `statement` and record it if it scans a large table.
+        """
+        cursor = dbapi_connection.cursor()
+        try:
+            # an error would otherwise abort the application's transaction
+            cursor.execute("SAVEPOINT query_advisor")
+            try:
+                cursor.execute(f"EXPLAIN (FORMAT JSON) {statement}", parameters)
+                plan = cursor.fetchone()[0]
+                if isinstance(plan, str):
+                    plan = json.loads(plan)
+                plan = plan[0]["Plan"]
+                large = {}
+                for table in set(_seq_scans(plan)):
+                    rows = self._rows(cursor, table)
+                    if rows >= self.min_rows:
+                        large[table] = rows
+            except Exception:
+                cursor.execute("ROLLBACK TO SAVEPOINT query_advisor")
+                raise
+            cursor.execute("RELEASE SAVEPOINT query_advisor")
+        finally:
+            cursor.close()
+        with self._lock:
+            self.explained += 1
+            if not large:
+                return None
+            self.flagged += 1
+            finding = {
+                "statement": statement,
+                "duration_ms": round(duration_ms, 3),
+                "seq_scans": large,
+                "total_cost": plan.get("Total Cost"),
+            }
+            self.findings.append(finding)
+        logger.warning(
+            "Sequential scan of %s in a %.1f ms query: %s",
+            ", ".join(f"{t} (~{n} rows)" for t, n in large.items()),
+            duration_ms,
+            statement,
+        )
+        return finding
+
+    def _rows(self, cursor: Any, table: str) -> int:
+        # planner estimate, cached: table sizes barely move during a dev session
+        if table not in self._table_rows:
+            cursor.execute(
+                "SELECT reltuples FROM pg_class WHERE oid = to_regclass(%s)",
+                (f'"{table}"',),
+            )
+            row = cursor.fetchone()
+            self._table_rows[table] = int(row[0]) if row and row[0] > 0 else 0
+        return self._table_rows[table]
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "threshold_ms": self.threshold_ms,
+                "min_rows": self.min_rows,
+                "explained": self.explained,
+                "flagged": self.flagged,
+                "findings": list(self.findings),
+            }
+
+
+query_advisor: QueryAdvisor | None = None
+
+
+def install_query_advisor(*engines: Engine) -> QueryAdvisor | None:
+    """
+    Install the advisor on `engines` when QUERY_ADVISOR_THRESHOLD_MS is set,
+    never in production.
+    """
+    global query_advisor
+    threshold = settings.QUERY_ADVISOR_THRESHOLD_MS
+    if threshold is None or settings.ENVIRONMENT == "production":
+        return None
+    query_advisor = QueryAdvisor(threshold, settings.QUERY_ADVISOR_MIN_ROWS)
+    for engine in engines:
+        query_advisor.install(engine)
+    return query_advisor
@@ -0,0 +1,120 @@
+import re
+import threading
+import time
+from collections import Counter
+from contextvars import ContextVar
+from typing import Any
+
+from sqlalchemy import event
+from sqlalchemy.engine import Connection, Engine
+
+_STARTS = "query_stats_starts"
+
+# "IN (%(id_1_1)s, %(id_1_2)s, ...)" has one shape whatever the number of values
+_EXPANDED_PARAMETERS = re.compile(r"%\(\w+\)s(?:, %\(\w+\)s)+")
+
+
+def statement_shape(statement: str) -> str:
+    return " ".join(_EXPANDED_PARAMETERS.sub("...", statement).split())
+
+
+class RequestQueries:
+    """
+    The SQL statements run on behalf of one request.
+    """
+
+    __slots__ = ("count", "seconds", "shapes")
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.seconds = 0.0
+        self.shapes: Counter[str] = Counter()
+
+    def record(self, statement: str, seconds: float) -> None:
+        self.count += 1
+        self.seconds += seconds
+        self.shapes[statement_shape(statement)] += 1
+
+    @property
+    def max_repeats(self) -> int:
+        """
+        How many times the most repeated statement shape ran, an N+1 shows up as
+        a shape repeated once per parent row.
+        """
+        return max(self.shapes.values(), default=0)
+
+    def repeated(self, threshold: int) -> list[tuple[str, int]]:
+        return [(s, n) for s, n in self.shapes.most_common() if n >= threshold]
+
+
+# Set for the duration of a request by QueryStatsMiddleware, copied into the
+# threads sync endpoints run in
+current_queries: ContextVar[RequestQueries | None] = ContextVar(
+    "current_queries", default=None
+)
+
+
+def _before_cursor_execute(conn: Connection, *args: Any) -> None:
+    if current_queries.get() is not None:
+        conn.info.setdefault(_STARTS, []).append(time.perf_counter())
+
+
+def _after_cursor_execute(
+    conn: Connection, cursor: Any, statement: str, *args: Any
+) -> None:
+    queries = current_queries.get()
+    if queries is not None and (starts := conn.info.get(_STARTS)):
+        queries.record(statement, time.perf_counter() - starts.pop())
+
+
+def install_query_stats(*engines: Engine) -> None:
+    for engine in engines:
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+class RouteQueryStats:
+    """
+    Per-worker totals of the queries run by each route.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._routes: dict[str, dict[str, Any]] = {}
+
+    def record(self, route: str, queries: RequestQueries, n_plus_one: bool) -> None:
+        with self._lock:
+            stats = self._routes.setdefault(
+                route,
+                {
+                    "route": route,
+                    "requests": 0,
+                    "queries": 0,
+                    "db_seconds": 0.0,
+                    "max_queries": 0,
+                    "n_plus_one": 0,
+                },
+            )
+            stats["requests"] += 1
+            stats["queries"] += queries.count
+            stats["db_seconds"] += queries.seconds
+            stats["max_queries"] = max(stats["max_queries"], queries.count)
+            stats["n_plus_one"] += n_plus_one
+
+    def stats(self) -> list[dict[str, Any]]:
+        """
+        Routes by total time spent in the database, highest first.
+        """
+        with self._lock:
+            routes = [
+                dict(s, db_seconds=round(s["db_seconds"], 6))
+                for s in self._routes.values()
+            ]
+        return sorted(routes, key=lambda s: s["db_seconds"], reverse=True)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._routes.clear()
+
+
+route_query_stats = RouteQueryStats()
@@ -0,0 +1,294 @@
+import logging
+import os
+import shutil
+import tempfile
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections.abc import Iterator
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import IO, TYPE_CHECKING, Any
+
+from app.core.config import settings
+
+if TYPE_CHECKING:
+    from azure.core.credentials import AzureSasCredential
+    from azure.storage.blob import BlobServiceClient
+
+logger = logging.getLogger(__name__)
+
+# A SAS is regenerated when it has less than this left, so that an upload that
+# started with it cannot outlive it
+SAS_REFRESH_MARGIN = timedelta(minutes=5)
+
+# Default root of the local driver, the `files/` directory next to `app/`
+LOCAL_FILES_ROOT = Path(__file__).resolve().parents[2] / "files"
+
+# Bytes read at a time when copying or streaming a local file
+CHUNK_SIZE = 64 * 1024
+
+
+@dataclass
+class UploadResult:
+    name: str
+    size: int
+    seconds: float
+
+    @property
+    def mb_per_s(self) -> float:
+        return round(self.size / 1_000_000 / self.seconds, 2) if self.seconds else 0.0
+
+
+@dataclass
+class StoredFile:
+    name: str
+    size: int
+    # quoted, as sent in the ETag header
+    etag: str
+    last_modified: datetime
+    # set when the file is on local disk, so the server can send it itself
+    path: Path | None = None
+
+
+class StorageBackend(ABC):
+    """
+    Where room files are kept. Drivers implement `_write`, `stat` and `read`;
+    uploads are timed here so every driver reports the same throughput stats.
+    """
+
+    def __init__(self) -> None:
+        self._stats_lock = threading.Lock()
+        self.uploads = 0
+        self.bytes_uploaded = 0
+        self.upload_seconds_total = 0.0
+
+    @abstractmethod
+    def _write(self, name: str, data: IO[bytes], size: int) -> None:
+        ...
+
+    @abstractmethod
+    def stat(self, name: str) -> StoredFile | None:
+        """
+        Size and version of the file `name`, None if there is no such file.
+        """
+
+    @abstractmethod
+    def read(self, name: str, offset: int, length: int) -> Iterator[bytes]:
+        """
+        Yield `length` bytes of the file from `offset`, in bounded chunks.
+        """
+
+    def upload(self, name: str, data: IO[bytes]) -> UploadResult:
+        """
+        Store the seekable file `data` as `name`, blocking until done.
+
+        Raises ValueError for names the driver cannot store.
+        """
+        size = data.seek(0, os.SEEK_END)
+        data.seek(0)
+        start = time.perf_counter()
+        self._write(name, data, size)
+        result = UploadResult(name=name, size=size, seconds=time.perf_counter() - start)
+        with self._stats_lock:
+            self.uploads += 1
+            self.bytes_uploaded += result.size
+            self.upload_seconds_total += result.seconds
+        logger.info(
+            "Uploaded %s: %s bytes in %.3fs (%s MB/s)",
+            name,
+            result.size,
+            result.seconds,
+            result.mb_per_s,
+        )
+        return result
+
+    def stats(self) -> dict[str, Any]:
+        with self._stats_lock:
+            seconds = self.upload_seconds_total
+            return {
+                "uploads": self.uploads,
+                "bytes_uploaded": self.bytes_uploaded,
+                "upload_seconds_total": round(seconds, 6),
+                "mb_per_s": round(self.bytes_uploaded / 1_000_000 / seconds, 2)
+                if seconds
+                else 0.0,
+            }
+
+
+class LocalStorage(StorageBackend):
+    """
+    Files in a flat directory, for development and single-host deployments.
+    """
+
+    def __init__(self, root: Path = LOCAL_FILES_ROOT) -> None:
+        super().__init__()
+        self.root = root
+
+    def _path(self, name: str) -> Path:
+        # flat namespace, a name cannot reach outside of the root
+        if name in ("", ".", "..") or Path(name).name != name:
+            raise ValueError(f"Invalid file name: {name!r}")
+        return self.root / name
+
+    def _write(self, name: str, data: IO[bytes], size: int) -> None:
+        path = self._path(name)
+        # readers never see a partially written file
+        with tempfile.NamedTemporaryFile(dir=self.root, delete=False) as f:
+            try:
+                shutil.copyfileobj(data, f, CHUNK_SIZE)
+            except BaseException:
+                os.unlink(f.name)
+                raise
+        os.replace(f.name, path)
+
+    def stat(self, name: str) -> StoredFile | None:
+        try:
+            path = self._path(name)
+            stat_result = path.stat()
+        except (ValueError, FileNotFoundError):
+            return None
+        return StoredFile(
+            name=name,
+            size=stat_result.st_size,
+            etag=f'"{stat_result.st_mtime_ns:x}-{stat_result.st_size:x}"',
+            last_modified=datetime.fromtimestamp(stat_result.st_mtime, tz=timezone.utc),
+            path=path,
+        )
+
+    def read(self, name: str, offset: int, length: int) -> Iterator[bytes]:
+        with self._path(name).open("rb") as f:
+            f.seek(offset)
+            while length > 0:
+                chunk = f.read(min(CHUNK_SIZE, length))
+                if not chunk:
+                    break
+                length -= len(chunk)
+                yield chunk
+
+
+class AzureBlobStorage(StorageBackend):
+    """
+    Azure Blob Storage for one container, shared by the requests of a worker.
+
+    The SDK is imported, and the client and its SAS credential are created, on
+    first use and reused; the SAS is renewed in place shortly before it expires.
+    Files larger than `block_size` are uploaded as blocks staged
+    `max_concurrency` at a time, so at most `block_size * max_concurrency` bytes
+    of a file are buffered, and are downloaded one `block_size` chunk at a time.
+    """
+
+    def __init__(
+        self,
+        *,
+        account_name: str,
+        account_key: str,
+        container: str,
+        account_url: str | None = None,
+        sas_ttl: timedelta = timedelta(hours=1),
+        block_size: int = 4 * 1024 * 1024,
+        max_concurrency: int = 4,
+    ) -> None:
+        super().__init__()
+        self.account_name = account_name
+        self.account_key = account_key
+        self.container = container
+        self.account_url = (
+            account_url or f"https://{account_name}.blob.core.windows.net"
+        )
+        self.sas_ttl = sas_ttl
+        self.block_size = block_size
+        self.max_concurrency = max_concurrency
+        self._lock = threading.Lock()
+        self._client: "BlobServiceClient | None" = None
+        self._credential: "AzureSasCredential | None" = None
+        self._sas_expiry = datetime.min.replace(tzinfo=timezone.utc)
+
+    def _generate_sas(self, expiry: datetime) -> str:
+        from azure.storage.blob import (
+            AccountSasPermissions,
+            ResourceTypes,
+            generate_account_sas,
+        )
+
+        return generate_account_sas(
+            account_name=self.account_name,
+            account_key=self.account_key,
+            resource_types=ResourceTypes(container=True, object=True),
+            permission=AccountSasPermissions(read=True, write=True, create=True),
+            expiry=expiry,
+        )
+
+    def get_client(self) -> "BlobServiceClient":
+        from azure.core.credentials import AzureSasCredential
+        from azure.storage.blob import BlobServiceClient
+
+        with self._lock:
+            now = datetime.now(timezone.utc)
+            if self._sas_expiry - now < SAS_REFRESH_MARGIN:
+                self._sas_expiry = now + self.sas_ttl
+                sas = self._generate_sas(self._sas_expiry)
+                if self._credential is None:
+                    self._credential = AzureSasCredential(sas)
+                else:
+                    # requests read the signature from the shared credential
+                    self._credential.update(sas)
+            if self._client is None:
+                self._client = BlobServiceClient(
+                    account_url=self.account_url,
+                    credential=self._credential,
+                    max_block_size=self.block_size,
+                    max_single_put_size=self.block_size,
+                    max_single_get_size=self.block_size,
+                    max_chunk_get_size=self.block_size,
+                )
+            return self._client
+
+    def _blob(self, name: str) -> Any:
+        return self.get_client().get_blob_client(container=self.container, blob=name)
+
+    def _write(self, name: str, data: IO[bytes], size: int) -> None:
+        self._blob(name).upload_blob(
+            data, length=size, max_concurrency=self.max_concurrency
+        )
+
+    def stat(self, name: str) -> StoredFile | None:
+        from azure.core.exceptions import ResourceNotFoundError
+
+        try:
+            properties = self._blob(name).get_blob_properties()
+        except ResourceNotFoundError:
+            return None
+        etag = properties.etag
+        return StoredFile(
+            name=name,
+            size=properties.size,
+            etag=etag if etag.startswith('"') else f'"{etag}"',
+            last_modified=properties.last_modified,
+        )
+
+    def read(self, name: str, offset: int, length: int) -> Iterator[bytes]:
+        if length <= 0:
+            return
+        # a generator, so that nothing is requested before the first chunk is
+        downloader = self._blob(name).download_blob(offset=offset, length=length)
+        yield from downloader.chunks()
+
+
+def _create_storage() -> StorageBackend:
+    if settings.STORAGE_BACKEND == "local":
+        root = settings.STORAGE_LOCAL_ROOT
+        return LocalStorage(Path(root) if root else LOCAL_FILES_ROOT)
+    return AzureBlobStorage(
+        account_name=settings.AZURE_ACCOUNT_NAME,
+        account_key=settings.AZURE_ACCOUNT_KEY,
+        container=settings.AZURE_CONTAINER_NAME,
+        account_url=settings.AZURE_ACCOUNT_URL,
+        sas_ttl=timedelta(seconds=settings.AZURE_SAS_TTL_SECONDS),
+        block_size=settings.AZURE_UPLOAD_BLOCK_SIZE,
+        max_concurrency=settings.AZURE_UPLOAD_CONCURRENCY,
+    )
+
+
+storage = _create_storage()
@@ -0,0 +1,36 @@
+from typing import NamedTuple
+
+from app.core.cache import LRUCache, invalidate_rows_on_commit
+from app.core.config import settings
+from app.models import User
+
+
+class CachedUser(NamedTuple):
+    """
+    The columns of an authenticated user needed to authorize a request and to
+    serialize it as UserOut, without the password hash.
+    """
+
+    id: int
+    email: str
+    is_active: bool
+    is_superuser: bool
+    full_name: str | None
+
+    @classmethod
+    def from_user(cls, user: User) -> "CachedUser":
+        return cls(
+            id=user.id,  # type: ignore[arg-type]
+            email=user.email,
+            is_active=user.is_active,
+            is_superuser=user.is_superuser,
+            full_name=user.full_name,
+        )
+
+
+# Authenticated users by token subject
+user_cache: LRUCache[int, CachedUser] = LRUCache(
+    ttl=settings.USER_CACHE_TTL_SECONDS, maxsize=settings.USER_CACHE_MAXSIZE
+)
+
+invalidate_rows_on_commit(user_cache, User, name="user")
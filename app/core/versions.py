@@ -0,0 +1,54 @@
+from collections.abc import Iterator
+from typing import Any
+
+from sqlalchemy import event, inspect, update
+from sqlalchemy.orm import Mapper, Session
+from sqlmodel import col
+
+from app.models import Badge, Profile, Room, Section
+
+VERSIONED = (Room, Badge, Profile)
+
+
+def _bump_version(mapper: Mapper[Any], connection: Any, target: Any) -> None:
+    # before_update also sees objects without net changes, those keep their version
+    if inspect(target).session.is_modified(target, include_collections=False):
+        # in SQL, so that concurrent updates each count
+        target.version = type(target).version + 1
+
+
+def _section_room_ids(session: Session) -> Iterator[int]:
+    changed = [obj for obj in session.dirty if session.is_modified(obj)]
+    for obj in (*session.new, *changed, *session.deleted):
+        if not isinstance(obj, Section):
+            continue
+        if obj.room_id is not None:
+            yield obj.room_id
+        # the room a section moved out of
+        yield from inspect(obj).attrs.room_id.history.deleted or ()
+
+
+def _bump_room_versions(session: Session, *args: Any) -> None:
+    # RoomOut embeds the room's sections
+    room_ids = set(_section_room_ids(session))
+    if room_ids:
+        session.connection().execute(
+            update(Room)
+            .where(col(Room.id).in_(room_ids))
+            .values(version=Room.version + 1)
+        )
+
+
+def install_versioning() -> None:
+    """
+    Bump `version` on every ORM update of a versioned model, and a room's when
+    its sections are added, changed or deleted.
+
+    Writes through Core (INSERT ... RETURNING, COPY) only create rows, which
+    start at version 1.
+    """
+    for model in VERSIONED:
+        if not event.contains(model, "before_update", _bump_version):
+            event.listen(model, "before_update", _bump_version)
+    if not event.contains(Session, "before_flush", _bump_room_versions):
+        event.listen(Session, "before_flush", _bump_room_versions)
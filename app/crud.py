@@ -1,8 +1,13 @@
 from typing import Any
+from uuid import uuid4
 
+from sqlalchemy import insert
 from sqlmodel import Session, select
 
-from app.core.security import get_password_hash, verify_password
+# importing app.core.answers also keeps Question.answer_hash up to date
+from app.core.answers import hash_answer
+from app.core.counts import mark_written
+from app.core.hashing import password_hasher
 from app.models import (
     Item,
     ItemCreate,
@@ -19,12 +24,15 @@ from app.models import (
     Question,
     QuestionCreate,
     QuestionUpdate,
+    Room,
+    RoomImport,
 )
 
 
 def create_user(*, session: Session, user_create: UserCreate) -> User:
     db_obj = User.model_validate(
-        user_create, update={"hashed_password": get_password_hash(user_create.password)}
+        user_create,
+        update={"hashed_password": password_hasher.hash(user_create.password)},
     )
     session.add(db_obj)
     session.commit()
@@ -32,7 +40,7 @@ def create_user(*, session: Session, user_create: UserCreate) -> User:
 
     create_profile(
         session=session,
-        profile_create=ProfileCreate(full_name=db_obj.full_name),
+        profile_create=ProfileCreate(full_name=db_obj.full_name or ""),
         user_id=db_obj.id,
     )
     return db_obj
@@ -43,7 +51,7 @@ def update_user(*, session: Session, db_user: User, user_in: UserUpdate) -> Any:
     extra_data = {}
     if "password" in user_data:
         password = user_data["password"]
-        hashed_password = get_password_hash(password)
+        hashed_password = password_hasher.hash(password)
         extra_data["hashed_password"] = hashed_password
     db_user.sqlmodel_update(user_data, update=extra_data)
     session.add(db_user)
@@ -62,7 +70,7 @@ def authenticate(*, session: Session, email: str, password: str) -> User | None:
     db_user = get_user_by_email(session=session, email=email)
     if not db_user:
         return None
-    if not verify_password(password, db_user.hashed_password):
+    if not password_hasher.verify(password, db_user.hashed_password):
         return None
     return db_user
 
@@ -90,6 +98,62 @@ def create_profile(
     return db_profile
 
 
+def import_users(*, session: Session, users_in: list[UserCreate]) -> dict[str, int]:
+    """
+    Create users with their profiles, skipping emails that already exist.
+
+    Passwords are hashed in parallel in the password hasher pool. Rows are
+    loaded with COPY into a staging table and moved with INSERT ... ON CONFLICT
+    DO NOTHING, so an email taken meanwhile skips its row instead of failing
+    the batch. Returns the ids of the created users by email.
+    """
+    hashed_passwords = password_hasher.hash_many([u.password for u in users_in])
+    profile_columns = list(ProfileCreate.model_fields)
+    full_names: dict[str, str | None] = {}
+    for user_in in users_in:
+        # the first row of an email is the one inserted
+        full_names.setdefault(user_in.email, user_in.full_name)
+    connection = session.connection().connection.driver_connection
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "CREATE TEMP TABLE user_import (position int, email varchar, "
+            "hashed_password varchar, full_name varchar, is_active boolean, "
+            "is_superuser boolean) ON COMMIT DROP"
+        )
+        with cursor.copy("COPY user_import FROM STDIN") as copy:
+            for position, (user_in, hashed_password) in enumerate(
+                zip(users_in, hashed_passwords, strict=True)
+            ):
+                copy.write_row(
+                    (
+                        position,
+                        user_in.email,
+                        hashed_password,
+                        user_in.full_name,
+                        user_in.is_active,
+                        user_in.is_superuser,
+                    )
+                )
+        cursor.execute(
+            'INSERT INTO "user" '
+            "(email, hashed_password, full_name, is_active, is_superuser) "
+            "SELECT email, hashed_password, full_name, is_active, is_superuser "
+            "FROM user_import ORDER BY position "
+            "ON CONFLICT (email) DO NOTHING RETURNING id, email"
+        )
+        created = {email: id for id, email in cursor.fetchall()}
+        with cursor.copy(
+            f"COPY profile (id, user_id, {', '.join(profile_columns)}) FROM STDIN"
+        ) as copy:
+            for email, user_id in created.items():
+                profile = ProfileCreate(full_name=full_names[email] or "")
+                values = [getattr(profile, column) for column in profile_columns]
+                copy.write_row((uuid4(), user_id, *values))
+    mark_written(session, "user", "profile")
+    session.commit()
+    return created
+
+
 def create_section(*, session: Session, section_in: SectionCreate) -> Section:
     db_section = Section.model_validate(section_in)
     session.add(db_section)
@@ -109,7 +173,7 @@ def update_section(
     db_section = get_section_by_id(session=session, section_id=section_id)
     if not db_section:
         return None
-    db_section.sqlmodel_update(section_in)
+    db_section.sqlmodel_update(section_in.model_dump(exclude_unset=True))
     session.add(db_section)
     session.commit()
     session.refresh(db_section)
@@ -124,13 +188,15 @@ def delete_section(*, session: Session, section_id: int) -> None:
     return None
 
 
-def get_badge_by_name(*, session: Session, name: str) -> Badge | None:
-    statement = select(Badge).where(Badge.name == name)
+def get_badge_by_title(*, session: Session, title: str) -> Badge | None:
+    statement = select(Badge).where(Badge.title == title)
     return session.exec(statement).first()
 
 
-def create_badge(*, session: Session, badge_create: BadgeCreate) -> Badge:
-    db_badge = Badge.model_validate(badge_create)
+def create_badge(
+    *, session: Session, badge_create: BadgeCreate, owner_id: int
+) -> Badge:
+    db_badge = Badge.model_validate(badge_create, update={"owner_id": owner_id})
     session.add(db_badge)
     session.commit()
     session.refresh(db_badge)
@@ -146,13 +212,12 @@ def update_badge(*, session: Session, db_badge: Badge, badge_in: BadgeCreate) ->
     return db_badge
 
 
-def get_question_by_name(*, session: Session, name: str) -> Question | None:
-    statement = select(Question).where(Question.name == name)
-    return session.exec(statement).first()
-
-
-def create_question(*, session: Session, question_in: QuestionCreate) -> Question:
-    db_question = Question.model_validate(question_in)
+def create_question(
+    *, session: Session, question_in: QuestionCreate, section_id: int
+) -> Question:
+    db_question = Question.model_validate(
+        question_in, update={"section_id": section_id}
+    )
     session.add(db_question)
     session.commit()
     session.refresh(db_question)
@@ -176,3 +241,52 @@ def delete_question(*, session: Session, question_id: int) -> None:
     session.delete(db_question)
     session.commit()
     return None
+
+
+def import_rooms(
+    *, session: Session, rooms_in: list[RoomImport], owner_id: int
+) -> tuple[list[int], int, int]:
+    """
+    Create rooms with their sections and questions in one transaction.
+
+    One multi-row INSERT ... RETURNING per table instead of a flush per object.
+    Returns the room ids in input order, and the number of sections and
+    questions created.
+    """
+    room_ids = session.scalars(
+        insert(Room).returning(Room.id, sort_by_parameter_order=True),
+        [
+            room_in.model_dump(exclude={"sections"}) | {"owner_id": owner_id}
+            for room_in in rooms_in
+        ],
+    ).all()
+    sections_in = [
+        (room_id, section_in)
+        for room_id, room_in in zip(room_ids, rooms_in, strict=True)
+        for section_in in room_in.sections
+    ]
+    section_ids: list[int] = []
+    if sections_in:
+        section_ids = list(
+            session.scalars(
+                insert(Section).returning(Section.id, sort_by_parameter_order=True),
+                [
+                    section_in.model_dump(exclude={"questions"}) | {"room_id": room_id}
+                    for room_id, section_in in sections_in
+                ],
+            )
+        )
+    questions = [
+        # bulk inserts skip mapper events, hash the answers here
+        question_in.model_dump()
+        | {
+            "section_id": section_id,
+            "answer_hash": hash_answer(question_in.answer_type, question_in.answer),
+        }
+        for section_id, (_, section_in) in zip(section_ids, sections_in, strict=True)
+        for question_in in section_in.questions
+    ]
+    if questions:
+        session.execute(insert(Question), questions)
+    session.commit()
+    return list(room_ids), len(section_ids), len(questions)
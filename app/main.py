@@ -1,20 +1,54 @@
+from collections.abc import AsyncGenerator
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.openapi.utils import get_openapi
 from fastapi.routing import APIRoute
 from starlette.middleware.cors import CORSMiddleware
 
 from app.api.main import api_router
+from app.api.middleware import (
+    CompressionMiddleware,
+    MetricsMiddleware,
+    QueryStatsMiddleware,
+)
+from app.api.responses import default_response_class
+from app.api.routes import metrics
 from app.core.config import settings
+from app.core.db import async_engine
+from app.core.hashing import password_hasher
+from app.core.invalidation import invalidation_bus
+from app.core.metrics import metrics as process_metrics
+from app.core.outbox import email_outbox
+from app.utils import warm_email_templates
 
 
 def custom_generate_unique_id(route: APIRoute) -> str:
     return f"{route.tags[0]}-{route.name}"
 
 
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
+    if settings.emails_enabled:
+        warm_email_templates()
+    invalidation_bus.start()
+    process_metrics.start()
+    yield
+    invalidation_bus.stop()
+    # the last counts of this worker, before its pool stats go away
+    process_metrics.stop()
+    # asyncio connections are bound to the loop that opened them
+    await async_engine.dispose()
+    password_hasher.shutdown()
+    email_outbox.shutdown()
+
+
 app = FastAPI(
     title=settings.PROJECT_NAME,
     openapi_url=f"{settings.API_V1_STR}/openapi.json",
     generate_unique_id_function=custom_generate_unique_id,
+    default_response_class=default_response_class(),
+    lifespan=lifespan,
 )
 
 # Set all CORS enabled origins
@@ -27,9 +61,28 @@ if settings.BACKEND_CORS_ORIGINS:
         allow_credentials=True,
         allow_methods=["*"],
         allow_headers=["*"],
+        expose_headers=[
+            "ETag",
+            "X-Next-Cursor",
+            "X-DB-Queries",
+            "X-DB-Time-Ms",
+            "X-DB-Repeated-Queries",
+        ],
     )
 
+# Added last so that they wrap CORS and see every response, the stats and metrics
+# including the compression time
+app.add_middleware(CompressionMiddleware)
+app.add_middleware(
+    QueryStatsMiddleware,
+    headers=settings.ENVIRONMENT != "production",
+    n_plus_one_threshold=settings.N_PLUS_ONE_THRESHOLD,
+)
+app.add_middleware(MetricsMiddleware)
+
 app.include_router(api_router, prefix=settings.API_V1_STR)
+# at the root, where Prometheus looks by default
+app.include_router(metrics.router, tags=["metrics"])
 
 
 def debugging_openapi():
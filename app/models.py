@@ -1,5 +1,7 @@
+from datetime import datetime
 from uuid import UUID, uuid4
 
+from sqlalchemy import Column, ForeignKey, Integer, UniqueConstraint
 from sqlmodel import Field, Relationship, SQLModel
 
 
@@ -56,6 +58,21 @@ class UserOut(UserBase):
 class UsersOut(SQLModel):
     data: list[UserOut]
     count: int
+    # Pass as `cursor` to fetch the next page, None on the last page
+    next_cursor: str | None = None
+
+
+# POST /users/bulk
+class UserImportError(SQLModel):
+    # line of the CSV file, the header is line 1
+    line: int
+    email: str | None = None
+    error: str
+
+
+class UsersImportOut(SQLModel):
+    created: int
+    errors: list[UserImportError]
 
 
 class ProfileBase(SQLModel):
@@ -103,7 +120,9 @@ class Profile(ProfileBase, table=True):
         index=True,
         nullable=False,
     )
-    user_id: int = Field(foreign_key="user.id", nullable=False)
+    user_id: int = Field(foreign_key="user.id", nullable=False, index=True)
+    # bumped on every update, see app.core.versions
+    version: int = Field(default=1, sa_column_kwargs={"server_default": "1"})
     # O-O relationship
     user: User = Relationship(
         sa_relationship_kwargs={
@@ -166,9 +185,17 @@ class RoomUpdate(RoomBase):
 class Room(RoomBase, table=True):
     id: int | None = Field(default=None, primary_key=True)
     title: str
-    owner_id: int | None = Field(default=None, foreign_key="user.id", nullable=False)
+    owner_id: int | None = Field(
+        default=None, foreign_key="user.id", nullable=False, index=True
+    )
     owner: User | None = Relationship(back_populates="rooms")
-    sections: list["Section"] = Relationship(back_populates="room")
+    # bumped on every update of the room or its sections, see app.core.versions
+    version: int = Field(default=1, sa_column_kwargs={"server_default": "1"})
+    # RoomOut always serializes sections, so load them with the rooms in one
+    # extra SELECT ... IN query instead of one lazy load per room
+    sections: list["Section"] = Relationship(
+        back_populates="room", sa_relationship_kwargs={"lazy": "selectin"}
+    )
 
 
 class RoomOut(RoomBase):
@@ -180,6 +207,8 @@ class RoomOut(RoomBase):
 class RoomsOut(SQLModel):
     data: list[RoomOut]
     count: int
+    # Pass as `cursor` to fetch the next page, None on the last page
+    next_cursor: str | None = None
 
 
 class SectionBase(SQLModel):
@@ -212,24 +241,25 @@ class SectionUpdate(SectionBase):
 class Section(SectionBase, table=True):
     id: int | None = Field(default=None, primary_key=True)
     title: str
-    room_id: int | None = Field(default=None, foreign_key="room.id", nullable=False)
-    room: Room | None = Relationship(back_populates="sections")
-
-    question_id: int | None = Field(
-        default=None, foreign_key="question.id", nullable=False
+    room_id: int | None = Field(
+        default=None, foreign_key="room.id", nullable=False, index=True
     )
+    room: Room | None = Relationship(back_populates="sections")
     questions: list["Question"] = Relationship(back_populates="section")
 
 
 class SectionOut(SectionBase):
     id: int
     room_id: int | None = None
-    questions: list["Question"] = []
+    # never the answers
+    questions: list["QuestionPublicOut"] = []
 
 
 class SectionsOut(SQLModel):
     data: list[SectionOut]
     count: int
+    # Pass as `cursor` to fetch the next page, None on the last page
+    next_cursor: str | None = None
 
 
 # Generic message
@@ -237,6 +267,137 @@ class Message(SQLModel):
     message: str
 
 
+class PoolStats(SQLModel):
+    name: str
+    size: int
+    checked_out: int
+    checked_in: int
+    overflow: int
+    checkouts: int
+    timeouts: int
+    wait_seconds_total: float
+    wait_seconds_max: float
+    # Cumulative checkout counts keyed by latency bucket upper bound (ms)
+    checkout_latency_ms: dict[str, int]
+
+
+class DbPoolStatsOut(SQLModel):
+    pid: int
+    pools: list[PoolStats]
+
+
+class UserCacheStatsOut(SQLModel):
+    pid: int
+    size: int
+    maxsize: int
+    ttl_seconds: float
+    hits: int
+    misses: int
+    evictions: int
+    hit_rate: float
+
+
+class PasswordHasherStatsOut(SQLModel):
+    pid: int
+    workers: int
+    # submitted and not completed yet, of which `queued` wait for a free process
+    pending: int
+    queued: int
+    max_pending: int
+    submitted: int
+    completed: int
+    seconds_total: float
+
+
+class EmailOutboxStatsOut(SQLModel):
+    pid: int
+    connections: int
+    threads: int
+    # not sent yet, including those `sending` and those waiting for a retry
+    queued: int
+    sending: int
+    sent: int
+    retried: int
+    failed: int
+    connects: int
+    lag_seconds: float
+    last_lag_seconds: float
+    max_lag_seconds: float
+
+
+class CacheInvalidationStatsOut(SQLModel):
+    pid: int
+    channel: str | None
+    listening: bool
+    caches: list[str]
+    published: int
+    received: int
+    reconnects: int
+    # from commit in the writing worker to eviction in this one
+    last_lag_seconds: float
+    max_lag_seconds: float
+    mean_lag_seconds: float
+
+
+class CompressionStatsOut(SQLModel):
+    pid: int
+    minimum_size: int | None
+    encodings: list[str]
+    # bodies compressed by encoding, cache hits excluded
+    compressions: dict[str, int]
+    # compressed size over original size
+    ratio: float
+    compress_ms: float
+    cache_size: int
+    cache_maxsize: int
+    cache_hits: int
+    cache_misses: int
+    cache_hit_rate: float
+
+
+class StorageStatsOut(SQLModel):
+    pid: int
+    uploads: int
+    bytes_uploaded: int
+    upload_seconds_total: float
+    # Average upload throughput since the worker started
+    mb_per_s: float
+
+
+class QueryAdvisorFinding(SQLModel):
+    statement: str
+    duration_ms: float
+    # estimated rows of each sequentially scanned table
+    seq_scans: dict[str, int]
+    total_cost: float | None = None
+
+
+class QueryAdvisorStatsOut(SQLModel):
+    pid: int
+    threshold_ms: float
+    min_rows: int
+    # slow queries explained, and those that scanned a large table
+    explained: int
+    flagged: int
+    findings: list[QueryAdvisorFinding]
+
+
+class RouteQueryStats(SQLModel):
+    # method and path template, "GET /api/v1/rooms/{id}"
+    route: str
+    requests: int
+    queries: int
+    db_seconds: float
+    max_queries: int
+    # requests that repeated a statement N_PLUS_ONE_THRESHOLD times or more
+    n_plus_one: int
+
+
+class QueryStatsOut(SQLModel):
+    pid: int
+    routes: list[RouteQueryStats]
+
+
 # JSON payload containing access token
 class Token(SQLModel):
     access_token: str
@@ -271,7 +432,9 @@ class ItemUpdate(ItemBase):
 class Item(ItemBase, table=True):
     id: int | None = Field(default=None, primary_key=True)
     title: str
-    owner_id: int | None = Field(default=None, foreign_key="user.id", nullable=False)
+    owner_id: int | None = Field(
+        default=None, foreign_key="user.id", nullable=False, index=True
+    )
     owner: User | None = Relationship(back_populates="items")
 
 
@@ -284,6 +447,8 @@ class ItemOut(ItemBase):
 class ItemsOut(SQLModel):
     data: list[ItemOut]
     count: int
+    # Pass as `cursor` to fetch the next page, None on the last page
+    next_cursor: str | None = None
 
 
 class BadgeBase(SQLModel):
@@ -305,8 +470,12 @@ class Badge(BadgeBase, table=True):
     id: int | None = Field(default=None, primary_key=True)
     title: str
     image: str
-    owner_id: int | None = Field(default=None, foreign_key="user.id", nullable=False)
+    owner_id: int | None = Field(
+        default=None, foreign_key="user.id", nullable=False, index=True
+    )
     owner: User | None = Relationship(back_populates="badges")
+    # bumped on every update, see app.core.versions
+    version: int = Field(default=1, sa_column_kwargs={"server_default": "1"})
 
 
 class BadgeOut(BadgeBase):
@@ -317,6 +486,8 @@ class BadgeOut(BadgeBase):
 class BadgesOut(SQLModel):
     data: list[BadgeOut]
     count: int
+    # Pass as `cursor` to fetch the next page, None on the last page
+    next_cursor: str | None = None
 
 
 # create Question model and link to sections that have [content, answer, hint, answer_type]
@@ -325,6 +496,8 @@ class QuestionBase(SQLModel):
     answer: str
     hint: str | None = None
     answer_type: str
+    # added to the player's score on their first correct answer
+    points: int = Field(default=10, ge=0)
 
 
 class QuestionCreate(QuestionBase):
@@ -339,6 +512,7 @@ class QuestionUpdate(QuestionBase):
     answer: str | None = None
     hint: str | None = None
     answer_type: str | None = None
+    points: int | None = Field(default=None, ge=0)
 
 
 class Question(QuestionBase, table=True):
@@ -347,8 +521,10 @@ class Question(QuestionBase, table=True):
     answer: str
     hint: str | None = None
     answer_type: str
+    # SHA-256 of the normalized answer, kept up to date by app.core.answers
+    answer_hash: str | None = Field(default=None, max_length=64)
     section_id: int | None = Field(
-        default=None, foreign_key="section.id", nullable=False
+        default=None, foreign_key="section.id", nullable=False, index=True
     )
     section: Section | None = Relationship(back_populates="questions")
 
@@ -361,3 +537,124 @@ class QuestionOut(QuestionBase):
 class QuestionsOut(SQLModel):
     data: list[QuestionOut]
     count: int
+    # Pass as `cursor` to fetch the next page, None on the last page
+    next_cursor: str | None = None
+
+
+# A question as players see it, without the answer
+class QuestionPublicOut(SQLModel):
+    id: int
+    content: str
+    hint: str | None = None
+    answer_type: str
+    points: int = 10
+    section_id: int | None = None
+
+
+class AnswerSubmit(SQLModel):
+    answer: str = Field(max_length=1024)
+
+
+class AnswerResult(SQLModel):
+    correct: bool
+    # points added to the score, 0 unless this is the player's first solve
+    points: int = 0
+
+
+# A player's first correct answer to a question, scores are sums of these
+class Solve(SQLModel, table=True):
+    __table_args__ = (UniqueConstraint("user_id", "question_id"),)
+
+    id: int | None = Field(default=None, primary_key=True)
+    user_id: int = Field(
+        sa_column=Column(
+            Integer, ForeignKey("user.id", ondelete="CASCADE"), nullable=False
+        )
+    )
+    question_id: int = Field(
+        sa_column=Column(
+            Integer,
+            ForeignKey("question.id", ondelete="CASCADE"),
+            nullable=False,
+            index=True,
+        )
+    )
+    points: int
+    solved_at: datetime = Field(default_factory=datetime.utcnow)
+
+
+class LeaderboardEntryOut(SQLModel):
+    rank: int
+    user_id: int
+    full_name: str | None = None
+    score: int
+
+
+class LeaderboardOut(SQLModel):
+    data: list[LeaderboardEntryOut]
+    # ranked players, those with at least one solve
+    count: int
+
+
+class LeaderboardPlayerOut(SQLModel):
+    user_id: int
+    # None until the player solves a question
+    rank: int | None = None
+    score: int = 0
+    # share of ranked players with a lower score
+    percentile: float | None = None
+
+
+class LeaderboardAroundOut(LeaderboardPlayerOut):
+    data: list[LeaderboardEntryOut]
+
+
+# POST /rooms/bulk: rooms with their sections and questions, created together
+class SectionImport(SQLModel):
+    title: str
+    description: str | None = None
+    created_at: str
+    updated_at: str
+    deleted_at: str | None = None
+    questions: list[QuestionCreate] = []
+
+
+class RoomImport(RoomCreate):
+    sections: list[SectionImport] = []
+
+
+class RoomsImport(SQLModel):
+    data: list[RoomImport] = Field(min_length=1, max_length=1000)
+
+
+class RoomsImportOut(SQLModel):
+    # ids of the created rooms, in the order they were sent
+    data: list[int]
+    sections: int
+    questions: int
+
+
+# Room -> sections -> questions, loaded eagerly in a fixed number of queries.
+# Answers are never part of the tree.
+class QuestionTreeOut(SQLModel):
+    id: int
+    content: str
+    hint: str | None = None
+    answer_type: str
+
+
+class SectionTreeOut(SectionBase):
+    id: int
+    questions: list[QuestionTreeOut]
+
+
+class RoomTreeOut(RoomBase):
+    id: int
+    owner_id: int | None = None
+    sections: list[SectionTreeOut]
+
+
+class RoomsTreeOut(SQLModel):
+    data: list[RoomTreeOut]
+    count: int
+    next_cursor: str | None = None
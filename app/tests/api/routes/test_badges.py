@@ -0,0 +1,52 @@
+from fastapi.testclient import TestClient
+
+from app.core.config import settings
+from app.tests.utils.utils import random_lower_string
+
+
+def _create_badge(client: TestClient, headers: dict[str, str]) -> dict[str, str]:
+    data = {"title": random_lower_string(), "image": "badge.png"}
+    response = client.post(f"{settings.API_V1_STR}/badges/", headers=headers, json=data)
+    assert response.status_code == 200
+    content = response.json()
+    assert content["title"] == data["title"]
+    assert content["image"] == data["image"]
+    assert "id" in content
+    assert "owner_id" in content
+    return content
+
+
+def test_create_badge(
+    client: TestClient, superuser_token_headers: dict[str, str]
+) -> None:
+    badge = _create_badge(client, superuser_token_headers)
+
+    response = client.post(
+        f"{settings.API_V1_STR}/badges/",
+        headers=superuser_token_headers,
+        json={"title": badge["title"], "image": "other.png"},
+    )
+    assert response.status_code == 400
+
+
+def test_update_badge(
+    client: TestClient, superuser_token_headers: dict[str, str]
+) -> None:
+    badge = _create_badge(client, superuser_token_headers)
+    other = _create_badge(client, superuser_token_headers)
+    url = f"{settings.API_V1_STR}/badges/{badge['id']}"
+
+    data = {"title": random_lower_string()}
+    response = client.patch(url, headers=superuser_token_headers, json=data)
+    assert response.status_code == 200
+    content = response.json()
+    assert content["title"] == data["title"]
+    assert content["image"] == badge["image"]
+
+    # its own title is not a conflict, another badge's is
+    response = client.patch(url, headers=superuser_token_headers, json=data)
+    assert response.status_code == 200
+    response = client.patch(
+        url, headers=superuser_token_headers, json={"title": other["title"]}
+    )
+    assert response.status_code == 409
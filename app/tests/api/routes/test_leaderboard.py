@@ -0,0 +1,89 @@
+from fastapi.testclient import TestClient
+from sqlmodel import Session
+
+from app import crud
+from app.core.config import settings
+from app.models import UserCreate
+from app.tests.utils.room import create_random_question
+from app.tests.utils.user import user_authentication_headers
+from app.tests.utils.utils import random_email, random_lower_string
+
+
+def _player_headers(client: TestClient, db: Session) -> tuple[int, dict[str, str]]:
+    email, password = random_email(), random_lower_string()
+    user = crud.create_user(
+        session=db, user_create=UserCreate(email=email, password=password)
+    )
+    headers = user_authentication_headers(client=client, email=email, password=password)
+    return user.id, headers  # type: ignore[return-value]
+
+
+def _solve(client: TestClient, headers: dict[str, str], question_id: int) -> None:
+    r = client.post(
+        f"{settings.API_V1_STR}/questions/{question_id}/submit",
+        headers=headers,
+        json={"answer": "answer"},
+    )
+    assert r.json()["correct"] is True
+
+
+def test_leaderboard_after_solves(client: TestClient, db: Session) -> None:
+    high_id, high = _player_headers(client, db)
+    low_id, low = _player_headers(client, db)
+    big = create_random_question(db, answer="answer", points=10_000)
+    small = create_random_question(db, answer="answer", points=1)
+    _solve(client, high, big.id)  # type: ignore[arg-type]
+    _solve(client, high, small.id)  # type: ignore[arg-type]
+    _solve(client, low, small.id)  # type: ignore[arg-type]
+    # a second correct answer scores nothing
+    _solve(client, low, small.id)  # type: ignore[arg-type]
+
+    url = f"{settings.API_V1_STR}/leaderboard/players"
+    r = client.get(f"{url}/{high_id}", headers=low)
+    assert r.status_code == 200
+    high_player = r.json()
+    assert high_player["score"] == 10_001
+    r = client.get(f"{url}/{low_id}", headers=low)
+    low_player = r.json()
+    assert low_player["score"] == 1
+    assert high_player["rank"] < low_player["rank"]
+    assert high_player["percentile"] > low_player["percentile"]
+
+    r = client.get(
+        f"{settings.API_V1_STR}/leaderboard/",
+        headers=low,
+        params={"limit": 100},
+    )
+    assert r.status_code == 200
+    board = r.json()
+    assert board["count"] >= 2
+    ranks = [e["rank"] for e in board["data"]]
+    assert ranks == sorted(ranks)
+    entries = {e["user_id"]: e for e in board["data"]}
+    assert entries[high_id]["score"] == 10_001
+    assert entries[high_id]["rank"] == high_player["rank"]
+
+    r = client.get(
+        f"{settings.API_V1_STR}/leaderboard/me",
+        headers=low,
+        params={"before": 1, "after": 1},
+    )
+    assert r.status_code == 200
+    me = r.json()
+    assert me["user_id"] == low_id
+    assert me["rank"] == low_player["rank"]
+    assert low_id in [e["user_id"] for e in me["data"]]
+    assert len(me["data"]) <= 3
+
+
+def test_leaderboard_unranked_player(client: TestClient, db: Session) -> None:
+    user_id, headers = _player_headers(client, db)
+    r = client.get(f"{settings.API_V1_STR}/leaderboard/me", headers=headers)
+    assert r.status_code == 200
+    assert r.json() == {
+        "user_id": user_id,
+        "rank": None,
+        "score": 0,
+        "percentile": None,
+        "data": [],
+    }
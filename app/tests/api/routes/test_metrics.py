@@ -0,0 +1,21 @@
+from fastapi.testclient import TestClient
+
+from app.core.config import settings
+
+
+def test_metrics(client: TestClient, normal_user_token_headers: dict[str, str]) -> None:
+    r = client.get(f"{settings.API_V1_STR}/users/me", headers=normal_user_token_headers)
+    assert r.status_code == 200
+    r = client.get(f"{settings.API_V1_STR}/no-such-route")
+    assert r.status_code == 404
+
+    r = client.get("/metrics")
+    assert r.status_code == 200
+    assert r.headers["content-type"].startswith("text/plain; version=0.0.4")
+    assert (
+        'http_requests_total{route="users-read_user_me",method="GET",status="200"}'
+        in r.text
+    )
+    assert 'route="unmatched",method="GET",status="404"' in r.text
+    assert 'db_pool_checked_out{pool="async"}' in r.text
+    assert "http_request_duration_seconds_bucket" in r.text
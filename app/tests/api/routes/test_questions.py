@@ -0,0 +1,130 @@
+from fastapi.testclient import TestClient
+from sqlmodel import Session
+
+from app import crud
+from app.core.config import settings
+from app.models import QuestionUpdate
+from app.tests.utils.room import create_random_question, create_random_room
+
+
+def test_submit_correct_answer(
+    client: TestClient, normal_user_token_headers: dict[str, str], db: Session
+) -> None:
+    question = create_random_question(db, answer="The Answer", answer_type="text")
+    r = client.post(
+        f"{settings.API_V1_STR}/questions/{question.id}/submit",
+        headers=normal_user_token_headers,
+        json={"answer": "  the   ANSWER "},
+    )
+    assert r.status_code == 200
+    assert r.json() == {"correct": True, "points": 10}
+
+    # solved already, no more points
+    r = client.post(
+        f"{settings.API_V1_STR}/questions/{question.id}/submit",
+        headers=normal_user_token_headers,
+        json={"answer": "the answer"},
+    )
+    assert r.json() == {"correct": True, "points": 0}
+
+
+def test_submit_wrong_answer(
+    client: TestClient, normal_user_token_headers: dict[str, str], db: Session
+) -> None:
+    question = create_random_question(db, answer="flag{abc}", answer_type="flag")
+    for answer in ("flag{ABC}", "flag{ab}", ""):
+        r = client.post(
+            f"{settings.API_V1_STR}/questions/{question.id}/submit",
+            headers=normal_user_token_headers,
+            json={"answer": answer},
+        )
+        assert r.status_code == 200
+        assert r.json() == {"correct": False, "points": 0}
+
+
+def test_submit_answer_question_not_found(
+    client: TestClient, normal_user_token_headers: dict[str, str]
+) -> None:
+    r = client.post(
+        f"{settings.API_V1_STR}/questions/999999/submit",
+        headers=normal_user_token_headers,
+        json={"answer": "x"},
+    )
+    assert r.status_code == 404
+
+
+def test_submit_answer_after_answer_update(
+    client: TestClient, normal_user_token_headers: dict[str, str], db: Session
+) -> None:
+    question = create_random_question(db, answer="42", answer_type="number")
+    url = f"{settings.API_V1_STR}/questions/{question.id}/submit"
+    r = client.post(url, headers=normal_user_token_headers, json={"answer": "42.0"})
+    assert r.json()["correct"] is True
+
+    crud.update_question(
+        session=db, db_question=question, question_in=QuestionUpdate(answer="43")
+    )
+
+    # the cached matcher was dropped when the update committed
+    r = client.post(url, headers=normal_user_token_headers, json={"answer": "42"})
+    assert r.json()["correct"] is False
+    r = client.post(url, headers=normal_user_token_headers, json={"answer": "43"})
+    assert r.json()["correct"] is True
+
+
+def test_read_question_hides_answer_from_players(
+    client: TestClient,
+    normal_user_token_headers: dict[str, str],
+    superuser_token_headers: dict[str, str],
+    db: Session,
+) -> None:
+    question = create_random_question(db)
+    url = f"{settings.API_V1_STR}/questions/{question.id}"
+    r = client.get(url, headers=normal_user_token_headers)
+    assert r.status_code == 200
+    assert "answer" not in r.json()
+
+    r = client.get(url, headers=superuser_token_headers)
+    assert r.status_code == 200
+    assert r.json()["answer"] == question.answer
+
+
+def test_create_and_update_question(
+    client: TestClient, superuser_token_headers: dict[str, str], db: Session
+) -> None:
+    section_id = create_random_room(db, sections=1, questions=0).sections[0].id
+    data = {"content": "What is 6 * 7?", "answer": "42", "answer_type": "number"}
+    r = client.post(
+        f"{settings.API_V1_STR}/questions/",
+        headers=superuser_token_headers,
+        params={"section_id": section_id},
+        json=data,
+    )
+    assert r.status_code == 200
+    content = r.json()
+    assert content["section_id"] == section_id
+    assert content["content"] == data["content"]
+    assert content["points"] == 10
+
+    r = client.patch(
+        f"{settings.API_V1_STR}/questions/{content['id']}",
+        headers=superuser_token_headers,
+        json={"content": "What is 6 * 9?", "points": 20},
+    )
+    assert r.status_code == 200
+    content = r.json()
+    assert content["content"] == "What is 6 * 9?"
+    assert content["points"] == 20
+    assert content["answer"] == "42"
+
+
+def test_create_question_section_not_found(
+    client: TestClient, superuser_token_headers: dict[str, str]
+) -> None:
+    r = client.post(
+        f"{settings.API_V1_STR}/questions/",
+        headers=superuser_token_headers,
+        params={"section_id": 999999},
+        json={"content": "?", "answer": "!", "answer_type": "text"},
+    )
+    assert r.status_code == 404
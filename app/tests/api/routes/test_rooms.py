@@ -0,0 +1,404 @@
+import csv
+import io
+from collections.abc import Generator
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any
+from unittest.mock import patch
+
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+from sqlmodel import Session
+
+from app.core.config import settings
+from app.core.db import async_engine
+from app.core.storage import LocalStorage
+from app.tests.utils.blob_storage import fake_blob_storage
+from app.tests.utils.room import create_random_room
+
+
+@contextmanager
+def count_queries() -> Generator[list[str], None, None]:
+    statements: list[str] = []
+
+    def before_cursor_execute(*args: Any) -> None:
+        statements.append(args[2])
+
+    event.listen(
+        async_engine.sync_engine, "before_cursor_execute", before_cursor_execute
+    )
+    try:
+        yield statements
+    finally:
+        event.remove(
+            async_engine.sync_engine, "before_cursor_execute", before_cursor_execute
+        )
+
+
+def test_read_room_tree(
+    client: TestClient, superuser_token_headers: dict[str, str], db: Session
+) -> None:
+    room = create_random_room(db, sections=2, questions=3)
+    response = client.get(
+        f"{settings.API_V1_STR}/rooms/{room.id}/tree",
+        headers=superuser_token_headers,
+    )
+    assert response.status_code == 200
+    content = response.json()
+    assert content["id"] == room.id
+    assert len(content["sections"]) == 2
+    for section in content["sections"]:
+        assert len(section["questions"]) == 3
+        for question in section["questions"]:
+            assert "content" in question
+            assert "answer" not in question
+
+
+def test_read_room_etag(
+    client: TestClient,
+    superuser_token_headers: dict[str, str],
+    normal_user_token_headers: dict[str, str],
+    db: Session,
+) -> None:
+    room = create_random_room(db, sections=2, questions=0)
+    url = f"{settings.API_V1_STR}/rooms/{room.id}"
+    r = client.get(url, headers=superuser_token_headers)
+    assert r.status_code == 200
+    etag = r.headers["etag"]
+    assert r.headers["cache-control"] == "private, no-cache"
+
+    with count_queries() as queries:
+        r = client.get(url, headers={**superuser_token_headers, "If-None-Match": etag})
+    assert r.status_code == 304
+    assert r.headers["etag"] == etag
+    assert r.content == b""
+    # the version lookup only, no room or sections
+    assert len(queries) == 1
+    assert "section" not in queries[0]
+
+    # not the owner: no 304 even with the right ETag
+    r = client.get(url, headers={**normal_user_token_headers, "If-None-Match": etag})
+    assert r.status_code == 400
+
+    r = client.put(url, headers=superuser_token_headers, json={"title": "renamed"})
+    assert r.status_code == 200
+    r = client.get(url, headers={**superuser_token_headers, "If-None-Match": etag})
+    assert r.status_code == 200
+    assert r.json()["title"] == "renamed"
+    renamed_etag = r.headers["etag"]
+    assert renamed_etag != etag
+
+    # the response embeds the sections, changing one changes the room's ETag
+    r = client.patch(
+        f"{settings.API_V1_STR}/pages/{room.sections[0].id}",
+        headers=superuser_token_headers,
+        json={"title": "renamed section"},
+    )
+    assert r.status_code == 200
+    r = client.get(
+        url, headers={**superuser_token_headers, "If-None-Match": renamed_etag}
+    )
+    assert r.status_code == 200
+    assert r.headers["etag"] != renamed_etag
+
+
+def test_read_room_tree_query_count_is_constant(
+    client: TestClient, superuser_token_headers: dict[str, str], db: Session
+) -> None:
+    small_room = create_random_room(db, sections=1, questions=1)
+    large_room = create_random_room(db, sections=6, questions=4)
+
+    with count_queries() as small_queries:
+        response = client.get(
+            f"{settings.API_V1_STR}/rooms/{small_room.id}/tree",
+            headers=superuser_token_headers,
+        )
+        assert response.status_code == 200
+    with count_queries() as large_queries:
+        response = client.get(
+            f"{settings.API_V1_STR}/rooms/{large_room.id}/tree",
+            headers=superuser_token_headers,
+        )
+        assert response.status_code == 200
+
+    # the user lookup depends on the user cache, not on the room
+    def room_queries(queries: list[str]) -> list[str]:
+        return [q for q in queries if 'FROM "user"' not in q]
+
+    assert len(room_queries(large_queries)) == len(room_queries(small_queries))
+
+
+def test_read_room_tree_not_found(
+    client: TestClient, superuser_token_headers: dict[str, str]
+) -> None:
+    response = client.get(
+        f"{settings.API_V1_STR}/rooms/999999/tree",
+        headers=superuser_token_headers,
+    )
+    assert response.status_code == 404
+    assert response.json()["detail"] == "Room not found"
+
+
+def test_read_rooms_expand_questions(
+    client: TestClient, superuser_token_headers: dict[str, str], db: Session
+) -> None:
+    create_random_room(db, sections=2, questions=2)
+
+    response = client.get(
+        f"{settings.API_V1_STR}/rooms/",
+        headers=superuser_token_headers,
+        params={"expand": "questions"},
+    )
+    assert response.status_code == 200
+    rooms = response.json()["data"]
+    assert rooms
+    assert all("questions" in s for room in rooms for s in room["sections"])
+
+    with count_queries() as queries:
+        response = client.get(
+            f"{settings.API_V1_STR}/rooms/", headers=superuser_token_headers
+        )
+    assert response.status_code == 200
+    rooms = response.json()["data"]
+    assert all("questions" not in s for room in rooms for s in room["sections"])
+    # count, rooms and one selectin query for all of their sections, plus the
+    # user lookup unless the superuser is already in the user cache
+    room_queries = [q for q in queries if 'FROM "user"' not in q]
+    assert len(room_queries) == 3
+
+
+def test_upload_room_file_in_blocks(
+    client: TestClient, superuser_token_headers: dict[str, str], db: Session
+) -> None:
+    room = create_random_room(db)
+    content = bytes(range(256)) * 1024  # 256 KiB, four 64 KiB blocks
+    with fake_blob_storage(block_size=64 * 1024, max_concurrency=2) as (
+        storage,
+        service,
+    ), patch("app.api.routes.rooms.storage", storage):
+        response = client.post(
+            f"{settings.API_V1_STR}/rooms/{room.id}/upload/",
+            headers=superuser_token_headers,
+            files={"file_name": ("map.bin", content)},
+        )
+    assert response.status_code == 200
+    assert response.json()["file_name"] == "map.bin"
+    assert service.blobs["/devstoreaccount1/rooms/map.bin"] == content
+    assert service.staged_blocks == 4
+    assert storage.stats()["bytes_uploaded"] == len(content)
+
+
+def test_download_room_file(
+    client: TestClient,
+    superuser_token_headers: dict[str, str],
+    normal_user_token_headers: dict[str, str],
+    db: Session,
+    tmp_path: Path,
+) -> None:
+    room = create_random_room(db)
+    content = b"0123456789" * 10_000
+    with patch("app.api.routes.rooms.storage", LocalStorage(tmp_path)):
+        response = client.post(
+            f"{settings.API_V1_STR}/rooms/{room.id}/upload/",
+            headers=superuser_token_headers,
+            files={"file_name": ("notes.txt", content)},
+        )
+        assert response.status_code == 200
+        url = f"{settings.API_V1_STR}/rooms/{room.id}/file"
+
+        response = client.get(url, headers=superuser_token_headers)
+        assert response.status_code == 200
+        assert response.content == content
+        assert response.headers["accept-ranges"] == "bytes"
+        etag = response.headers["etag"]
+
+        # neither a superuser nor the room's owner
+        response = client.get(url, headers=normal_user_token_headers)
+        assert response.status_code == 400
+        assert response.json() == {"detail": "Not enough permissions"}
+
+        response = client.get(
+            url, headers={**superuser_token_headers, "If-None-Match": etag}
+        )
+        assert response.status_code == 304
+        assert response.content == b""
+
+        response = client.get(
+            url, headers={**superuser_token_headers, "Range": "bytes=10-19"}
+        )
+        assert response.status_code == 206
+        assert response.headers["content-range"] == f"bytes 10-19/{len(content)}"
+        assert response.content == content[10:20]
+
+        response = client.get(
+            url, headers={**superuser_token_headers, "Range": "bytes=-5"}
+        )
+        assert response.status_code == 206
+        assert response.content == content[-5:]
+
+        response = client.get(
+            url, headers={**superuser_token_headers, "Range": "bytes=200000-"}
+        )
+        assert response.status_code == 416
+        assert response.headers["content-range"] == f"bytes */{len(content)}"
+
+
+def test_download_room_file_from_blob_storage(
+    client: TestClient, superuser_token_headers: dict[str, str], db: Session
+) -> None:
+    room = create_random_room(db)
+    content = bytes(range(256)) * 1024
+    with fake_blob_storage(block_size=64 * 1024) as (storage, _), patch(
+        "app.api.routes.rooms.storage", storage
+    ):
+        client.post(
+            f"{settings.API_V1_STR}/rooms/{room.id}/upload/",
+            headers=superuser_token_headers,
+            files={"file_name": ("map.bin", content)},
+        )
+        response = client.get(
+            f"{settings.API_V1_STR}/rooms/{room.id}/file",
+            headers={**superuser_token_headers, "Range": "bytes=1000-199999"},
+        )
+    assert response.status_code == 206
+    assert response.content == content[1000:200000]
+
+
+def test_download_room_without_file(
+    client: TestClient, superuser_token_headers: dict[str, str], db: Session
+) -> None:
+    room = create_random_room(db)
+    response = client.get(
+        f"{settings.API_V1_STR}/rooms/{room.id}/file",
+        headers=superuser_token_headers,
+    )
+    assert response.status_code == 404
+    assert response.json() == {"detail": "Room has no file"}
+
+
+def test_upload_room_file_invalid_name(
+    client: TestClient,
+    superuser_token_headers: dict[str, str],
+    db: Session,
+    tmp_path: Path,
+) -> None:
+    room = create_random_room(db)
+    with patch("app.api.routes.rooms.storage", LocalStorage(tmp_path / "files")):
+        response = client.post(
+            f"{settings.API_V1_STR}/rooms/{room.id}/upload/",
+            headers=superuser_token_headers,
+            files={"file_name": ("../escape.txt", b"x")},
+        )
+    assert response.status_code == 400
+    assert not (tmp_path / "escape.txt").exists()
+
+
+def _room_import(title: str, sections: int, questions: int) -> dict[str, Any]:
+    now = "2024-01-01T00:00:00"
+    return {
+        "title": title,
+        "difficulty": 1,
+        "level": "easy",
+        "is_active": True,
+        "room_type": "challenge",
+        "visibility": "private",
+        "created_at": now,
+        "updated_at": now,
+        "file_name": "",
+        "sections": [
+            {
+                "title": f"{title} section {s}",
+                "created_at": now,
+                "updated_at": now,
+                "questions": [
+                    {
+                        "content": f"question {q}",
+                        "answer": f"answer {q}",
+                        "answer_type": "text",
+                    }
+                    for q in range(questions)
+                ],
+            }
+            for s in range(sections)
+        ],
+    }
+
+
+def test_import_rooms(
+    client: TestClient, superuser_token_headers: dict[str, str]
+) -> None:
+    rooms = [_room_import(f"bulk {n}", sections=n, questions=2) for n in range(3)]
+    with count_queries() as queries:
+        response = client.post(
+            f"{settings.API_V1_STR}/rooms/bulk",
+            headers=superuser_token_headers,
+            json={"data": rooms},
+        )
+    assert response.status_code == 200
+    content = response.json()
+    assert len(content["data"]) == 3
+    assert content["sections"] == 3
+    assert content["questions"] == 6
+    # one INSERT per table, whatever the number of rows
+    inserts = [q for q in queries if q.startswith("INSERT")]
+    assert len(inserts) == 3
+
+    for n, room_id in enumerate(content["data"]):
+        response = client.get(
+            f"{settings.API_V1_STR}/rooms/{room_id}/tree",
+            headers=superuser_token_headers,
+        )
+        tree = response.json()
+        assert tree["title"] == f"bulk {n}"
+        assert [s["title"] for s in tree["sections"]] == [
+            f"bulk {n} section {s}" for s in range(n)
+        ]
+
+    # answers are hashed although the bulk insert skips the ORM
+    question_id = tree["sections"][0]["questions"][0]["id"]
+    response = client.post(
+        f"{settings.API_V1_STR}/questions/{question_id}/submit",
+        headers=superuser_token_headers,
+        json={"answer": "Answer 0"},
+    )
+    assert response.json()["correct"] is True
+
+
+def test_import_rooms_invalid_creates_nothing(
+    client: TestClient, superuser_token_headers: dict[str, str]
+) -> None:
+    valid = _room_import("bulk valid", sections=1, questions=1)
+    invalid = _room_import("bulk invalid", sections=1, questions=1)
+    del invalid["sections"][0]["questions"][0]["answer"]
+    response = client.post(
+        f"{settings.API_V1_STR}/rooms/bulk",
+        headers=superuser_token_headers,
+        json={"data": [valid, invalid]},
+    )
+    assert response.status_code == 422
+    assert response.json()["detail"][0]["loc"][:3] == ["body", "data", 1]
+
+    response = client.get(
+        f"{settings.API_V1_STR}/rooms/",
+        headers=superuser_token_headers,
+        params={"limit": 1000},
+    )
+    assert "bulk valid" not in [r["title"] for r in response.json()["data"]]
+
+
+def test_export_rooms_csv(
+    client: TestClient, superuser_token_headers: dict[str, str], db: Session
+) -> None:
+    room = create_random_room(db, sections=1)
+    response = client.get(
+        f"{settings.API_V1_STR}/rooms/export",
+        headers=superuser_token_headers,
+        params={"format": "csv"},
+    )
+    assert response.status_code == 200
+    assert response.headers["content-disposition"] == (
+        'attachment; filename="room.csv"'
+    )
+    rows = {int(r["id"]): r for r in csv.DictReader(io.StringIO(response.text))}
+    assert rows[room.id]["title"] == room.title
+    assert "sections" not in rows[room.id]
@@ -0,0 +1,41 @@
+from fastapi.testclient import TestClient
+from sqlmodel import Session
+
+from app.core.config import settings
+from app.tests.utils.room import create_random_question
+
+
+def test_read_section_hides_answers(
+    client: TestClient, normal_user_token_headers: dict[str, str], db: Session
+) -> None:
+    question = create_random_question(db)
+    r = client.get(
+        f"{settings.API_V1_STR}/pages/{question.section_id}",
+        headers=normal_user_token_headers,
+    )
+    assert r.status_code == 200
+    questions = r.json()["questions"]
+    assert [q["id"] for q in questions] == [question.id]
+    assert "answer" not in questions[0]
+    assert "answer_hash" not in questions[0]
+
+
+def test_read_sections_hides_answers(
+    client: TestClient, normal_user_token_headers: dict[str, str], db: Session
+) -> None:
+    create_random_question(db)
+    r = client.get(
+        f"{settings.API_V1_STR}/pages/",
+        headers=normal_user_token_headers,
+    )
+    assert r.status_code == 200
+    questions = [q for s in r.json()["data"] for q in s["questions"]]
+    assert questions
+    for q in questions:
+        assert "answer" not in q
+        assert "answer_hash" not in q
+
+
+def test_read_sections_requires_login(client: TestClient) -> None:
+    r = client.get(f"{settings.API_V1_STR}/pages/")
+    assert r.status_code == 401
@@ -1,3 +1,6 @@
+import csv
+import io
+import json
 from unittest.mock import patch
 
 from fastapi.testclient import TestClient
@@ -6,6 +9,7 @@ from sqlmodel import Session
 from app import crud
 from app.core.config import settings
 from app.models import UserCreate
+from app.tests.utils.user import user_authentication_headers
 from app.tests.utils.utils import random_email, random_lower_string
 
 
@@ -164,6 +168,45 @@ def test_retrieve_users(
         assert "email" in item
 
 
+def test_retrieve_users_cursor(
+    client: TestClient, superuser_token_headers: dict[str, str], db: Session
+) -> None:
+    for _ in range(3):
+        user_in = UserCreate(email=random_email(), password=random_lower_string())
+        crud.create_user(session=db, user_create=user_in)
+
+    r = client.get(
+        f"{settings.API_V1_STR}/users/",
+        headers=superuser_token_headers,
+        params={"limit": 2},
+    )
+    first_page = r.json()
+    assert len(first_page["data"]) == 2
+    assert first_page["next_cursor"]
+
+    r = client.get(
+        f"{settings.API_V1_STR}/users/",
+        headers=superuser_token_headers,
+        params={"limit": 2, "cursor": first_page["next_cursor"]},
+    )
+    assert r.status_code == 200
+    second_page = r.json()
+    assert second_page["data"]
+    assert second_page["data"][0]["id"] > first_page["data"][-1]["id"]
+
+
+def test_retrieve_users_invalid_cursor(
+    client: TestClient, superuser_token_headers: dict[str, str]
+) -> None:
+    r = client.get(
+        f"{settings.API_V1_STR}/users/",
+        headers=superuser_token_headers,
+        params={"cursor": "not-a-cursor"},
+    )
+    assert r.status_code == 400
+    assert r.json()["detail"] == "Invalid cursor"
+
+
 def test_update_user_me(
     client: TestClient, normal_user_token_headers: dict[str, str], db: Session
 ) -> None:
@@ -452,3 +495,160 @@ def test_delete_user_without_privileges(
     )
     assert r.status_code == 403
     assert r.json()["detail"] == "The user doesn't have enough privileges"
+
+
+def test_deactivated_user_is_not_served_from_cache(
+    client: TestClient, superuser_token_headers: dict[str, str], db: Session
+) -> None:
+    username = random_email()
+    password = random_lower_string()
+    user_in = UserCreate(email=username, password=password)
+    user = crud.create_user(session=db, user_create=user_in)
+    headers = user_authentication_headers(
+        client=client, email=username, password=password
+    )
+    # the second request is served from the user cache
+    for _ in range(2):
+        r = client.get(f"{settings.API_V1_STR}/users/me", headers=headers)
+        assert r.status_code == 200
+        assert r.json()["email"] == username
+
+    r = client.patch(
+        f"{settings.API_V1_STR}/users/{user.id}",
+        headers=superuser_token_headers,
+        json={"is_active": False},
+    )
+    assert r.status_code == 200
+
+    r = client.get(f"{settings.API_V1_STR}/users/me", headers=headers)
+    assert r.status_code == 400
+    assert r.json() == {"detail": "Inactive user"}
+
+
+def test_update_user_me_refreshes_cached_user(client: TestClient, db: Session) -> None:
+    username = random_email()
+    password = random_lower_string()
+    crud.create_user(
+        session=db, user_create=UserCreate(email=username, password=password)
+    )
+    headers = user_authentication_headers(
+        client=client, email=username, password=password
+    )
+    r = client.get(f"{settings.API_V1_STR}/users/me", headers=headers)
+    assert r.status_code == 200
+
+    r = client.patch(
+        f"{settings.API_V1_STR}/users/me",
+        headers=headers,
+        json={"full_name": "Cached Name"},
+    )
+    assert r.status_code == 200
+
+    r = client.get(f"{settings.API_V1_STR}/users/me", headers=headers)
+    assert r.status_code == 200
+    assert r.json()["full_name"] == "Cached Name"
+
+
+def test_import_users(
+    client: TestClient, superuser_token_headers: dict[str, str], db: Session
+) -> None:
+    new_email, other_email = random_email(), random_email()
+    password = random_lower_string()
+    csv_file = (
+        "email,password,full_name\n"
+        f"{new_email},{password},Ada Lovelace\n"
+        f"{settings.FIRST_SUPERUSER},{password},\n"
+        f",{password},No Email\n"
+        f"{new_email},{password},Again\n"
+        f"{other_email},{password},\n"
+    )
+    with patch("app.api.routes.users.IMPORT_BATCH_SIZE", 1):
+        r = client.post(
+            f"{settings.API_V1_STR}/users/bulk",
+            headers=superuser_token_headers,
+            files={"file": ("users.csv", csv_file.encode(), "text/csv")},
+        )
+    assert r.status_code == 200
+    content = r.json()
+    assert content["created"] == 2
+    assert [(e["line"], e["error"]) for e in content["errors"]] == [
+        (3, "Email already exists"),
+        (4, "Email and password are required"),
+        (5, "Duplicate email in file"),
+    ]
+
+    user = crud.get_user_by_email(session=db, email=new_email)
+    assert user
+    assert user.full_name == "Ada Lovelace"
+    assert [p.full_name for p in user.profile] == ["Ada Lovelace"]
+    headers = user_authentication_headers(
+        client=client, email=other_email, password=password
+    )
+    r = client.get(f"{settings.API_V1_STR}/users/me", headers=headers)
+    assert r.json()["email"] == other_email
+
+
+def test_import_users_missing_columns(
+    client: TestClient, superuser_token_headers: dict[str, str]
+) -> None:
+    r = client.post(
+        f"{settings.API_V1_STR}/users/bulk",
+        headers=superuser_token_headers,
+        files={"file": ("users.csv", b"email,full_name\na@example.com,A\n")},
+    )
+    assert r.status_code == 400
+
+
+def test_import_users_normal_user(
+    client: TestClient, normal_user_token_headers: dict[str, str]
+) -> None:
+    r = client.post(
+        f"{settings.API_V1_STR}/users/bulk",
+        headers=normal_user_token_headers,
+        files={"file": ("users.csv", b"email,password\n")},
+    )
+    assert r.status_code == 400
+
+
+def test_export_users_ndjson(
+    client: TestClient, superuser_token_headers: dict[str, str], db: Session
+) -> None:
+    user = crud.create_user(
+        session=db,
+        user_create=UserCreate(email=random_email(), password=random_lower_string()),
+    )
+    r = client.get(
+        f"{settings.API_V1_STR}/users/export", headers=superuser_token_headers
+    )
+    assert r.status_code == 200
+    assert r.headers["content-type"] == "application/x-ndjson"
+    users = [json.loads(line) for line in r.text.splitlines()]
+    assert {"id": user.id, "email": user.email} in [
+        {"id": u["id"], "email": u["email"]} for u in users
+    ]
+    assert all("hashed_password" not in u for u in users)
+    assert [u["id"] for u in users] == sorted(u["id"] for u in users)
+
+
+def test_export_users_csv(
+    client: TestClient, superuser_token_headers: dict[str, str]
+) -> None:
+    r = client.get(
+        f"{settings.API_V1_STR}/users/export",
+        headers=superuser_token_headers,
+        params={"format": "csv"},
+    )
+    assert r.status_code == 200
+    assert r.headers["content-type"] == "text/csv; charset=utf-8"
+    rows = list(csv.DictReader(io.StringIO(r.text)))
+    assert settings.FIRST_SUPERUSER in [row["email"] for row in rows]
+    assert "hashed_password" not in rows[0]
+
+
+def test_export_users_normal_user(
+    client: TestClient, normal_user_token_headers: dict[str, str]
+) -> None:
+    r = client.get(
+        f"{settings.API_V1_STR}/users/export", headers=normal_user_token_headers
+    )
+    assert r.status_code == 400
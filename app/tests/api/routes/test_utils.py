@@ -0,0 +1,169 @@
+import pytest
+from fastapi.testclient import TestClient
+from sqlmodel import Session
+
+from app.core.config import settings
+from app.core.outbox import email_outbox
+from app.tests.utils.room import create_random_room
+from app.tests.utils.smtp import smtp_sink
+
+
+def test_db_pool_stats(
+    client: TestClient, superuser_token_headers: dict[str, str]
+) -> None:
+    r = client.get(
+        f"{settings.API_V1_STR}/utils/db-pool/", headers=superuser_token_headers
+    )
+    assert r.status_code == 200
+    content = r.json()
+    assert content["pid"]
+    pools = {pool["name"]: pool for pool in content["pools"]}
+    assert set(pools) == {"sync", "async"}
+    # this request itself checked out a connection to authenticate
+    assert pools["sync"]["checkouts"] >= 1
+    histogram = pools["sync"]["checkout_latency_ms"]
+    assert histogram["+Inf"] == pools["sync"]["checkouts"] + pools["sync"]["timeouts"]
+
+
+def test_db_pool_stats_normal_user(
+    client: TestClient, normal_user_token_headers: dict[str, str]
+) -> None:
+    r = client.get(
+        f"{settings.API_V1_STR}/utils/db-pool/", headers=normal_user_token_headers
+    )
+    assert r.status_code == 400
+
+
+def test_user_cache_stats(
+    client: TestClient, superuser_token_headers: dict[str, str]
+) -> None:
+    for _ in range(2):
+        r = client.get(
+            f"{settings.API_V1_STR}/utils/user-cache/",
+            headers=superuser_token_headers,
+        )
+        assert r.status_code == 200
+    content = r.json()
+    assert content["pid"]
+    # the superuser was cached by the first request at the latest
+    assert content["hits"] >= 1
+    assert content["size"] >= 1
+    assert 0 < content["hit_rate"] <= 1
+
+
+def test_cache_invalidation_stats(
+    client: TestClient, superuser_token_headers: dict[str, str]
+) -> None:
+    r = client.get(
+        f"{settings.API_V1_STR}/utils/cache-invalidation/",
+        headers=superuser_token_headers,
+    )
+    assert r.status_code == 200
+    content = r.json()
+    assert content["channel"] == settings.CACHE_INVALIDATION_CHANNEL
+    assert {"user", "answer_matcher", "count"} <= set(content["caches"])
+    assert content["max_lag_seconds"] >= content["last_lag_seconds"] >= 0
+
+
+def test_compression_stats(
+    client: TestClient, superuser_token_headers: dict[str, str]
+) -> None:
+    r = client.get(
+        f"{settings.API_V1_STR}/utils/compression/", headers=superuser_token_headers
+    )
+    assert r.status_code == 200
+    content = r.json()
+    assert content["minimum_size"] == settings.COMPRESSION_MINIMUM_SIZE
+    assert "gzip" in content["encodings"]
+    assert content["cache_maxsize"] == settings.COMPRESSION_CACHE_MAXSIZE
+
+
+def test_password_hasher_stats(
+    client: TestClient, superuser_token_headers: dict[str, str]
+) -> None:
+    r = client.get(
+        f"{settings.API_V1_STR}/utils/password-hasher/",
+        headers=superuser_token_headers,
+    )
+    assert r.status_code == 200
+    content = r.json()
+    assert content["workers"] == settings.PASSWORD_HASH_WORKERS
+    # logging in for the token verified a password
+    assert content["submitted"] >= 1
+    assert content["completed"] == content["submitted"] - content["pending"]
+
+
+def test_storage_stats(
+    client: TestClient, superuser_token_headers: dict[str, str]
+) -> None:
+    r = client.get(
+        f"{settings.API_V1_STR}/utils/storage/", headers=superuser_token_headers
+    )
+    assert r.status_code == 200
+    content = r.json()
+    assert content["uploads"] >= 0
+    assert content["mb_per_s"] >= 0
+
+
+def test_query_advisor_stats_disabled(
+    client: TestClient, superuser_token_headers: dict[str, str]
+) -> None:
+    r = client.get(
+        f"{settings.API_V1_STR}/utils/query-advisor/",
+        headers=superuser_token_headers,
+    )
+    assert r.status_code == 404
+
+
+def test_query_stats(
+    client: TestClient, superuser_token_headers: dict[str, str], db: Session
+) -> None:
+    create_random_room(db, sections=6, questions=1)
+    # one lazy load of questions per section, an N+1
+    r = client.get(f"{settings.API_V1_STR}/pages/", headers=superuser_token_headers)
+    assert r.status_code == 200
+    queries = int(r.headers["X-DB-Queries"])
+    assert queries > 6
+    assert float(r.headers["X-DB-Time-Ms"]) > 0
+    assert int(r.headers["X-DB-Repeated-Queries"]) >= 6
+
+    r = client.get(
+        f"{settings.API_V1_STR}/utils/queries/", headers=superuser_token_headers
+    )
+    assert r.status_code == 200
+    routes = {s["route"]: s for s in r.json()["routes"]}
+    pages = routes[f"GET {settings.API_V1_STR}/pages/"]
+    assert pages["requests"] >= 1
+    assert pages["max_queries"] >= queries
+    assert pages["n_plus_one"] >= 1
+
+
+def test_email_outbox(
+    client: TestClient,
+    superuser_token_headers: dict[str, str],
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    with smtp_sink() as sink:
+        monkeypatch.setattr(settings, "SMTP_HOST", "127.0.0.1")
+        monkeypatch.setattr(settings, "SMTP_PORT", sink.port)
+        monkeypatch.setattr(settings, "SMTP_TLS", False)
+        monkeypatch.setattr(settings, "SMTP_USER", None)
+        monkeypatch.setattr(settings, "EMAILS_FROM_EMAIL", "from@example.com")
+        r = client.post(
+            f"{settings.API_V1_STR}/utils/test-email/",
+            headers=superuser_token_headers,
+            params={"email_to": "someone@example.com"},
+        )
+        assert r.status_code == 201
+        assert email_outbox.flush(timeout=10)
+
+    recipients, message = sink.messages[-1]
+    assert recipients == ["someone@example.com"]
+    assert message["Subject"] == f"{settings.PROJECT_NAME} - Test email"
+    r = client.get(
+        f"{settings.API_V1_STR}/utils/email-outbox/", headers=superuser_token_headers
+    )
+    assert r.status_code == 200
+    content = r.json()
+    assert content["sent"] >= 1
+    assert content["queued"] == 0
@@ -0,0 +1,54 @@
+import json
+
+import pytest
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, ORJSONResponse
+
+from app.api.responses import ModelResponse, default_response_class
+from app.core.config import settings
+from app.models import Question, Room, RoomsTreeOut, Section, User, UsersOut
+
+
+def test_model_response_matches_validated_response() -> None:
+    user = User(id=1, email="user@example.com", hashed_password="secret")
+    users_out = UsersOut(
+        data=[user],
+        count=1,
+        next_cursor="next",  # type: ignore[list-item]
+    )
+    response = ModelResponse(users_out)
+    assert response.media_type == "application/json"
+    body = json.loads(response.body)
+    assert body == jsonable_encoder(users_out)
+    assert "hashed_password" not in body["data"][0]
+
+    section = Section(
+        id=1, title="Section", room_id=1, created_at="now", updated_at="now"
+    )
+    section.questions = [
+        Question(id=1, content="?", answer="42", answer_type="number", section_id=1)
+    ]
+    room = Room(
+        id=1,
+        title="Room",
+        difficulty=1,
+        level="easy",
+        is_active=True,
+        room_type="challenge",
+        visibility="public",
+        created_at="now",
+        updated_at="now",
+        file_name="room.zip",
+        owner_id=1,
+    )
+    room.sections = [section]
+    rooms_out = RoomsTreeOut(data=[room], count=1)  # type: ignore[list-item]
+    body = json.loads(ModelResponse(rooms_out).body)
+    assert body == jsonable_encoder(rooms_out)
+    assert "answer" not in body["data"][0]["sections"][0]["questions"][0]
+
+
+def test_default_response_class(monkeypatch: pytest.MonkeyPatch) -> None:
+    assert default_response_class() is JSONResponse
+    monkeypatch.setattr(settings, "JSON_RESPONSE_CLASS", "orjson")
+    assert default_response_class() is ORJSONResponse
@@ -0,0 +1,27 @@
+import pytest
+
+from app.core.answers import AnswerMatcher, hash_answer
+
+
+@pytest.mark.parametrize(
+    "answer_type,stored,submitted,correct",
+    [
+        ("text", "Hello World", "  hello   world", True),
+        ("text", "Hello World", "hello-world", False),
+        ("flag", "flag{Case}", " flag{Case}\n", True),
+        ("flag", "flag{Case}", "flag{case}", False),
+        ("number", "1.50", "+1.5", True),
+        ("number", "100", "1e2", True),
+        ("number", "1.5", "1.51", False),
+        ("unknown", "Exact", "exact", False),
+    ],
+)
+def test_answer_matcher(
+    answer_type: str, stored: str, submitted: str, correct: bool
+) -> None:
+    matcher = AnswerMatcher(answer_type, hash_answer(answer_type, stored), 10)
+    assert matcher.matches(submitted) is correct
+
+
+def test_hash_depends_on_answer_type() -> None:
+    assert hash_answer("text", "abc") != hash_answer("flag", "abc")
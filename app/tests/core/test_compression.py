@@ -0,0 +1,138 @@
+import gzip
+import json
+
+import httpx
+import pytest
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response, StreamingResponse
+from starlette.routing import Route
+from starlette.testclient import TestClient
+
+from app.api import middleware
+from app.api.middleware import CompressionMiddleware
+from app.core.compression import ResponseCompressor
+
+ROWS = [{"id": n, "description": "A highly compressible room"} for n in range(100)]
+
+
+@pytest.fixture()
+def compressor(monkeypatch: pytest.MonkeyPatch) -> ResponseCompressor:
+    compressor = ResponseCompressor(minimum_size=500, cache_maxsize=10)
+    monkeypatch.setattr(middleware, "response_compressor", compressor)
+    return compressor
+
+
+def _client() -> TestClient:
+    async def rows(request: Request) -> Response:
+        return JSONResponse(ROWS, headers={"etag": '"v1"'})
+
+    async def small(request: Request) -> Response:
+        return JSONResponse({"id": 1})
+
+    async def stream(request: Request) -> Response:
+        return StreamingResponse(
+            iter([json.dumps(ROWS).encode()] * 2), media_type="application/x-ndjson"
+        )
+
+    app = Starlette(
+        routes=[
+            Route("/rows", rows, methods=["GET", "POST"]),
+            Route("/small", small),
+            Route("/stream", stream),
+        ]
+    )
+    app.add_middleware(CompressionMiddleware)
+    return TestClient(app)
+
+
+def _get(
+    client: TestClient, path: str, accept_encoding: str = "gzip"
+) -> tuple[httpx.Response, bytes]:
+    """
+    The response and its body as sent, not decoded.
+    """
+    headers = {"accept-encoding": accept_encoding}
+    with client.stream("GET", path, headers=headers) as response:
+        return response, b"".join(response.iter_raw())
+
+
+@pytest.mark.parametrize(
+    "accept_encoding,encoding",
+    [
+        ("gzip, deflate", "gzip"),
+        ("deflate;q=1.0, gzip;q=0.5", "gzip"),
+        ("gzip;q=0", None),
+        ("*", "gzip"),
+        ("identity", None),
+        ("", None),
+    ],
+)
+def test_negotiate(accept_encoding: str, encoding: str | None) -> None:
+    compressor = ResponseCompressor(minimum_size=0, cache_maxsize=0)
+    compressor.encodings = ("gzip",)
+    assert compressor.negotiate(accept_encoding) == encoding
+
+
+def test_compressed_body_cached(compressor: ResponseCompressor) -> None:
+    client = _client()
+    for _ in range(3):
+        r, body = _get(client, "/rows")
+        assert r.headers["content-encoding"] == "gzip"
+        assert r.headers["vary"] == "Accept-Encoding"
+        assert r.headers["etag"] == 'W/"v1"'
+        assert int(r.headers["content-length"]) == len(body)
+        assert json.loads(gzip.decompress(body)) == ROWS
+
+    stats = compressor.stats()
+    assert stats["compressions"]["gzip"] == 1
+    assert stats["cache_hits"] == 2
+    assert 0 < stats["ratio"] < 0.2
+
+    # compressed, but only GET responses are cached
+    r = client.post("/rows", headers={"accept-encoding": "gzip"})
+    assert r.headers["content-encoding"] == "gzip"
+    assert r.json() == ROWS
+    assert compressor.stats()["compressions"]["gzip"] == 2
+
+
+def test_not_compressed(compressor: ResponseCompressor) -> None:
+    client = _client()
+    r, body = _get(client, "/rows", accept_encoding="identity")
+    assert "content-encoding" not in r.headers
+    # the response depends on Accept-Encoding all the same
+    assert r.headers["vary"] == "Accept-Encoding"
+    assert r.headers["etag"] == '"v1"'
+    assert json.loads(body) == ROWS
+
+    r, _ = _get(client, "/small")
+    assert "content-encoding" not in r.headers
+    assert "vary" not in r.headers
+
+    r, body = _get(client, "/stream")
+    assert "content-encoding" not in r.headers
+    assert len(body) == 2 * len(json.dumps(ROWS))
+    assert compressor.stats()["compressions"]["gzip"] == 0
+
+
+def test_brotli(compressor: ResponseCompressor) -> None:
+    brotli = pytest.importorskip("brotli")
+    assert compressor.encodings == ("br", "gzip")
+    assert compressor.negotiate("gzip, deflate, br") == "br"
+    assert compressor.negotiate("br;q=0, gzip") == "gzip"
+
+    client = _client()
+    for _ in range(2):
+        r, body = _get(client, "/rows", accept_encoding="gzip, br")
+        assert r.headers["content-encoding"] == "br"
+        assert r.headers["vary"] == "Accept-Encoding"
+        assert int(r.headers["content-length"]) == len(body)
+        assert json.loads(brotli.decompress(body)) == ROWS
+
+    # cached per encoding
+    r, body = _get(client, "/rows")
+    assert r.headers["content-encoding"] == "gzip"
+    assert json.loads(gzip.decompress(body)) == ROWS
+    stats = compressor.stats()
+    assert stats["compressions"] == {"br": 1, "gzip": 1}
+    assert stats["cache_hits"] == 1
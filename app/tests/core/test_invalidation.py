@@ -0,0 +1,114 @@
+import time
+from collections.abc import Callable, Generator
+from typing import Any
+
+import pytest
+from sqlalchemy import text
+from sqlmodel import Session
+
+from app import crud
+from app.core.cache import LRUCache
+from app.core.config import settings
+from app.core.db import engine
+from app.core.invalidation import InvalidationBus, invalidation_bus
+from app.models import UserCreate
+from app.tests.utils.utils import random_email, random_lower_string
+
+
+def _wait_for(condition: Callable[[], bool], timeout: float = 10) -> bool:
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.02)
+    return True
+
+
+@pytest.fixture()
+def worker() -> Generator[tuple[InvalidationBus, list[Any]], None, None]:
+    """
+    A bus standing for another worker, recording the evictions it receives.
+    """
+    bus = InvalidationBus(channel=settings.CACHE_INVALIDATION_CHANNEL)
+    evicted: list[Any] = []
+    bus.register("test", evicted.append)
+    bus.start()
+    assert _wait_for(lambda: bus.listening)
+    # connecting evicts everything, messages may have been missed
+    evicted.clear()
+    yield bus, evicted
+    bus.stop()
+
+
+def test_delivered_on_commit_only(worker: tuple[InvalidationBus, list[Any]]) -> None:
+    bus, evicted = worker
+    with Session(engine) as session:
+        invalidation_bus.publish(session, "test", [1])
+        session.rollback()
+        invalidation_bus.publish(session, "test", {3, 2})
+        time.sleep(0.2)
+        assert evicted == []
+        session.commit()
+
+    assert _wait_for(lambda: evicted == [[2, 3]])
+    stats = bus.stats()
+    assert stats["received"] == 1
+    assert stats["reconnects"] == 0
+    assert stats["max_lag_seconds"] >= stats["last_lag_seconds"] >= 0
+    assert stats["caches"] == ["test"]
+
+
+def test_own_messages_skipped(worker: tuple[InvalidationBus, list[Any]]) -> None:
+    bus, evicted = worker
+    with Session(engine) as session:
+        bus.publish(session, "test", [1])
+        # too large for a NOTIFY payload: the whole cache is evicted
+        invalidation_bus.publish(session, "test", range(5_000))
+        session.commit()
+
+    assert _wait_for(lambda: evicted == [None])
+    assert bus.stats()["published"] == 1
+    assert bus.stats()["received"] == 1
+
+
+def test_user_change_evicted_in_other_worker(
+    worker: tuple[InvalidationBus, list[Any]],
+) -> None:
+    bus, _ = worker
+    cache: LRUCache[int, str] = LRUCache(ttl=60, maxsize=10)
+    bus.register("user", cache.invalidate)
+    with Session(engine) as session:
+        user_in = UserCreate(email=random_email(), password=random_lower_string())
+        user = crud.create_user(session=session, user_create=user_in)
+        cache.set(user.id, user.email, cache.generation)  # type: ignore[arg-type]
+        cache.set(-1, "other", cache.generation)
+
+        user.full_name = "Renamed"
+        session.add(user)
+        session.commit()
+
+        assert _wait_for(lambda: cache.get(user.id) is None)  # type: ignore[arg-type]
+        assert cache.get(-1) == "other"
+
+
+def test_reconnects_after_disconnect(
+    worker: tuple[InvalidationBus, list[Any]],
+) -> None:
+    bus, evicted = worker
+    with Session(engine) as session:
+        session.execute(
+            text(
+                "SELECT pg_terminate_backend(pid) FROM pg_stat_activity"
+                " WHERE query = :listen AND pid <> pg_backend_pid()"
+            ),
+            {"listen": f'LISTEN "{bus.channel}"'},
+        )
+    assert _wait_for(lambda: bus.stats()["reconnects"] >= 1 and bus.listening)
+    # anything may have been missed while disconnected
+    assert _wait_for(lambda: None in evicted)
+
+    evicted.clear()
+    with Session(engine) as session:
+        invalidation_bus.publish(session, "test", [1])
+        session.commit()
+    assert _wait_for(lambda: evicted == [[1]])
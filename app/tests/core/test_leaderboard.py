@@ -0,0 +1,106 @@
+import asyncio
+import threading
+
+from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app import crud
+from app.core.db import async_engine, engine
+from app.core.leaderboard import Leaderboard, LeaderboardEntry, leaderboard
+from app.models import Solve
+from app.tests.utils.room import create_random_question
+from app.tests.utils.user import create_random_user
+
+
+def _leaderboard(scores: dict[int, int]) -> Leaderboard:
+    leaderboard = Leaderboard(sync_interval=1.0)
+    for user_id, score in scores.items():
+        leaderboard._add(user_id, score)
+    return leaderboard
+
+
+def test_leaderboard_order_and_ties() -> None:
+    leaderboard = _leaderboard({1: 10, 2: 30, 3: 10, 4: 0, 5: 20})
+    assert leaderboard.top(10) == [
+        LeaderboardEntry(1, 2, 30),
+        LeaderboardEntry(2, 5, 20),
+        LeaderboardEntry(3, 1, 10),
+        LeaderboardEntry(3, 3, 10),
+        LeaderboardEntry(5, 4, 0),
+    ]
+    assert leaderboard.top(2) == leaderboard.top(10)[:2]
+    assert leaderboard.around(3, before=1, after=1) == leaderboard.top(10)[2:5]
+    assert leaderboard.around(2, before=5, after=0) == leaderboard.top(1)
+    assert leaderboard.around(99, before=1, after=1) == []
+
+
+def test_leaderboard_incremental_updates() -> None:
+    leaderboard = _leaderboard({1: 10, 2: 30})
+    leaderboard._add(1, 25)
+    assert leaderboard.player(1) == (LeaderboardEntry(1, 1, 35), 50.0)
+    assert leaderboard.player(2) == (LeaderboardEntry(2, 2, 30), 0.0)
+    leaderboard.remove(1)
+    assert leaderboard.top(10) == [LeaderboardEntry(1, 2, 30)]
+    assert leaderboard.player(1) is None
+
+
+def test_leaderboard_grows_past_initial_capacity() -> None:
+    leaderboard = _leaderboard({1: 5, 2: 100_000, 3: 5000})
+    assert [e.user_id for e in leaderboard.top(3)] == [2, 3, 1]
+    assert leaderboard.player(1) == (LeaderboardEntry(3, 1, 5), 0.0)
+
+
+def test_leaderboard_concurrent_async_syncs() -> None:
+    leaderboard = Leaderboard(sync_interval=1.0)
+
+    async def sync() -> None:
+        async with AsyncSession(async_engine) as session:
+            await session.run_sync(lambda s: leaderboard.sync(s, force=True))
+
+    async def main() -> None:
+        try:
+            await asyncio.gather(*(sync() for _ in range(5)))
+            await asyncio.gather(*(sync() for _ in range(5)))
+        finally:
+            await async_engine.dispose()
+
+    # a sync blocking the event loop would hang asyncio.run, so run it aside
+    thread = threading.Thread(target=asyncio.run, args=(main(),), daemon=True)
+    thread.start()
+    thread.join(timeout=30)
+    assert not thread.is_alive()
+    assert leaderboard._loaded
+
+
+def test_leaderboard_load_waits_for_uncommitted_solves(db: Session) -> None:
+    board = Leaderboard(sync_interval=1.0)
+    early, late = create_random_user(db), create_random_user(db)
+    question = create_random_question(db)
+    with Session(engine) as pending, Session(engine) as session:
+        # takes the lower solve id, but commits after the higher one
+        pending.add(Solve(user_id=early.id, question_id=question.id, points=7))
+        pending.flush()
+        session.add(Solve(user_id=late.id, question_id=question.id, points=5))
+        session.commit()
+
+        board.sync(session, force=True)
+        assert board.player(late.id)[0].score == 5  # type: ignore[index, arg-type]
+        assert board.player(early.id) is None  # type: ignore[arg-type]
+
+        pending.commit()
+        board.sync(session, force=True)
+        assert board.player(early.id)[0].score == 7  # type: ignore[index, arg-type]
+
+
+def test_leaderboard_reset_on_cascade_deletes(db: Session) -> None:
+    user = create_random_user(db)
+    kept, deleted = create_random_question(db), create_random_question(db)
+    for question in (kept, deleted):
+        db.add(Solve(user_id=user.id, question_id=question.id, points=10))
+    db.commit()
+    leaderboard.sync(db, force=True)
+    assert leaderboard.player(user.id)[0].score == 20  # type: ignore[index, arg-type]
+
+    crud.delete_question(session=db, question_id=deleted.id)  # type: ignore[arg-type]
+    leaderboard.sync(db, force=True)
+    assert leaderboard.player(user.id)[0].score == 10  # type: ignore[index, arg-type]
@@ -0,0 +1,94 @@
+import json
+import os
+import time
+from pathlib import Path
+
+from app.core.metrics import DURATION_BUCKETS, Metrics
+
+
+def _dead_pid() -> int:
+    pid = 4_000_000
+    while True:
+        try:
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            return pid
+        except PermissionError:
+            pass
+        pid += 1
+
+
+def _sample(text: str, name: str) -> float:
+    for line in text.splitlines():
+        if line.startswith(name + " "):
+            return float(line.rsplit(" ", 1)[1])
+    raise AssertionError(f"{name} not in metrics")
+
+
+def test_metrics_histogram() -> None:
+    metrics = Metrics(directory=None, flush_interval=5)
+    metrics.request_started()
+    metrics.request_finished("rooms-read_rooms", "GET", 200, 0.02)
+    metrics.request_started()
+    metrics.request_finished("rooms-read_rooms", "GET", 500, 20.0)
+    metrics.request_started()
+    text = metrics.render()
+
+    labels = 'route="rooms-read_rooms",method="GET"'
+    assert _sample(text, f'http_requests_total{{{labels},status="200"}}') == 1
+    assert _sample(text, f'http_requests_total{{{labels},status="500"}}') == 1
+    bucket = "http_request_duration_seconds_bucket"
+    assert _sample(text, f'{bucket}{{{labels},le="0.01"}}') == 0
+    assert _sample(text, f'{bucket}{{{labels},le="0.025"}}') == 1
+    assert _sample(text, f'{bucket}{{{labels},le="{DURATION_BUCKETS[-1]}"}}') == 1
+    assert _sample(text, f'{bucket}{{{labels},le="+Inf"}}') == 2
+    assert _sample(text, f"http_request_duration_seconds_count{{{labels}}}") == 2
+    assert _sample(text, f"http_request_duration_seconds_sum{{{labels}}}") == 20.02
+    assert _sample(text, "http_requests_in_flight") == 1
+    assert "# TYPE password_hash_queued gauge" in text
+
+
+def test_metrics_aggregate_workers(tmp_path: Path) -> None:
+    metrics = Metrics(directory=str(tmp_path), flush_interval=5)
+    metrics.request_started()
+    metrics.request_finished("users-read_user_me", "GET", 200, 0.001)
+
+    # another worker's snapshot, as written by its flush
+    other = metrics.snapshot()
+    other["pid"] = os.getppid()
+    (tmp_path / f"{other['pid']}.json").write_text(json.dumps(other))
+    exited = metrics.snapshot()
+    exited["pid"] = _dead_pid()
+    (tmp_path / f"{exited['pid']}.json").write_text(json.dumps(exited))
+
+    text = metrics.render()
+    labels = 'route="users-read_user_me",method="GET",status="200"'
+    # the requests of all three, gauges of the running two only
+    assert _sample(text, f"http_requests_total{{{labels}}}") == 3
+    workers = metrics.snapshot()["gauges"]
+    own = next(v for n, _, v in workers if n == "password_hash_workers")
+    assert _sample(text, "password_hash_workers") == 2 * own
+    assert (tmp_path / f"{os.getpid()}.json").exists()
+
+
+def test_metrics_flushed_in_background(tmp_path: Path) -> None:
+    metrics = Metrics(directory=str(tmp_path), flush_interval=0.05)
+    path = tmp_path / f"{os.getpid()}.json"
+    metrics.request_started()
+    metrics.request_finished("users-read_user_me", "GET", 200, 0.001)
+    # requests only count, they never write
+    assert not path.exists()
+
+    metrics.start()
+    deadline = time.monotonic() + 5
+    while not path.exists() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert json.loads(path.read_text())["requests"] == [
+        ["users-read_user_me", "GET", "200", 1]
+    ]
+
+    metrics.request_started()
+    metrics.request_finished("users-read_user_me", "GET", 200, 0.001)
+    metrics.stop()
+    # the last counts are written on stop
+    assert json.loads(path.read_text())["requests"][0][-1] == 2
@@ -0,0 +1,158 @@
+import smtplib
+import time
+from collections.abc import Generator
+from unittest.mock import Mock
+
+import pytest
+
+from app.core.config import settings
+from app.core.outbox import EmailOutbox, OutboxMessage
+from app.tests.utils.smtp import SMTPSink, smtp_sink
+
+
+@pytest.fixture()
+def sink(monkeypatch: pytest.MonkeyPatch) -> Generator[SMTPSink, None, None]:
+    with smtp_sink() as sink:
+        monkeypatch.setattr(settings, "SMTP_HOST", "127.0.0.1")
+        monkeypatch.setattr(settings, "SMTP_PORT", sink.port)
+        monkeypatch.setattr(settings, "SMTP_TLS", False)
+        monkeypatch.setattr(settings, "SMTP_SSL", False)
+        monkeypatch.setattr(settings, "SMTP_USER", None)
+        monkeypatch.setattr(settings, "EMAILS_FROM_EMAIL", "from@example.com")
+        yield sink
+
+
+def _outbox(**kwargs: float) -> EmailOutbox:
+    options = {
+        "connections": 1,
+        "batch_size": 10,
+        "max_attempts": 3,
+        "retry_seconds": 0.01,
+        "idle_seconds": 5,
+    }
+    return EmailOutbox(**{**options, **kwargs})  # type: ignore[arg-type]
+
+
+def _message(n: int) -> str:
+    return f"Subject: message {n}\r\n\r\nbody {n}\r\n"
+
+
+def test_outbox_reuses_connection(sink: SMTPSink) -> None:
+    outbox = _outbox()
+    for n in range(25):
+        outbox.send(email_to=f"user{n}@example.com", message=_message(n))
+    assert outbox.flush(timeout=10)
+    outbox.shutdown()
+
+    assert [m["Subject"] for _, m in sink.messages] == [
+        f"message {n}" for n in range(25)
+    ]
+    assert sink.messages[3][0] == ["user3@example.com"]
+    assert sink.connections == 1
+    stats = outbox.stats()
+    assert stats["sent"] == 25
+    assert stats["queued"] == 0
+    assert stats["connects"] == 1
+    assert stats["max_lag_seconds"] >= stats["last_lag_seconds"] > 0
+
+
+def test_outbox_retries_with_backoff(sink: SMTPSink) -> None:
+    sink.fail_data = 2
+    outbox = _outbox()
+    outbox.send(email_to="user@example.com", message=_message(1))
+    assert outbox.flush(timeout=10)
+    outbox.shutdown()
+
+    assert len(sink.messages) == 1
+    stats = outbox.stats()
+    assert stats["sent"] == 1
+    assert stats["retried"] == 2
+    assert stats["failed"] == 0
+    # a 451 reply leaves the connection usable
+    assert stats["connects"] == 1
+
+
+def test_outbox_gives_up(sink: SMTPSink) -> None:
+    sink.fail_data = 5
+    outbox = _outbox()
+    outbox.send(email_to="user@example.com", message=_message(1))
+    # refused with a 550, never retried
+    outbox.send(email_to="reject@example.com", message=_message(2))
+    assert outbox.flush(timeout=10)
+    outbox.shutdown()
+
+    stats = outbox.stats()
+    assert stats["sent"] == 0
+    assert stats["retried"] == 2
+    assert stats["failed"] == 2
+    assert sink.messages == []
+
+
+def test_outbox_reconnects_after_idle(sink: SMTPSink) -> None:
+    outbox = _outbox(idle_seconds=0.05)
+    outbox.send(email_to="user@example.com", message=_message(1))
+    assert outbox.flush(timeout=10)
+    time.sleep(0.3)
+    outbox.send(email_to="user@example.com", message=_message(2))
+    assert outbox.flush(timeout=10)
+    outbox.shutdown()
+
+    assert len(sink.messages) == 2
+    assert sink.connections == 2
+
+
+def test_outbox_unreachable_server(monkeypatch: pytest.MonkeyPatch) -> None:
+    with smtp_sink() as sink:
+        port = sink.port
+    monkeypatch.setattr(settings, "SMTP_HOST", "127.0.0.1")
+    monkeypatch.setattr(settings, "SMTP_PORT", port)
+    monkeypatch.setattr(settings, "SMTP_TLS", False)
+    monkeypatch.setattr(settings, "SMTP_USER", None)
+    outbox = _outbox(retry_seconds=60)
+
+    start = time.monotonic()
+    outbox.send(email_to="user@example.com", message=_message(1))
+    assert time.monotonic() - start < 0.5
+    assert not outbox.flush(timeout=0.2)
+    stats = outbox.stats()
+    assert stats["queued"] == 1
+    assert stats["retried"] == 1
+    assert stats["lag_seconds"] > 0
+    # waiting for a retry, dropped
+    outbox.shutdown()
+    assert outbox.stats()["failed"] == 1
+    assert outbox.stats()["queued"] == 0
+
+
+def test_outbox_replaces_failed_thread(sink: SMTPSink) -> None:
+    outbox = _outbox()
+    connect = outbox._connect
+    calls = []
+
+    def flaky_connect() -> smtplib.SMTP:
+        calls.append(1)
+        if len(calls) == 1:
+            raise RuntimeError("unexpected")
+        return connect()
+
+    outbox._connect = flaky_connect  # type: ignore[method-assign]
+    for n in range(3):
+        outbox.send(email_to=f"user{n}@example.com", message=_message(n))
+    assert outbox.flush(timeout=10)
+    stats = outbox.stats()
+    outbox.shutdown()
+
+    assert len(sink.messages) == 3
+    assert stats["retried"] == 1
+    assert stats["threads"] == 1
+
+
+def test_outbox_closes_disconnected_connection(sink: SMTPSink) -> None:
+    outbox = _outbox()
+    stale = Mock(spec=smtplib.SMTP)
+    stale.sendmail.side_effect = smtplib.SMTPServerDisconnected()
+    stale.quit.side_effect = smtplib.SMTPServerDisconnected()
+
+    outbox._deliver(stale, OutboxMessage(0, 0, "user@example.com", _message(1), 0))
+    stale.close.assert_called_once()
+    assert len(sink.messages) == 1
@@ -0,0 +1,34 @@
+from sqlmodel import Session, create_engine, select
+
+from app.core.config import settings
+from app.core.query_advisor import QueryAdvisor
+from app.models import Item
+
+
+def test_query_advisor_flags_sequential_scans() -> None:
+    engine = create_engine(str(settings.SQLALCHEMY_DATABASE_URI))
+    advisor = QueryAdvisor(threshold_ms=0, min_rows=0)
+    advisor.install(engine)
+    with Session(engine) as session:
+        statement = select(Item).where(Item.description == "no such description")
+        assert session.exec(statement).all() == []
+        # the EXPLAIN ran in a savepoint, the transaction goes on
+        assert session.exec(statement).all() == []
+    engine.dispose()
+
+    finding = advisor.findings[0]
+    assert finding["seq_scans"].keys() == {"item"}
+    assert "FROM item" in finding["statement"]
+    assert advisor.flagged == advisor.explained >= 2
+
+
+def test_query_advisor_ignores_small_tables() -> None:
+    engine = create_engine(str(settings.SQLALCHEMY_DATABASE_URI))
+    advisor = QueryAdvisor(threshold_ms=0, min_rows=10**12)
+    advisor.install(engine)
+    with Session(engine) as session:
+        session.exec(select(Item)).all()
+    engine.dispose()
+    assert advisor.explained == 1
+    assert advisor.flagged == 0
+    assert not advisor.findings
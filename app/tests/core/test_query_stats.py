@@ -0,0 +1,22 @@
+from app.core.query_stats import RequestQueries, statement_shape
+
+
+def test_statement_shape_ignores_the_number_of_in_values() -> None:
+    assert statement_shape(
+        "SELECT * FROM room\nWHERE room.id IN (%(id_1_1)s, %(id_1_2)s)"
+    ) == statement_shape(
+        "SELECT * FROM room WHERE room.id IN (%(id_1_1)s, %(id_1_2)s, %(id_1_3)s)"
+    )
+
+
+def test_request_queries_repeated() -> None:
+    queries = RequestQueries()
+    queries.record("SELECT 1", 0.001)
+    for _ in range(5):
+        queries.record("SELECT * FROM question WHERE section_id = %(p)s", 0.002)
+    assert queries.count == 6
+    assert queries.max_repeats == 5
+    assert queries.repeated(5) == [
+        ("SELECT * FROM question WHERE section_id = %(p)s", 5)
+    ]
+    assert queries.repeated(6) == []
@@ -0,0 +1,32 @@
+from app.benchmarks.import_time import (
+    COLD_START_BUDGET_MS,
+    LAZY_MODULES,
+    import_times,
+    parse_importtime,
+)
+
+
+def test_parse_importtime() -> None:
+    stderr = (
+        "import time: self [us] | cumulative | imported package\n"
+        "import time:       120 |        120 |   app.core.config\n"
+        "import time:        80 |        200 | app.core\n"
+    )
+    config, core = parse_importtime(stderr)
+    assert (config.name, config.depth, config.self_us) == ("app.core.config", 1, 120)
+    assert (core.name, core.depth, core.cumulative_us) == ("app.core", 0, 200)
+
+
+def test_app_cold_start_budget() -> None:
+    modules = import_times("app.main")
+    loaded = {m.name for m in modules}
+    assert [m for m in LAZY_MODULES if m in loaded] == []
+    app_main = next(m for m in modules if m.name == "app.main")
+    assert app_main.cumulative_us / 1000 < COLD_START_BUDGET_MS
+
+
+def test_prestart_imports() -> None:
+    loaded = {m.name for m in import_times("app.backend_pre_start")}
+    # neither the web framework nor the lazy SDKs, only the database layer
+    assert "fastapi" not in loaded
+    assert [m for m in LAZY_MODULES if m in loaded] == []
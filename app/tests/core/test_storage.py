@@ -0,0 +1,59 @@
+import io
+from datetime import timedelta
+from pathlib import Path
+
+import pytest
+
+from app.core.storage import SAS_REFRESH_MARGIN, LocalStorage
+from app.tests.utils.blob_storage import fake_blob_storage
+
+
+def test_client_and_sas_are_reused() -> None:
+    with fake_blob_storage() as (storage, _):
+        client = storage.get_client()
+        signature = client.credential.signature
+        assert storage.get_client() is client
+        assert client.credential.signature == signature
+
+
+def test_sas_is_renewed_before_expiry() -> None:
+    with fake_blob_storage(sas_ttl=SAS_REFRESH_MARGIN + timedelta(seconds=1)) as (
+        storage,
+        _,
+    ):
+        client = storage.get_client()
+        credential = client.credential
+        first_expiry = storage._sas_expiry
+        storage.sas_ttl = timedelta(hours=1)
+        storage._sas_expiry -= timedelta(seconds=2)
+        assert storage.get_client() is client
+        # renewed in place, the client keeps its credential object
+        assert client.credential is credential
+        assert storage._sas_expiry > first_expiry
+
+
+def test_small_file_is_uploaded_in_one_request() -> None:
+    with fake_blob_storage(block_size=1024) as (storage, service):
+        result = storage.upload("small.txt", io.BytesIO(b"hello"))
+    assert result.size == 5
+    assert service.blobs["/devstoreaccount1/rooms/small.txt"] == b"hello"
+    assert service.staged_blocks == 0
+
+
+def test_local_storage(tmp_path: Path) -> None:
+    storage = LocalStorage(tmp_path)
+    storage.upload("map.bin", io.BytesIO(b"abcdefgh"))
+    stored = storage.stat("map.bin")
+    assert stored is not None
+    assert stored.size == 8
+    assert stored.path == tmp_path / "map.bin"
+    assert b"".join(storage.read("map.bin", 2, 3)) == b"cde"
+    assert storage.stat("missing.bin") is None
+    # no temporary files left behind
+    assert [p.name for p in tmp_path.iterdir()] == ["map.bin"]
+
+
+@pytest.mark.parametrize("name", ["", "..", "../map.bin", "a/b.bin"])
+def test_local_storage_rejects_paths(tmp_path: Path, name: str) -> None:
+    with pytest.raises(ValueError):
+        LocalStorage(tmp_path).upload(name, io.BytesIO(b"x"))
@@ -0,0 +1,91 @@
+from datetime import datetime
+
+from sqlmodel import Session
+
+from app import crud
+from app.models import Badge, Room, RoomImport, SectionCreate, SectionUpdate
+from app.tests.utils.room import create_random_room
+from app.tests.utils.user import create_random_user
+
+
+def test_room_version(db: Session) -> None:
+    room = create_random_room(db, sections=0)
+    assert room.version == 1
+
+    room.title = "renamed"
+    db.add(room)
+    db.commit()
+    db.refresh(room)
+    assert room.version == 2
+
+    # no net change, no new version
+    room.title = "renamed"
+    db.add(room)
+    db.commit()
+    db.refresh(room)
+    assert room.version == 2
+
+    now = datetime.utcnow().isoformat()
+    section = crud.create_section(
+        session=db,
+        section_in=SectionCreate(
+            title="section", room_id=room.id, created_at=now, updated_at=now
+        ),
+    )
+    db.refresh(room)
+    assert room.version == 3
+    crud.update_section(
+        session=db, section_id=section.id, section_in=SectionUpdate(title="moved")
+    )
+    db.refresh(room)
+    assert room.version == 4
+    crud.delete_section(session=db, section_id=section.id)
+    db.refresh(room)
+    assert room.version == 5
+
+
+def test_badge_and_profile_version(db: Session) -> None:
+    user = create_random_user(db)
+    badge = Badge(title="badge", image="badge.png", owner_id=user.id)
+    db.add(badge)
+    db.commit()
+    db.refresh(badge)
+    assert badge.version == 1
+    badge.image = "other.png"
+    db.add(badge)
+    db.commit()
+    db.refresh(badge)
+    assert badge.version == 2
+
+    profile = crud.get_profile_by_user_id(session=db, user_id=user.id)
+    assert profile
+    assert profile.version == 1
+    profile.bio = "updated"
+    db.add(profile)
+    db.commit()
+    db.refresh(profile)
+    assert profile.version == 2
+
+
+def test_imported_rooms_start_at_version_one(db: Session) -> None:
+    user = create_random_user(db)
+    now = datetime.utcnow().isoformat()
+    room_in = RoomImport(
+        title="imported",
+        difficulty=1,
+        level="easy",
+        is_active=True,
+        room_type="challenge",
+        visibility="public",
+        created_at=now,
+        updated_at=now,
+        file_name="",
+        sections=[],
+    )
+    # written through Core, the server default applies
+    (room_id,), _, _ = crud.import_rooms(
+        session=db, rooms_in=[room_in], owner_id=user.id
+    )
+    room = db.get(Room, room_id)
+    assert room
+    assert room.version == 1
@@ -0,0 +1,38 @@
+from sqlmodel import Session
+
+from app.core.counts import count_rows
+from app.models import Item, User
+from app.tests.utils.item import create_random_item
+from app.tests.utils.user import create_random_user
+
+
+def test_cached_count_invalidated_on_create(db: Session) -> None:
+    count = count_rows(db, User, mode="cached")
+    assert count_rows(db, User, mode="cached") == count
+    create_random_user(db)
+    assert count_rows(db, User, mode="cached") == count + 1
+
+
+def test_cached_count_invalidated_on_delete(db: Session) -> None:
+    item = create_random_item(db)
+    count = count_rows(db, Item, Item.owner_id == item.owner_id, mode="cached")
+    assert count == 1
+    db.delete(item)
+    db.commit()
+    assert count_rows(db, Item, Item.owner_id == item.owner_id, mode="cached") == 0
+
+
+def test_cached_count_per_filter(db: Session) -> None:
+    item = create_random_item(db)
+    other = create_random_item(db)
+    assert count_rows(db, Item, Item.owner_id == item.owner_id, mode="cached") == 1
+    assert count_rows(db, Item, Item.owner_id == other.owner_id, mode="cached") == 1
+    assert count_rows(db, Item, mode="cached") == count_rows(db, Item)
+
+
+def test_estimated_count(db: Session) -> None:
+    create_random_user(db)
+    assert count_rows(db, User, mode="estimate") >= 0
+    # filtered counts are never estimated
+    user = create_random_user(db)
+    assert count_rows(db, User, User.id == user.id, mode="estimate") == 1
@@ -0,0 +1,137 @@
+import threading
+import xml.etree.ElementTree as ET
+from collections.abc import Generator
+from contextlib import contextmanager
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any
+from urllib.parse import parse_qs, unquote, urlparse
+
+from app.core.storage import AzureBlobStorage
+
+# Azurite's well-known development account
+ACCOUNT_NAME = "devstoreaccount1"
+ACCOUNT_KEY = (
+    "Eby8vdM02xNOcqFlqUwJPLlmEtlCDXJ1OUzFT50uSRZ6IFsuFq2UVErCz4I6tq"
+    "/K1SZFPTOtr/KBHBeksoGMGw=="
+)
+
+
+class FakeBlobService(ThreadingHTTPServer):
+    """
+    Just enough of the Blob service REST API, as served by Azurite, to upload
+    and download block blobs. Authentication is not checked.
+    """
+
+    def __init__(self) -> None:
+        super().__init__(("127.0.0.1", 0), _BlobHandler)
+        self.lock = threading.Lock()
+        # blob path -> content, and blob path -> block id -> staged block
+        self.blobs: dict[str, bytes] = {}
+        self.staged: dict[str, dict[str, bytes]] = {}
+        self.staged_blocks = 0
+        self.queries: list[dict[str, list[str]]] = []
+
+    @property
+    def account_url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}/{ACCOUNT_NAME}"
+
+
+class _BlobHandler(BaseHTTPRequestHandler):
+    server: FakeBlobService
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+    def _reply(
+        self, status: int, body: bytes = b"", headers: dict[str, str] | None = None
+    ) -> None:
+        self.send_response(status)
+        self.send_header("ETag", '"0x1"')
+        self.send_header("Last-Modified", formatdate(usegmt=True))
+        self.send_header("x-ms-request-id", "fake")
+        self.send_header("x-ms-version", "2021-12-02")
+        self.send_header("x-ms-blob-type", "BlockBlob")
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        if "Content-Length" not in (headers or {}):
+            self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(body)
+
+    def do_PUT(self) -> None:
+        url = urlparse(self.path)
+        query = parse_qs(url.query)
+        path = unquote(url.path)
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        with self.server.lock:
+            self.server.queries.append(query)
+            comp = query.get("comp", [""])[0]
+            if comp == "block":
+                block_id = query["blockid"][0]
+                self.server.staged.setdefault(path, {})[block_id] = body
+                self.server.staged_blocks += 1
+            elif comp == "blocklist":
+                staged = self.server.staged.pop(path, {})
+                ids = [element.text or "" for element in ET.fromstring(body)]
+                self.server.blobs[path] = b"".join(staged[i] for i in ids)
+            else:
+                self.server.blobs[path] = body
+        self._reply(201)
+
+    def _get_blob(self) -> bytes | None:
+        path = unquote(urlparse(self.path).path)
+        with self.server.lock:
+            content = self.server.blobs.get(path)
+        if content is None:
+            self._reply(404, headers={"x-ms-error-code": "BlobNotFound"})
+        return content
+
+    def do_HEAD(self) -> None:
+        content = self._get_blob()
+        if content is not None:
+            self._reply(200, headers={"Content-Length": str(len(content))})
+
+    def do_GET(self) -> None:
+        content = self._get_blob()
+        if content is None:
+            return
+        byte_range = self.headers.get("x-ms-range") or self.headers.get("Range")
+        if not byte_range:
+            self._reply(200, content)
+            return
+        first, _, last = byte_range.removeprefix("bytes=").partition("-")
+        start = int(first)
+        end = min(int(last) if last else len(content) - 1, len(content) - 1)
+        self._reply(
+            206,
+            content[start : end + 1],
+            headers={"Content-Range": f"bytes {start}-{end}/{len(content)}"},
+        )
+
+
+@contextmanager
+def fake_blob_storage(
+    container: str = "rooms", **options: Any
+) -> Generator[tuple[AzureBlobStorage, FakeBlobService], None, None]:
+    """
+    An AzureBlobStorage talking to a FakeBlobService running for the block.
+    """
+    service = FakeBlobService()
+    thread = threading.Thread(target=service.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield (
+            AzureBlobStorage(
+                account_name=ACCOUNT_NAME,
+                account_key=ACCOUNT_KEY,
+                container=container,
+                account_url=service.account_url,
+                **options,
+            ),
+            service,
+        )
+    finally:
+        service.shutdown()
+        service.server_close()
@@ -0,0 +1,70 @@
+from datetime import datetime
+
+from sqlmodel import Session
+
+from app import crud
+from app.models import Question, QuestionCreate, Room, RoomCreate, SectionCreate
+from app.tests.utils.user import create_random_user
+from app.tests.utils.utils import random_lower_string
+
+
+def create_random_room(db: Session, *, sections: int = 1, questions: int = 1) -> Room:
+    user = create_random_user(db)
+    now = datetime.utcnow().isoformat()
+    room_in = RoomCreate(
+        title=random_lower_string(),
+        description=random_lower_string(),
+        difficulty=1,
+        level="easy",
+        is_active=True,
+        room_type="challenge",
+        visibility="public",
+        created_at=now,
+        updated_at=now,
+        file_name="",
+    )
+    room = Room.model_validate(room_in, update={"owner_id": user.id})
+    db.add(room)
+    db.commit()
+    db.refresh(room)
+    for _ in range(sections):
+        section_in = SectionCreate(
+            title=random_lower_string(),
+            room_id=room.id,
+            created_at=now,
+            updated_at=now,
+        )
+        section = crud.create_section(session=db, section_in=section_in)
+        for _ in range(questions):
+            question_in = QuestionCreate(
+                content=random_lower_string(),
+                answer=random_lower_string(),
+                answer_type="text",
+            )
+            question = Question.model_validate(
+                question_in, update={"section_id": section.id}
+            )
+            db.add(question)
+        db.commit()
+    return room
+
+
+def create_random_question(
+    db: Session,
+    *,
+    answer: str | None = None,
+    answer_type: str = "text",
+    points: int = 10,
+) -> Question:
+    room = create_random_room(db, sections=1, questions=0)
+    question = Question(
+        content=random_lower_string(),
+        answer=answer if answer is not None else random_lower_string(),
+        answer_type=answer_type,
+        points=points,
+        section_id=room.sections[0].id,
+    )
+    db.add(question)
+    db.commit()
+    db.refresh(question)
+    return question
@@ -0,0 +1,89 @@
+import email
+import socketserver
+import threading
+from collections.abc import Generator
+from contextlib import contextmanager
+from email.message import Message
+
+
+class SMTPSink(socketserver.ThreadingTCPServer):
+    """
+    A local SMTP server keeping what it receives. Recipients starting with
+    "reject" are refused with a 550, and the next `fail_data` messages get a 451.
+    """
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self) -> None:
+        super().__init__(("127.0.0.1", 0), _SMTPHandler)
+        self.messages: list[tuple[list[str], Message]] = []
+        self.connections = 0
+        self.fail_data = 0
+        self.lock = threading.Lock()
+
+    @property
+    def port(self) -> int:
+        return self.server_address[1]
+
+
+class _SMTPHandler(socketserver.StreamRequestHandler):
+    server: SMTPSink
+
+    def reply(self, line: str) -> None:
+        self.wfile.write(f"{line}\r\n".encode())
+
+    def handle(self) -> None:
+        with self.server.lock:
+            self.server.connections += 1
+        recipients: list[str] = []
+        self.reply("220 sink ESMTP")
+        for raw in self.rfile:
+            command = raw.decode().strip()
+            verb = command[:4].upper()
+            if verb in ("EHLO", "HELO"):
+                self.reply("250 sink")
+            elif verb == "MAIL":
+                recipients = []
+                self.reply("250 OK")
+            elif verb == "RCPT":
+                address = command.split(":", 1)[1].strip(" <>")
+                if address.startswith("reject"):
+                    self.reply("550 No such user")
+                else:
+                    recipients.append(address)
+                    self.reply("250 OK")
+            elif verb == "DATA":
+                self.reply("354 End data with <CR><LF>.<CR><LF>")
+                lines = []
+                for data in self.rfile:
+                    if data == b".\r\n":
+                        break
+                    lines.append(data[1:] if data.startswith(b"..") else data)
+                with self.server.lock:
+                    failing = self.server.fail_data > 0
+                    if failing:
+                        self.server.fail_data -= 1
+                    else:
+                        message = email.message_from_bytes(b"".join(lines))
+                        self.server.messages.append((recipients, message))
+                self.reply("451 Try again later" if failing else "250 OK")
+            elif verb in ("RSET", "NOOP"):
+                self.reply("250 OK")
+            elif verb == "QUIT":
+                self.reply("221 Bye")
+                return
+            else:
+                self.reply("502 Not implemented")
+
+
+@contextmanager
+def smtp_sink() -> Generator[SMTPSink, None, None]:
+    sink = SMTPSink()
+    thread = threading.Thread(target=sink.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield sink
+    finally:
+        sink.shutdown()
+        sink.server_close()
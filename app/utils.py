@@ -1,14 +1,16 @@
-import logging
 from dataclasses import dataclass
 from datetime import datetime, timedelta
+from functools import cache
 from pathlib import Path
-from typing import Any
+from typing import TYPE_CHECKING, Any
 
-import emails  # type: ignore
-from jinja2 import Template
 from jose import JWTError, jwt
 
 from app.core.config import settings
+from app.core.outbox import email_outbox
+
+if TYPE_CHECKING:
+    from jinja2 import Environment
 
 
 @dataclass
@@ -17,12 +19,38 @@ class EmailData:
     subject: str
 
 
+@cache
+def get_email_templates() -> "Environment":
+    """
+    The email templates environment, created, and jinja2 imported, on first use.
+
+    Templates are compiled once per process and kept: they only change with a
+    deploy. The bytecode cache lets new worker processes skip compiling too.
+    """
+    from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader
+
+    return Environment(
+        loader=FileSystemLoader(Path(__file__).parent / "email-templates" / "build"),
+        auto_reload=False,
+        bytecode_cache=(
+            FileSystemBytecodeCache(settings.EMAIL_TEMPLATES_BYTECODE_DIR)
+            if settings.EMAIL_TEMPLATES_BYTECODE_DIR
+            else None
+        ),
+    )
+
+
+def warm_email_templates() -> None:
+    """
+    Compile every email template, so that the first emails sent do not.
+    """
+    email_templates = get_email_templates()
+    for template_name in email_templates.list_templates():
+        email_templates.get_template(template_name)
+
+
 def render_email_template(*, template_name: str, context: dict[str, Any]) -> str:
-    template_str = (
-        Path(__file__).parent / "email-templates" / "build" / template_name
-    ).read_text()
-    html_content = Template(template_str).render(context)
-    return html_content
+    return get_email_templates().get_template(template_name).render(context)
 
 
 def send_email(
@@ -31,23 +59,21 @@ def send_email(
     subject: str = "",
     html_content: str = "",
 ) -> None:
+    """
+    Queue an email, it is sent in the background by `email_outbox`.
+    """
     assert settings.emails_enabled, "no provided configuration for email variables"
+    # imported on first use: with dkim and dnspython it takes over 100 ms to
+    # import, and most workers seldom send an email
+    import emails  # type: ignore
+
     message = emails.Message(
         subject=subject,
         html=html_content,
         mail_from=(settings.EMAILS_FROM_NAME, settings.EMAILS_FROM_EMAIL),
+        mail_to=email_to,
     )
-    smtp_options = {"host": settings.SMTP_HOST, "port": settings.SMTP_PORT}
-    if settings.SMTP_TLS:
-        smtp_options["tls"] = True
-    elif settings.SMTP_SSL:
-        smtp_options["ssl"] = True
-    if settings.SMTP_USER:
-        smtp_options["user"] = settings.SMTP_USER
-    if settings.SMTP_PASSWORD:
-        smtp_options["password"] = settings.SMTP_PASSWORD
-    response = message.send(to=email_to, smtp=smtp_options)
-    logging.info(f"send email result: {response}")
+    email_outbox.send(email_to=email_to, message=message.as_string())
 
 
 def generate_test_email(email_to: str) -> EmailData: